@@ -1,26 +1,69 @@
-from fastapi import APIRouter, HTTPException, Depends, Query, status
-from typing import List, Dict, Any, Optional
-from datetime import date
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Query, Header, Response, status
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
 import json
+import threading
 
+from app import profiling
+from app.domain.catalog import CatalogValidationError
 from app.domain.models import Student, Term, Course, Assignment, CourseEnrollment
 from app.domain.risk import RiskEngine
-from app.infrastructure import storage
+from app.domain.risk_model import CompiledRiskModel
+from app.infrastructure import deadline_index, enrollment_index, job_runs, name_changes, risk_cache, risk_history, storage
+from app.domain.ds.name_index import NameIndex
 from app.domain.ds.undo_stack import UndoStack
+from app.services import analytics, scheduler, simulation
 
 # Create router
 router = APIRouter(tags=["students"])
 
+# Öğrenci okumaları her istekte yeniden doğrulanır; paylaşılan önbelleklerde tutulmaz
+READ_CACHE_CONTROL = "private, no-cache"
+
+# Toplu risk isteğinde kabul edilen en fazla öğrenci sayısı
+MAX_BATCH_SIZE = 500
+# Toplu isteklerde öğrenci dosyalarını eşzamanlı okuyan iş parçacığı sayısı
+BATCH_LOAD_WORKERS = 8
+
 # In-memory Trie for course autocomplete
 course_trie = {}
 
 # In-memory undo stacks for each student
 student_undo_stacks: Dict[int, UndoStack[Student]] = {}
 
+# Öğrenci adı arama dizini; ilk aramada ya da açılıştaki ısınmada kurulur
+student_name_index: Optional[NameIndex] = None
+# Dizine uygulanan son ad değişikliğinin sıra numarası (ortak değişiklik akışında)
+_name_index_seq = 0
+# Kısa süreli: dizin okuma ve güncellemeleri
+_name_index_lock = threading.Lock()
+# Uzun süreli: dizini yalnızca bir iş parçacığı kurar
+_name_index_build_lock = threading.Lock()
+
+# Ad aramasında döndürülebilecek en fazla sonuç
+MAX_SEARCH_RESULTS = 100
+
+# (puanlama belirteci, risk motoru); motor ve derlenmiş ön koşul grafiği katalog
+# ya da risk modeli değişene kadar istekler arasında paylaşılır
+_risk_engine_cache: Optional[Tuple[str, RiskEngine]] = None
+
 
 def get_risk_engine() -> RiskEngine:
-    """Dependency for risk engine."""
-    return RiskEngine(storage)
+    """
+    Dependency for risk engine, built with the current risk model config.
+
+    The engine is rebuilt only when the scoring token (catalog and risk model
+    files) changes, so requests don't rebuild the prerequisite graph.
+    """
+    global _risk_engine_cache
+    token = storage.scoring_token()
+    cached = _risk_engine_cache
+    if cached is not None and cached[0] == token:
+        return cached[1]
+    engine = RiskEngine(storage, storage.load_risk_model())
+    _risk_engine_cache = (token, engine)
+    return engine
 
 
 def get_student_undo_stack(student_id: int) -> UndoStack[Student]:
@@ -30,6 +73,122 @@ def get_student_undo_stack(student_id: int) -> UndoStack[Student]:
     return student_undo_stacks[student_id]
 
 
+def _student_etag(student: Student) -> str:
+    """Strong ETag identifying one stored version of a student."""
+    return f'"{student.id}-{student.version}"'
+
+
+def _risk_etag(student: Student) -> str:
+    """
+    Strong ETag for risk payloads.
+
+    Risk also depends on today's date (deadlines), the course catalog
+    (prerequisites) and the risk model config, so all are part of the tag.
+    """
+    return (
+        f'"{student.id}-{student.version}'
+        f'-d{date.today().toordinal()}-c{storage.scoring_token()}"'
+    )
+
+
+def _if_none_match(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether If-None-Match matches ``etag`` (weak comparison, per RFC 9110)."""
+    if if_none_match is None:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _risk_level(risk_score: float, model: Optional[CompiledRiskModel] = None) -> str:
+    """Map a risk score to its LOW/MEDIUM/HIGH level using the risk model thresholds."""
+    return (model or storage.load_risk_model()).level(risk_score)
+
+
+def _format_assignments(student: Student) -> List[Dict[str, Any]]:
+    """Assignments as response dicts sorted by deadline (earliest first)."""
+    assignments = [_format_assignment(assignment) for assignment in student.assignments]
+    assignments.sort(key=lambda a: a["deadline"])
+    return assignments
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": READ_CACHE_CONTROL}
+    )
+
+
+def _set_cache_headers(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = READ_CACHE_CONTROL
+
+
+def _check_if_match(if_match: Optional[str], student: Student) -> None:
+    """Reject the request with 412 if If-Match doesn't name the loaded version."""
+    if if_match is None:
+        return
+    candidates = [tag.strip() for tag in if_match.split(",")]
+    if "*" in candidates or _student_etag(student) in candidates:
+        return
+    raise HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail=f"Student {student.id} has changed (current ETag {_student_etag(student)})"
+    )
+
+
+def _save_student(
+    student: Student,
+    expected_version: Optional[int],
+    if_match: Optional[str],
+    response: Response
+) -> None:
+    """Compare-and-swap save that maps version conflicts to HTTP errors."""
+    try:
+        storage.save_student(student, expected_version=expected_version)
+    except storage.VersionConflictError as e:
+        # If-Match ile gelen istekler için 412, örtük kontrol için 409
+        raise HTTPException(
+            status_code=(
+                status.HTTP_412_PRECONDITION_FAILED if if_match is not None
+                else status.HTTP_409_CONFLICT
+            ),
+            detail=str(e)
+        )
+    response.headers["ETag"] = _student_etag(student)
+
+
+def load_student_name_index() -> NameIndex:
+    """
+    The per-process student name index, built from the student files on
+    first use and brought up to date with the shared name change feed (see
+    name_changes) on every call, so renames saved by other workers or
+    outside the routes are found too.
+    """
+    global student_name_index, _name_index_seq
+    conn = storage.index_connection()
+    if student_name_index is None:
+        with _name_index_build_lock:
+            if student_name_index is None:
+                # Akış konumu taramadan önce alınır; tarama sırasındaki kayıtlar
+                # akıştan yeniden uygulanır (aynı adı eklemek bir şey değiştirmez)
+                seq = name_changes.latest(conn)
+                index = NameIndex()
+                index.build({student.id: student.name for student in storage.iter_all_students()})
+                with _name_index_lock:
+                    student_name_index, _name_index_seq = index, seq
+    changes = name_changes.since(conn, _name_index_seq)
+    if changes:
+        with _name_index_lock:
+            for seq, student_id, name in changes:
+                if seq > _name_index_seq:
+                    student_name_index.add(student_id, name)
+                    _name_index_seq = seq
+    return student_name_index
+
+
 @router.get("/students/", response_model=List[Dict[str, Any]])
 async def list_students() -> List[Dict[str, Any]]:
     """Get a list of all students."""
@@ -65,8 +224,34 @@ async def create_student(student_data: Dict[str, Any]) -> Dict[str, Any]:
     return {"id": student_id, "message": "Student created successfully"}
 
 
+@router.get("/students/search")
+def search_students(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_RESULTS)
+) -> Dict[str, Any]:
+    """
+    Students whose name has a word starting with each word of ``q``.
+
+    Case-insensitive with Turkish rules (I/ı, İ/i); Turkish letters also
+    match their ASCII counterparts, so "ozturk" finds "Öztürk". Answered
+    from an in-memory index that catches up with the shared name change
+    feed before each search.
+    """
+    index = load_student_name_index()
+    with _name_index_lock:
+        matches = index.search(q, limit)
+    return {
+        "query": q,
+        "students": [{"id": student_id, "name": name} for student_id, name in matches],
+    }
+
+
 @router.get("/students/{student_id}")
-async def get_student(student_id: int) -> Dict[str, Any]:
+async def get_student(
+    student_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None)
+) -> Dict[str, Any]:
     """Get student details."""
     student = storage.load_student(student_id)
     if student is None:
@@ -75,11 +260,21 @@ async def get_student(student_id: int) -> Dict[str, Any]:
             detail=f"Student with ID {student_id} not found"
         )
     
+    etag = _student_etag(student)
+    if _if_none_match(if_none_match, etag):
+        return _not_modified(etag)
+    _set_cache_headers(response, etag)
+    
     return student.model_dump()
 
 
 @router.post("/students/{student_id}")
-async def update_student(student_id: int, student_data: Dict[str, Any]) -> Dict[str, Any]:
+async def update_student(
+    student_id: int,
+    student_data: Dict[str, Any],
+    response: Response,
+    if_match: Optional[str] = Header(None)
+) -> Dict[str, Any]:
     """Update student details."""
     # Check if student exists
     existing_student = storage.load_student(student_id)
@@ -88,6 +283,15 @@ async def update_student(student_id: int, student_data: Dict[str, Any]) -> Dict[
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Student with ID {student_id} not found"
         )
+    _check_if_match(if_match, existing_student)
+    
+    # Gövdedeki sürüm, istemcinin düzenlediği kaydın sürümüdür
+    if "version" in student_data and student_data["version"] != existing_student.version:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Student {student_id} was modified concurrently "
+                   f"(expected version {student_data['version']}, found {existing_student.version})"
+        )
     
     # Ensure ID is not changed
     student_data["id"] = student_id
@@ -103,19 +307,21 @@ async def update_student(student_id: int, student_data: Dict[str, Any]) -> Dict[
     # Update student
     student = Student.model_validate(student_data)
     
+    # Save to storage
+    _save_student(student, existing_student.version, if_match, response)
+    
     # Save to undo stack
     get_student_undo_stack(student_id).push(student)
     
-    # Save to storage
-    storage.save_student(student)
-    
     return {"id": student_id, "message": "Student updated successfully"}
 
 
 @router.get("/students/{student_id}/risk")
+@profiling.profiled("calculate_risk")
 async def calculate_risk(
     student_id: int, 
-    risk_engine: RiskEngine = Depends(get_risk_engine)
+    response: Response,
+    if_none_match: Optional[str] = Header(None)
 ) -> Dict[str, Any]:
     """Calculate risk score for a student."""
     student = storage.load_student(student_id)
@@ -125,20 +331,233 @@ async def calculate_risk(
             detail=f"Student with ID {student_id} not found"
         )
     
-    risk_score = risk_engine.calculate(student)
+    # Değişmemiş öğrenci için risk yeniden hesaplanmaz
+    etag = _risk_etag(student)
+    if _if_none_match(if_none_match, etag):
+        return _not_modified(etag)
+    _set_cache_headers(response, etag)
     
-    # Determine risk level based on score
-    risk_level = "LOW"
-    if risk_score > 0.75:
-        risk_level = "HIGH"
-    elif risk_score > 0.5:
-        risk_level = "MEDIUM"
+    risk_engine = get_risk_engine()
+    risk_score = risk_engine.calculate(student)
     
     return {
         "student_id": student_id,
         "name": student.name,
         "risk_score": round(risk_score, 2),
-        "risk_level": risk_level
+        "risk_level": _risk_level(risk_score, risk_engine.model)
+    }
+
+
+@router.get("/students/{student_id}/risk/history")
+async def risk_history_for_student(
+    student_id: int,
+    days: int = Query(30, ge=1, le=366)
+) -> Dict[str, Any]:
+    """
+    Daily risk snapshots for a student over the last ``days`` days, oldest first.
+
+    Read from the nightly history files; days without a snapshot are skipped.
+    """
+    end = date.today()
+    start = end - timedelta(days=days - 1)
+    history = risk_history.student_history(student_id, start, end)
+    
+    return {
+        "student_id": student_id,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "history": [
+            {
+                "date": day.isoformat(),
+                "risk_score": round(row["score"], 2),
+                "components": {
+                    name: round(row[name], 2) for name in RiskEngine.WEIGHTS
+                }
+            }
+            for day, row in history
+        ]
+    }
+
+
+def _load_for_batch(student_id: int) -> Tuple[Optional[Student], Optional[str]]:
+    """Load one student for a batch request, turning failures into a per-ID error."""
+    try:
+        student = storage.load_student(student_id)
+    except (OSError, ValueError) as e:
+        return None, f"Could not load student: {e}"
+    if student is None:
+        return None, "Student not found"
+    return student, None
+
+
+@router.post("/risk/batch")
+def calculate_risk_batch(batch: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Calculate risk for many students in one request.
+
+    Body: ``{"student_ids": [1, 2, ...]}``. Students are loaded concurrently
+    and scored with a single engine. Results keep the request order
+    (duplicates removed); an ID that cannot be scored gets an ``error``
+    entry instead of failing the whole request.
+    """
+    student_ids = batch.get("student_ids")
+    if not isinstance(student_ids, list) or not all(
+        isinstance(student_id, int) and not isinstance(student_id, bool)
+        for student_id in student_ids
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="student_ids must be a list of integers"
+        )
+    student_ids = list(dict.fromkeys(student_ids))
+    if len(student_ids) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_SIZE} students can be scored per request"
+        )
+    
+    # Dosya okumaları G/Ç bekler; iş parçacıklarıyla paralel yapılır
+    with ThreadPoolExecutor(max_workers=BATCH_LOAD_WORKERS) as executor:
+        loaded = list(executor.map(_load_for_batch, student_ids))
+    
+    students = [student for student, _ in loaded if student is not None]
+    risk_engine = get_risk_engine()
+    scored = iter(risk_engine.calculate_many(students))
+    
+    results = []
+    for student_id, (student, error) in zip(student_ids, loaded):
+        if error is not None:
+            results.append({"student_id": student_id, "error": error})
+            continue
+        components = next(scored)
+        risk_score = risk_engine.combine(components)
+        results.append({
+            "student_id": student_id,
+            "name": student.name,
+            "risk_score": round(risk_score, 2),
+            "risk_level": _risk_level(risk_score, risk_engine.model),
+            "components": {name: round(value, 2) for name, value in components.items()}
+        })
+    
+    return {
+        "count": len(results),
+        "errors": sum(1 for result in results if "error" in result),
+        "results": results
+    }
+
+
+@router.post("/students/{student_id}/risk/simulate")
+def simulate_risk(student_id: int, request: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Evaluate hypothetical changes to a student without saving anything.
+
+    Body: ``{"scenarios": [{"name": "...", "changes": [{"type": ...}, ...]}, ...]}``.
+    Every scenario starts from the stored record; see app.services.simulation
+    for the supported change types. The record and its undo history are
+    never modified.
+    """
+    scenarios = request.get("scenarios")
+    if not isinstance(scenarios, list) or not scenarios or not all(
+        isinstance(scenario, dict) and isinstance(scenario.get("changes"), list)
+        for scenario in scenarios
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="scenarios must be a non-empty list of {name, changes} objects"
+        )
+    if len(scenarios) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_SIZE} scenarios can be evaluated per request"
+        )
+    
+    student = storage.load_student(student_id)
+    if student is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Student with ID {student_id} not found"
+        )
+    
+    risk_engine = get_risk_engine()
+    try:
+        baseline, *results = simulation.simulate(
+            risk_engine, student, [scenario["changes"] for scenario in scenarios]
+        )
+    except simulation.SimulationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    def scored(components: Dict[str, float]) -> Dict[str, Any]:
+        risk_score = risk_engine.combine(components)
+        return {
+            "risk_score": round(risk_score, 2),
+            "risk_level": _risk_level(risk_score, risk_engine.model),
+            "components": {name: round(value, 2) for name, value in components.items()}
+        }
+    
+    baseline_score = risk_engine.combine(baseline)
+    return {
+        "student_id": student_id,
+        "baseline": scored(baseline),
+        "scenarios": [
+            {
+                "name": scenario.get("name") or f"scenario {index}",
+                **scored(components),
+                "delta": round(risk_engine.combine(components) - baseline_score, 2)
+            }
+            for index, (scenario, components) in enumerate(zip(scenarios, results), start=1)
+        ]
+    }
+
+
+@router.get("/students/{student_id}/dashboard")
+async def student_dashboard(
+    student_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None)
+) -> Dict[str, Any]:
+    """
+    Everything the student detail page needs in one response.
+
+    The student is loaded once, risk is computed once with its component
+    breakdown, assignments are sorted once and course titles are joined from
+    the cached catalog index.
+    """
+    student = storage.load_student(student_id)
+    if student is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Student with ID {student_id} not found"
+        )
+    
+    etag = _risk_etag(student)
+    if _if_none_match(if_none_match, etag):
+        return _not_modified(etag)
+    _set_cache_headers(response, etag)
+    
+    risk_engine = get_risk_engine()
+    components = risk_engine.calculate_components(student)
+    risk_score = risk_engine.combine(components)
+    
+    catalog = storage.course_catalog_index()
+    courses = {}
+    for term in student.terms:
+        for enrollment in term.courses:
+            course = catalog.get(enrollment.code)
+            if course is not None and enrollment.code not in courses:
+                courses[enrollment.code] = {
+                    "title": course.get("title", ""),
+                    "credit": course.get("credit")
+                }
+    
+    return {
+        "student": student.model_dump(),
+        "risk": {
+            "risk_score": round(risk_score, 2),
+            "risk_level": _risk_level(risk_score, risk_engine.model),
+            "components": {name: round(value, 4) for name, value in components.items()}
+        },
+        "assignments": _format_assignments(student),
+        "courses": courses
     }
 
 
@@ -146,7 +565,9 @@ async def calculate_risk(
 async def add_course(
     student_id: int, 
     course_data: Dict[str, Any],
-    risk_engine: RiskEngine = Depends(get_risk_engine)
+    response: Response,
+    risk_engine: RiskEngine = Depends(get_risk_engine),
+    if_match: Optional[str] = Header(None)
 ) -> Dict[str, Any]:
     """Add a course to a student's current term."""
     student = storage.load_student(student_id)
@@ -155,12 +576,10 @@ async def add_course(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Student with ID {student_id} not found"
         )
+    _check_if_match(if_match, student)
     
-    # Get undo stack for this student
-    undo_stack = get_student_undo_stack(student_id)
-    
-    # Save current state to undo stack
-    undo_stack.push(student.model_copy(deep=True))
+    # Önceki durum yalnızca kayıt başarılı olursa geri alma yığınına girer
+    previous_state = student.model_copy(deep=True)
     
     # Get course code and completion status
     course_code = course_data.get("code")
@@ -174,21 +593,13 @@ async def add_course(
         )
     
     # Check if the course exists in catalog
-    courses = storage.load_course_catalog()
-    course_exists = False
-    course_prereqs = []
-    
-    for course in courses:
-        if course.get("code") == course_code:
-            course_exists = True
-            course_prereqs = course.get("prereq", [])
-            break
-    
-    if not course_exists:
+    catalog_course = storage.course_catalog_index().get(course_code)
+    if catalog_course is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Course {course_code} not found in course catalog"
         )
+    course_prereqs = catalog_course.get("prereq", [])
     
     # Check prerequisites if not completed
     if not completed and course_prereqs:
@@ -227,16 +638,7 @@ async def add_course(
             )
     
     # Get or create current term
-    current_year = date.today().year
-    current_month = date.today().month
-    
-    # Determine current semester based on month
-    if 1 <= current_month <= 6:
-        current_semester = 1  # Spring
-    elif 7 <= current_month <= 8:
-        current_semester = 3  # Summer
-    else:
-        current_semester = 2  # Fall
+    current_year, current_semester = Term.current_key()
     
     # Find current term or create it
     current_term = None
@@ -270,7 +672,8 @@ async def add_course(
         current_term.courses.append(new_course)
     
     # Save updated student
-    storage.save_student(student)
+    _save_student(student, student.version, if_match, response)
+    get_student_undo_stack(student_id).push(previous_state)
     
     return {
         "student_id": student_id,
@@ -282,7 +685,9 @@ async def add_course(
 @router.delete("/students/{student_id}/courses/{course_code}")
 async def remove_course(
     student_id: int, 
-    course_code: str
+    course_code: str,
+    response: Response,
+    if_match: Optional[str] = Header(None)
 ) -> Dict[str, Any]:
     """Remove a course from a student's current term."""
     student = storage.load_student(student_id)
@@ -291,24 +696,13 @@ async def remove_course(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Student with ID {student_id} not found"
         )
+    _check_if_match(if_match, student)
     
-    # Get undo stack for this student
-    undo_stack = get_student_undo_stack(student_id)
+    # Önceki durum yalnızca kayıt başarılı olursa geri alma yığınına girer
+    previous_state = student.model_copy(deep=True)
     
-    # Save current state to undo stack
-    undo_stack.push(student.model_copy(deep=True))
-    
-    # Find current term
-    current_year = date.today().year
-    current_month = date.today().month
-    
-    # Determine current semester based on month
-    if 1 <= current_month <= 6:
-        current_semester = 1  # Spring
-    elif 7 <= current_month <= 8:
-        current_semester = 3  # Summer
-    else:
-        current_semester = 2  # Fall
+    # Ders eklemeyle aynı dönem hesabı: dönem sınırlarında ikisi ayrışmasın
+    current_year, current_semester = Term.current_key()
     
     # Find current term
     current_term = None
@@ -338,7 +732,8 @@ async def remove_course(
         )
     
     # Save updated student
-    storage.save_student(student)
+    _save_student(student, student.version, if_match, response)
+    get_student_undo_stack(student_id).push(previous_state)
     
     return {
         "student_id": student_id,
@@ -348,10 +743,18 @@ async def remove_course(
 
 
 @router.post("/students/{student_id}/undo")
-async def undo_student_change(student_id: int) -> Dict[str, Any]:
+async def undo_student_change(
+    student_id: int,
+    response: Response,
+    if_match: Optional[str] = Header(None)
+) -> Dict[str, Any]:
     """Undo the last change to a student."""
     undo_stack = get_student_undo_stack(student_id)
     
+    current = storage.load_student(student_id)
+    if current is not None:
+        _check_if_match(if_match, current)
+    
     if not undo_stack.can_undo():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -359,10 +762,19 @@ async def undo_student_change(student_id: int) -> Dict[str, Any]:
         )
     
     # Undo the last change
-    previous_state = undo_stack.undo()
+    previous_state = undo_stack.peek_undo()
     if previous_state:
         # Save the previous state
-        storage.save_student(previous_state)
+        # Yığındaki nesneyi değiştirmemek için kopyası kaydedilir
+        restored = previous_state.model_copy(deep=True)
+        _save_student(
+            restored,
+            current.version if current is not None else None,
+            if_match,
+            response
+        )
+        # Yığın yalnızca kayıt başarılı olursa ilerler
+        undo_stack.undo()
         return {
             "student_id": student_id,
             "message": "Change undone successfully"
@@ -375,10 +787,18 @@ async def undo_student_change(student_id: int) -> Dict[str, Any]:
 
 
 @router.post("/students/{student_id}/redo")
-async def redo_student_change(student_id: int) -> Dict[str, Any]:
+async def redo_student_change(
+    student_id: int,
+    response: Response,
+    if_match: Optional[str] = Header(None)
+) -> Dict[str, Any]:
     """Redo the last undone change to a student."""
     undo_stack = get_student_undo_stack(student_id)
     
+    current = storage.load_student(student_id)
+    if current is not None:
+        _check_if_match(if_match, current)
+    
     if not undo_stack.can_redo():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -386,10 +806,19 @@ async def redo_student_change(student_id: int) -> Dict[str, Any]:
         )
     
     # Redo the last undone change
-    new_state = undo_stack.redo()
+    new_state = undo_stack.peek_redo()
     if new_state:
         # Save the new state
-        storage.save_student(new_state)
+        # Yığındaki nesneyi değiştirmemek için kopyası kaydedilir
+        restored = new_state.model_copy(deep=True)
+        _save_student(
+            restored,
+            current.version if current is not None else None,
+            if_match,
+            response
+        )
+        # Yığın yalnızca kayıt başarılı olursa ilerler
+        undo_stack.redo()
         return {
             "student_id": student_id,
             "message": "Change redone successfully"
@@ -401,6 +830,48 @@ async def redo_student_change(student_id: int) -> Dict[str, Any]:
         )
 
 
+@router.get("/courses/catalog")
+async def get_course_catalog() -> List[Dict[str, Any]]:
+    """The course catalog, prerequisites before the courses that need them."""
+    return storage.load_course_catalog()
+
+
+@router.put("/courses/catalog")
+def replace_course_catalog(
+    courses: List[Dict[str, Any]],
+    background_tasks: BackgroundTasks
+) -> Dict[str, Any]:
+    """
+    Validate and replace the whole course catalog.
+
+    Rejected with 400 (and nothing stored) if any entry is malformed, a code
+    is duplicated, a prerequisite is not in the catalog or prerequisites
+    form a cycle; every problem found is listed.
+
+    Only students currently taking a course whose transitive prerequisites
+    changed are rescored, in the background after the response. If they
+    cannot be determined, ``full_rescan`` is true and the nightly job
+    rescores everyone.
+    """
+    try:
+        stored, affected = storage.save_course_catalog(courses)
+    except CatalogValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Invalid course catalog", "errors": e.errors}
+        )
+    # Otomatik tamamlama bir sonraki istekte yeni katalogdan kurulur
+    course_trie.clear()
+    if affected:
+        background_tasks.add_task(scheduler.rescore_dirty_students)
+    return {
+        "count": len(stored),
+        "order": [course["code"] for course in stored],
+        "rescoring": len(affected) if affected is not None else 0,
+        "full_rescan": affected is None,
+    }
+
+
 @router.get("/courses/autocomplete")
 async def autocomplete_course(
     query: str = Query(..., min_length=1)
@@ -487,164 +958,194 @@ def _collect_courses(node: Dict[str, Any], results: List[Dict[str, Any]]) -> Non
             _collect_courses(child_node, results)
 
 
+@router.get("/courses/{course_code}/students")
+def course_students(
+    course_code: str,
+    enrollment_status: Optional[str] = Query(None, alias="status")
+) -> Dict[str, Any]:
+    """
+    Students enrolled in a course, grouped by status (current, completed,
+    failed), or only those with ``status``.
+
+    Answered from the enrollment index. Until the nightly job has built the
+    index the student files are scanned instead; a request never writes to
+    the index, so it cannot race the job or other requests.
+    """
+    if enrollment_status is not None and enrollment_status not in enrollment_index.STATUSES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"status must be one of: {', '.join(enrollment_index.STATUSES)}"
+        )
+    conn = storage.index_connection()
+    if enrollment_index.is_built(conn):
+        roster = enrollment_index.roster(conn, course_code, enrollment_status)
+    else:
+        roster = enrollment_index.scan_roster(
+            storage.iter_all_students(), course_code, enrollment_status
+        )
+    return {"course": course_code.upper(), **roster}
+
+
+def _parse_deadline(value: Any) -> date:
+    """Parse an ISO date from a request body or raise 400."""
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid date format. Use YYYY-MM-DD"
+        )
+
+
+def _format_assignment(assignment: Assignment) -> Dict[str, Any]:
+    return {
+        "id": assignment.id,
+        "deadline": assignment.deadline.isoformat(),
+        "done": assignment.done
+    }
+
+
+def _mutate_student(
+    student_id: int,
+    mutate: Callable[[Student], Any],
+    if_match: Optional[str],
+    response: Response,
+    attempts: int = 3
+) -> Any:
+    """
+    Load, mutate and compare-and-swap save a student, retrying on conflicts.
+
+    Only for mutations that can safely be re-applied to a fresher copy, such
+    as edits addressed by stable assignment ID. With If-Match the client
+    asked for one specific version, so a conflict is reported instead of
+    retried. The pre-mutation state goes to the undo stack only once the
+    save has succeeded.
+    """
+    for attempt in range(attempts):
+        student = storage.load_student(student_id)
+        if student is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Student with ID {student_id} not found"
+            )
+        _check_if_match(if_match, student)
+        
+        previous_state = student.model_copy(deep=True)
+        result = mutate(student)
+        try:
+            storage.save_student(student, expected_version=previous_state.version)
+        except storage.VersionConflictError as e:
+            if if_match is None and attempt + 1 < attempts:
+                continue
+            raise HTTPException(
+                status_code=(
+                    status.HTTP_412_PRECONDITION_FAILED if if_match is not None
+                    else status.HTTP_409_CONFLICT
+                ),
+                detail=str(e)
+            )
+        
+        get_student_undo_stack(student_id).push(previous_state)
+        response.headers["ETag"] = _student_etag(student)
+        return result
+
+
+def _assignment_not_found(assignment_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Assignment {assignment_id} not found"
+    )
+
+
 @router.post("/students/{student_id}/assignments")
 async def add_assignment(
     student_id: int, 
-    assignment_data: Dict[str, Any]
+    assignment_data: Dict[str, Any],
+    response: Response,
+    if_match: Optional[str] = Header(None)
 ) -> Dict[str, Any]:
     """Add a new assignment to a student."""
-    student = storage.load_student(student_id)
-    if student is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Student with ID {student_id} not found"
-        )
-    
-    # Get undo stack for this student
-    undo_stack = get_student_undo_stack(student_id)
-    
-    # Save current state to undo stack
-    undo_stack.push(student.model_copy(deep=True))
-    
     # Validate deadline
     if "deadline" not in assignment_data:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Assignment deadline is required"
         )
-    
-    # Convert string date to date object if needed
-    if isinstance(assignment_data["deadline"], str):
-        try:
-            assignment_data["deadline"] = date.fromisoformat(assignment_data["deadline"])
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid date format. Use YYYY-MM-DD"
-            )
-    
-    # Create new assignment
-    new_assignment = Assignment(
-        deadline=assignment_data["deadline"],
-        done=assignment_data.get("done", False)
+    deadline = _parse_deadline(assignment_data["deadline"])
+    done = bool(assignment_data.get("done", False))
+    
+    new_assignment = _mutate_student(
+        student_id,
+        lambda student: student.add_assignment(Assignment(deadline=deadline, done=done)),
+        if_match,
+        response
     )
     
-    # Add to student's assignments
-    student.assignments.append(new_assignment)
-    
-    # Save updated student
-    storage.save_student(student)
-    
     return {
         "student_id": student_id,
         "message": "Assignment added successfully",
-        "assignment": {
-            "deadline": new_assignment.deadline.isoformat(),
-            "done": new_assignment.done
-        }
+        "assignment": _format_assignment(new_assignment)
     }
 
 
-@router.delete("/students/{student_id}/assignments/{assignment_index}")
+@router.delete("/students/{student_id}/assignments/{assignment_id}")
 async def delete_assignment(
     student_id: int, 
-    assignment_index: int
+    assignment_id: int,
+    response: Response,
+    if_match: Optional[str] = Header(None)
 ) -> Dict[str, Any]:
-    """Delete an assignment by index."""
-    student = storage.load_student(student_id)
-    if student is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Student with ID {student_id} not found"
-        )
+    """Delete an assignment by its ID."""
+    def remove(student: Student) -> Assignment:
+        deleted = student.remove_assignment(assignment_id)
+        if deleted is None:
+            raise _assignment_not_found(assignment_id)
+        return deleted
     
-    # Check if assignment index is valid
-    if assignment_index < 0 or assignment_index >= len(student.assignments):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Assignment index {assignment_index} not found"
-        )
-    
-    # Get undo stack for this student
-    undo_stack = get_student_undo_stack(student_id)
-    
-    # Save current state to undo stack
-    undo_stack.push(student.model_copy(deep=True))
-    
-    # Remove the assignment
-    deleted_assignment = student.assignments.pop(assignment_index)
-    
-    # Save updated student
-    storage.save_student(student)
+    deleted_assignment = _mutate_student(student_id, remove, if_match, response)
     
     return {
         "student_id": student_id,
         "message": "Assignment deleted successfully",
-        "deleted_assignment": {
-            "deadline": deleted_assignment.deadline.isoformat(),
-            "done": deleted_assignment.done
-        }
+        "deleted_assignment": _format_assignment(deleted_assignment)
     }
 
 
-@router.patch("/students/{student_id}/assignments/{assignment_index}")
+@router.patch("/students/{student_id}/assignments/{assignment_id}")
 async def update_assignment_status(
     student_id: int, 
-    assignment_index: int,
-    update_data: Dict[str, Any]
+    assignment_id: int,
+    update_data: Dict[str, Any],
+    response: Response,
+    if_match: Optional[str] = Header(None)
 ) -> Dict[str, Any]:
-    """Update an assignment's completion status."""
-    student = storage.load_student(student_id)
-    if student is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Student with ID {student_id} not found"
-        )
+    """Update an assignment's completion status and/or deadline by its ID."""
+    deadline = _parse_deadline(update_data["deadline"]) if "deadline" in update_data else None
+    done = bool(update_data["done"]) if "done" in update_data else None
     
-    # Check if assignment index is valid
-    if assignment_index < 0 or assignment_index >= len(student.assignments):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Assignment index {assignment_index} not found"
-        )
-    
-    # Get undo stack for this student
-    undo_stack = get_student_undo_stack(student_id)
+    def update(student: Student) -> Assignment:
+        updated = student.update_assignment(assignment_id, deadline=deadline, done=done)
+        if updated is None:
+            raise _assignment_not_found(assignment_id)
+        return updated
     
-    # Save current state to undo stack
-    undo_stack.push(student.model_copy(deep=True))
-    
-    # Update assignment status
-    if "done" in update_data:
-        student.assignments[assignment_index].done = bool(update_data["done"])
-    
-    # Update deadline if provided
-    if "deadline" in update_data:
-        if isinstance(update_data["deadline"], str):
-            try:
-                update_data["deadline"] = date.fromisoformat(update_data["deadline"])
-            except ValueError:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Invalid date format. Use YYYY-MM-DD"
-                )
-        student.assignments[assignment_index].deadline = update_data["deadline"]
-    
-    # Save updated student
-    storage.save_student(student)
+    updated_assignment = _mutate_student(student_id, update, if_match, response)
     
     return {
         "student_id": student_id,
         "message": "Assignment updated successfully",
-        "updated_assignment": {
-            "deadline": student.assignments[assignment_index].deadline.isoformat(),
-            "done": student.assignments[assignment_index].done
-        }
+        "updated_assignment": _format_assignment(updated_assignment)
     }
 
 
 @router.get("/students/{student_id}/assignments")
-async def list_assignments(student_id: int) -> Dict[str, Any]:
+async def list_assignments(
+    student_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None)
+) -> Dict[str, Any]:
     """Get all assignments for a student."""
     student = storage.load_student(student_id)
     if student is None:
@@ -653,20 +1154,227 @@ async def list_assignments(student_id: int) -> Dict[str, Any]:
             detail=f"Student with ID {student_id} not found"
         )
     
-    # Format assignments for response
-    assignments = []
-    for i, assignment in enumerate(student.assignments):
-        assignments.append({
-            "index": i,
-            "deadline": assignment.deadline.isoformat(),
-            "done": assignment.done
-        })
-    
-    # Sort by deadline (earliest first)
-    assignments.sort(key=lambda a: a["deadline"])
+    etag = _student_etag(student)
+    if _if_none_match(if_none_match, etag):
+        return _not_modified(etag)
+    _set_cache_headers(response, etag)
     
     return {
         "student_id": student_id,
         "name": student.name,
-        "assignments": assignments
-    } 
\ No newline at end of file
+        "assignments": _format_assignments(student)
+    } 
+
+
+@router.get("/assignments/due")
+async def list_due_assignments(
+    days: int = Query(2, ge=0, le=365),
+    include_done: bool = False
+) -> Dict[str, Any]:
+    """
+    Assignments due between today and ``days`` days from now, across all students.
+
+    Answered from the global deadline index without reading student files.
+    """
+    start = date.today()
+    end = start + timedelta(days=days)
+    due = deadline_index.due_between(
+        storage.index_connection(), start, end, include_done=include_done
+    )
+    
+    return {
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "students": [
+            {
+                "student_id": student_id,
+                "assignments": [
+                    {"id": assignment_id, "deadline": deadline.isoformat(), "done": done}
+                    for assignment_id, deadline, done in assignments
+                ]
+            }
+            for student_id, assignments in due.items()
+        ]
+    }
+
+
+@router.get("/risk/trends")
+async def rising_risk(
+    days: int = Query(7, ge=1, le=366),
+    min_delta: float = Query(0.1, ge=0.0, le=1.0),
+    limit: int = Query(100, ge=1, le=1000)
+) -> Dict[str, Any]:
+    """
+    Students whose risk rose by more than ``min_delta`` over the last ``days`` days.
+
+    Compares the oldest and newest stored snapshots in the window, largest
+    increases first.
+    """
+    end = date.today()
+    start = end - timedelta(days=days)
+    first_day, last_day, rows = risk_history.risers(start, end, min_delta)
+    
+    return {
+        "from": first_day.isoformat() if first_day else None,
+        "to": last_day.isoformat() if last_day else None,
+        "count": len(rows),
+        "students": [
+            {
+                "student_id": student_id,
+                "previous_score": round(old_score, 2),
+                "risk_score": round(new_score, 2),
+                "delta": round(new_score - old_score, 2)
+            }
+            for student_id, old_score, new_score in rows[:limit]
+        ]
+    }
+
+
+@router.get("/risk/top")
+def top_risk_students(
+    k: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0, le=5000),
+    course: Optional[str] = None,
+    department: Optional[str] = None,
+    term: Optional[str] = Query(None, pattern=r"^\d{4}-[123]$"),
+    level: Optional[str] = Query(None, pattern="^(LOW|MEDIUM|HIGH)$")
+) -> Dict[str, Any]:
+    """
+    The ``k`` riskiest students after skipping ``offset``, riskiest first.
+
+    Filters: ``course`` (a current course code), ``department`` (prefix of a
+    current course code, e.g. ``YMH``), ``term`` (``YYYY-S``) and ``level``.
+    Served from the score index of the risk cache when it is current.
+    """
+    model = storage.load_risk_model()
+    risk_filter = risk_cache.RiskFilter(
+        course=course.upper() if course else None,
+        department=department.upper() if department else None,
+        term=term,
+        above={"MEDIUM": model.medium_threshold, "HIGH": model.high_threshold}.get(level),
+        at_most={"LOW": model.medium_threshold, "MEDIUM": model.high_threshold}.get(level),
+    )
+    source, top = analytics.top_students(get_risk_engine, k, offset, risk_filter)
+    
+    return {
+        "source": source,
+        "k": k,
+        "offset": offset,
+        "students": [
+            {
+                "rank": offset + rank,
+                "student_id": entry.student_id,
+                "name": entry.summary.get("name"),
+                "risk_score": round(entry.score, 2),
+                "risk_level": model.level(entry.score),
+                "components": {
+                    name: round(value, 2) for name, value in entry.components.items()
+                }
+            }
+            for rank, entry in enumerate(top, start=1)
+        ]
+    }
+
+
+@router.get("/risk/analytics")
+def risk_analytics(
+    group_by: Optional[str] = Query(None, pattern="^(course|term|gpa_band)$"),
+    buckets: int = Query(10, ge=1, le=100)
+) -> Dict[str, Any]:
+    """
+    Risk distribution across all students, optionally grouped by current
+    course, term or GPA band.
+
+    Each group reports count, mean, min/max, estimated percentiles, mean
+    component scores and a ``buckets``-bar histogram. Served from the nightly
+    cache when it is current for today, otherwise computed in one pass over
+    the student files.
+    """
+    # Tam tarama uzun sürebilir; senkron tanım olay döngüsünü bloklamaz
+    source, groups = analytics.population_risk(get_risk_engine, group_by)
+    
+    return {
+        "source": source,
+        "group_by": group_by,
+        "groups": {
+            key: group.to_dict(buckets) for key, group in sorted(groups.items())
+        }
+    }
+
+
+@router.get("/risk/model")
+async def get_risk_model() -> Dict[str, Any]:
+    """The active risk model config (weights, GPA bands, grade table, thresholds)."""
+    model = storage.load_risk_model()
+    return {"token": model.token, "config": model.to_dict()}
+
+
+@router.put("/risk/model")
+def update_risk_model(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate and store a new risk model config.
+
+    Takes effect immediately for new requests; the nightly job rescans all
+    students on its next run because cached scores no longer match.
+    """
+    try:
+        model = storage.save_risk_model(config)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"token": model.token, "config": model.to_dict()}
+
+
+@router.get("/jobs/nightly")
+async def nightly_job_status() -> Dict[str, Any]:
+    """
+    Progress of the current or last nightly risk job.
+
+    ``status`` is running, completed, failed or interrupted (the process
+    running it died); failed and interrupted runs resume from their last
+    checkpoint when the job runs again the same day.
+    """
+    run = job_runs.describe(storage.index_connection(), scheduler.NIGHTLY_JOB)
+    if run is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="The nightly job has not run yet"
+        )
+    return run
+
+
+@router.post("/jobs/nightly", status_code=status.HTTP_202_ACCEPTED)
+async def run_nightly_job(background_tasks: BackgroundTasks) -> Dict[str, Any]:
+    """Start the nightly risk job now (resuming an unfinished run of today)."""
+    if job_runs.is_running(scheduler.NIGHTLY_JOB):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The nightly job is already running"
+        )
+    background_tasks.add_task(scheduler.nightly_job)
+    return {"message": "Nightly job started"}
+
+
+@router.get("/admin/profiling")
+async def get_profiling_status() -> Dict[str, Any]:
+    """Armed profiling targets and the most recently written profiles of this worker."""
+    return profiling.status()
+
+
+@router.post("/admin/profiling")
+async def arm_profiling(request: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Profile the next ``count`` runs of ``target`` in this worker.
+
+    Request body: {"target": "requests" | "nightly_job" | "iter_all_students" |
+    "calculate_risk", "count": 1}. Profiles are written to DATA_DIR/profiles.
+    """
+    try:
+        return profiling.arm(request.get("target"), request.get("count", 1))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.delete("/admin/profiling")
+async def disarm_profiling(target: Optional[str] = Query(None)) -> Dict[str, Any]:
+    """Cancel pending captures for one target, or for all targets."""
+    return profiling.disarm(target)
@@ -0,0 +1,255 @@
+"""
+Ders kataloğu doğrulaması.
+
+Katalog kaydedilmeden önce doğrusal zamanda denetlenir: her girdi Course
+modeline uymalı, ders kodları tekil olmalı, ön koşullar katalogdaki
+derslere başvurmalı ve ön koşul grafiğinde döngü bulunmamalıdır. Döngü
+denetimi Kahn algoritmasıyla yapılır; döngü kalırsa yalnızca kalan düğümler
+üzerinde Tarjan'ın güçlü bağlı bileşenler algoritması çalıştırılarak
+döngüdeki dersler raporlanır.
+
+Katalog değiştiğinde closure_changes() geçişli ön koşul kümesi değişen
+dersleri bulur; yalnızca bu dersleri alan öğrencilerin riski yeniden
+hesaplanır.
+"""
+from collections import deque
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Set
+
+from pydantic import TypeAdapter, ValidationError
+
+from app.domain.models import Course
+
+
+_COURSE_LIST = TypeAdapter(List[Course])
+
+
+class CatalogValidationError(ValueError):
+    """Katalog geçersiz; ``errors`` tüm bulunan sorunları içerir."""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("Invalid course catalog: " + "; ".join(errors))
+        self.errors = errors
+
+
+def topological_order(prereqs: Mapping[str, Sequence[str]]) -> List[str]:
+    """
+    Dersleri ön koşulları kendilerinden önce gelecek şekilde sırala (Kahn).
+
+    Bağımsız dersler arasında ``prereqs`` içindeki sıra korunur. Katalog
+    dışındaki ön koşullar yok sayılır. Döngüdeki (ya da döngüye bağlı)
+    dersler sonuçta yer almaz; sonucun uzunluğu ders sayısından azsa grafik
+    döngü içerir.
+    """
+    dependents: Dict[str, List[str]] = {code: [] for code in prereqs}
+    remaining = dict.fromkeys(prereqs, 0)
+    for code, course_prereqs in prereqs.items():
+        # Yinelenen ön koşul iki kez sayılır ve iki kez düşülür; sonuç değişmez
+        for prereq in course_prereqs:
+            if prereq in dependents:
+                dependents[prereq].append(code)
+                remaining[code] += 1
+
+    ready = deque(code for code, count in remaining.items() if count == 0)
+    order = []
+    while ready:
+        code = ready.popleft()
+        order.append(code)
+        for dependent in dependents[code]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                ready.append(dependent)
+    return order
+
+
+def cyclic_components(prereqs: Mapping[str, Sequence[str]]) -> List[List[str]]:
+    """
+    Döngü içeren güçlü bağlı bileşenler (Tarjan, özyinelemesiz).
+
+    Her bileşen en az bir döngüdeki derslerin kümesidir: birden çok ders ya
+    da kendisini ön koşul gösteren tek bir ders. Her elemanter döngüyü
+    saymak yerine bileşenleri döndürdüğü için O(V + E) sürer.
+    """
+    index: Dict[str, int] = {}
+    lowlink: Dict[str, int] = {}
+    on_stack = set()
+    stack: List[str] = []
+    components = []
+
+    for root in prereqs:
+        if root in index:
+            continue
+        # (düğüm, ön koşullar üzerindeki yineleyici) çerçeveleri
+        work = [(root, iter(prereqs[root]))]
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, edges = work[-1]
+            for prereq in edges:
+                if prereq not in prereqs:
+                    continue
+                if prereq not in index:
+                    index[prereq] = lowlink[prereq] = len(index)
+                    stack.append(prereq)
+                    on_stack.add(prereq)
+                    work.append((prereq, iter(prereqs[prereq])))
+                    break
+                if prereq in on_stack:
+                    lowlink[node] = min(lowlink[node], index[prereq])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in prereqs[node]:
+                        components.append(sorted(component))
+    return components
+
+
+def validate_catalog(courses: Iterable[Any]) -> List[Dict[str, Any]]:
+    """
+    Kataloğu doğrula ve topolojik sıraya dizilmiş, normalleştirilmiş
+    girdileri döndür; geçersizse CatalogValidationError fırlatır.
+
+    Kodlar ve ön koşullar büyük harfe çevrilir, yinelenen ön koşullar
+    atılır. Dönen sırada her dersin ön koşulları kendisinden önce gelir.
+    """
+    courses = list(courses)
+    errors: List[str] = []
+    try:
+        # Tek çağrıda doğrulama; hata varsa girdi bazında raporlanır
+        validated = _COURSE_LIST.validate_python(courses)
+    except ValidationError as e:
+        problems: Dict[int, List[str]] = {}
+        for error in e.errors():
+            position, *field = error["loc"]
+            problems.setdefault(position, []).append(
+                f"{'.'.join(map(str, field)) or 'entry'}: {error['msg']}"
+            )
+        errors.extend(
+            f"entry {position}: {', '.join(messages)}" for position, messages in problems.items()
+        )
+        validated = [None] * len(courses)
+        for position, raw in enumerate(courses):
+            if position not in problems:
+                validated[position] = Course.model_validate(raw)
+
+    entries: Dict[str, Dict[str, Any]] = {}
+    for position, (raw, course) in enumerate(zip(courses, validated)):
+        if course is None:
+            continue
+        code = course.code.strip().upper()
+        if not code:
+            errors.append(f"entry {position}: empty course code")
+            continue
+        if code in entries:
+            errors.append(f"duplicate course code {code}")
+            continue
+        # Modelde olmayan alanlar (ör. bölüm bilgisi) korunur
+        entries[code] = {
+            **(raw if isinstance(raw, dict) else {}),
+            "code": code,
+            "title": course.title,
+            "credit": course.credit,
+            "prereq": list(dict.fromkeys(p.strip().upper() for p in course.prereq)),
+        }
+
+    prereqs = {code: entry["prereq"] for code, entry in entries.items()}
+    for code, course_prereqs in prereqs.items():
+        unknown = [prereq for prereq in course_prereqs if prereq not in prereqs]
+        if unknown:
+            errors.append(f"{code} has unknown prerequisites: {', '.join(unknown)}")
+
+    order = topological_order(prereqs)
+    if len(order) != len(prereqs):
+        ordered = set(order)
+        # Tarjan yalnızca sıralanamayan dersler üzerinde çalışır
+        blocked = {code: prereqs[code] for code in prereqs if code not in ordered}
+        for component in cyclic_components(blocked):
+            errors.append(f"prerequisite cycle: {', '.join(component)}")
+
+    if errors:
+        raise CatalogValidationError(errors)
+    return [entries[code] for code in order]
+
+
+def _with_dependents(prereqs: Mapping[str, Sequence[str]], courses: Set[str]) -> Set[str]:
+    """``courses`` ve onları doğrudan ya da dolaylı ön koşul olarak gösteren dersler."""
+    dependents: Dict[str, List[str]] = {}
+    for code, course_prereqs in prereqs.items():
+        for prereq in course_prereqs:
+            dependents.setdefault(prereq, []).append(code)
+    result = set(courses)
+    stack = list(courses)
+    while stack:
+        for dependent in dependents.get(stack.pop(), ()):
+            if dependent not in result:
+                result.add(dependent)
+                stack.append(dependent)
+    return result
+
+
+def _closures(
+    prereqs: Mapping[str, Sequence[str]],
+    courses: Set[str]
+) -> Optional[Dict[str, FrozenSet[str]]]:
+    """
+    ``courses`` ve ön koşullarının geçişli ön koşul kümeleri; grafik bu
+    dersler arasında döngü içeriyorsa None.
+    """
+    needed = set()
+    stack = list(courses)
+    while stack:
+        code = stack.pop()
+        if code not in needed:
+            needed.add(code)
+            stack.extend(prereqs.get(code, ()))
+    order = topological_order({code: prereqs.get(code, []) for code in needed})
+    if len(order) != len(needed):
+        return None
+    closures: Dict[str, FrozenSet[str]] = {}
+    for code in order:
+        # Ön koşullar sıralamada önce geldiği için kümeleri hazırdır
+        closures[code] = frozenset().union(
+            *((prereq, *closures[prereq]) for prereq in prereqs.get(code, ()))
+        )
+    return closures
+
+
+def closure_changes(
+    old: Mapping[str, Sequence[str]],
+    new: Mapping[str, Sequence[str]]
+) -> Optional[Set[str]]:
+    """
+    Geçişli ön koşul kümesi ``old`` ile ``new`` katalog arasında değişen dersler.
+
+    İki taraf da ders kodu -> doğrudan ön koşullar eşlemesidir; katalogda
+    olmayan dersin ön koşul kümesi boş sayılır, dolayısıyla ön koşulsuz bir
+    dersin eklenmesi ya da silinmesi değişiklik değildir. Yalnızca doğrudan
+    ön koşulları değişen dersler ve onlara bağlı dersler karşılaştırılır.
+    Eski katalog döngü içeriyorsa (doğrulama öncesinden kalma) hangi
+    derslerin etkilendiği bilinemez ve None döner.
+    """
+    changed = {
+        code for code in old.keys() | new.keys()
+        if set(old.get(code, ())) != set(new.get(code, ()))
+    }
+    if not changed:
+        return set()
+    candidates = _with_dependents(old, changed) | _with_dependents(new, changed)
+    old_closures = _closures(old, candidates)
+    new_closures = _closures(new, candidates)
+    if old_closures is None or new_closures is None:
+        return None
+    return {
+        code for code in candidates
+        if old_closures.get(code, frozenset()) != new_closures.get(code, frozenset())
+    }
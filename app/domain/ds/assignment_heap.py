@@ -1,75 +1,161 @@
 import heapq
-from datetime import date, datetime
-from typing import List, Tuple, Optional
+from datetime import date
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-from app.domain.models import Assignment
+if TYPE_CHECKING:
+    from app.domain.models import Assignment
+
+# Silinmiş (geçersiz) girdiyi işaretleyen değer
+_REMOVED = object()
 
 
 class AssignmentMinHeap:
     """
     Ödevler için son teslim tarihine göre sıralanmış bir min-heap.
     Temel implementasyon olarak Python'un heapq modülünü kullanır.
+    
+    Her ödev eklenirken bir tutamaç (handle) alır. Silme ve son tarih
+    güncelleme bu tutamaç üzerinden, heap'i yeniden kurmadan yapılır:
+    eski girdi tembel olarak silinmiş işaretlenir ve heap'in tepesine
+    geldiğinde atlanır. Silinmiş girdiler canlı girdileri geçince heap
+    sıkıştırılır.
     """
     
     def __init__(self):
-        # Ödevleri tutacak boş heap listesi oluştur
+        # [son tarih anahtarı, sıra no, tutamaç, ödev] girdilerinden oluşan heap listesi
         self._heap = []
+        # Tutamaç -> canlı girdi
+        self._entries: Dict[int, list] = {}
+        self._next_handle = 0
+        self._next_seq = 0
+        self._removed = 0
+    
+    def _push(self, handle: int, assignment: 'Assignment') -> None:
+        # Sıra numarası eşit tarihlerde karşılaştırmanın ödeve ulaşmasını önler
+        entry = [assignment.deadline.toordinal(), self._next_seq, handle, assignment]
+        self._next_seq += 1
+        self._entries[handle] = entry
+        heapq.heappush(self._heap, entry)
+    
+    def add(self, assignment: 'Assignment') -> int:
+        """Heap'e yeni bir ödev ekle ve tutamacını döndür."""
+        handle = self._next_handle
+        self._next_handle += 1
+        self._push(handle, assignment)
+        return handle
     
-    def add(self, assignment: Assignment) -> None:
-        """Heap'e yeni bir ödev ekle."""
-        # Tarihi karşılaştırılabilir formata çevir ve anahtar olarak kullan
-        deadline_key = assignment.deadline.toordinal()
-        heapq.heappush(self._heap, (deadline_key, assignment))
+    def remove(self, handle: int) -> Optional['Assignment']:
+        """Tutamacı verilen ödevi sil (tembel silme) ve döndür."""
+        entry = self._entries.pop(handle, None)
+        if entry is None:
+            return None
+        assignment = entry[3]
+        entry[3] = _REMOVED
+        self._removed += 1
+        if self._removed > len(self._entries):
+            self._compact()
+        return assignment
+    
+    def update(self, handle: int, deadline: Optional[date] = None) -> None:
+        """
+        Ödevin yerini güncelle; tutamaç geçerli kalır.
+        
+        Ödev nesnesi heap'te paylaşıldığı için tamamlanma durumu gibi alanlar
+        doğrudan değiştirilebilir; yalnızca son tarih değişince girdi yenilenir.
+        """
+        entry = self._entries.get(handle)
+        if entry is None:
+            raise KeyError(handle)
+        assignment = entry[3]
+        if deadline is not None:
+            assignment.deadline = deadline
+        if entry[0] == assignment.deadline.toordinal():
+            return
+        entry[3] = _REMOVED
+        self._removed += 1
+        self._push(handle, assignment)
+        if self._removed > len(self._entries):
+            self._compact()
     
-    def peek(self) -> Optional[Assignment]:
+    def _compact(self) -> None:
+        """Silinmiş girdileri at ve heap'i yeniden düzenle."""
+        self._heap = [entry for entry in self._heap if entry[3] is not _REMOVED]
+        heapq.heapify(self._heap)
+        self._removed = 0
+    
+    def _discard_removed_top(self) -> None:
+        while self._heap and self._heap[0][3] is _REMOVED:
+            heapq.heappop(self._heap)
+            self._removed -= 1
+    
+    def peek(self) -> Optional['Assignment']:
         """En yakın teslim tarihli ödevi silmeden getir."""
+        self._discard_removed_top()
         if not self._heap:
             return None
-        return self._heap[0][1]
+        return self._heap[0][3]
     
-    def pop(self) -> Optional[Assignment]:
+    def pop(self) -> Optional['Assignment']:
         """En yakın teslim tarihli ödevi sil ve döndür."""
+        self._discard_removed_top()
         if not self._heap:
             return None
-        return heapq.heappop(self._heap)[1]
+        entry = heapq.heappop(self._heap)
+        del self._entries[entry[2]]
+        return entry[3]
     
     def is_empty(self) -> bool:
         """Heap'in boş olup olmadığını kontrol et."""
-        return len(self._heap) == 0
+        return len(self._entries) == 0
     
     def size(self) -> int:
         """Heap'teki ödev sayısını döndür."""
-        return len(self._heap)
+        return len(self._entries)
     
-    def get_all_sorted(self) -> List[Assignment]:
+    def get_all_sorted(self) -> List['Assignment']:
         """Tüm ödevleri teslim tarihine göre sıralı olarak getir."""
-        # Orijinal heap'i değiştirmemek için kopya oluştur
-        heap_copy = self._heap.copy()
-        result = []
-        
-        while heap_copy:
-            result.append(heapq.heappop(heap_copy)[1])
-            
-        return result
+        # Heap dizisi zaten kısmen sıralı olduğundan sıralama ucuzdur
+        live = sorted(entry for entry in self._heap if entry[3] is not _REMOVED)
+        return [entry[3] for entry in live]
     
-    def get_due_soon(self, days: int = 7) -> List[Assignment]:
-        """Belirtilen gün sayısı içinde teslim edilmesi gereken ödevleri getir."""
-        today = date.today()
-        cutoff = today.toordinal() + days
+    def get_due_soon(self, days: int = 7, today: Optional[date] = None) -> List['Assignment']:
+        """
+        Belirtilen gün sayısı içinde teslim edilmesi gereken ödevleri getir.
+        
+        Heap özelliği sayesinde anahtarı sınırı aşan bir düğümün alt ağacı
+        atlanır; yalnızca sonuca giren girdiler (ve onların çocukları) ziyaret edilir.
+        """
+        cutoff = (today or date.today()).toordinal() + days
         
+        heap = self._heap
+        size = len(heap)
         result = []
-        for deadline_key, assignment in self._heap:
-            if deadline_key <= cutoff:
-                result.append(assignment)
+        stack = [0] if size and heap[0][0] <= cutoff else []
+        while stack:
+            i = stack.pop()
+            entry = heap[i]
+            if entry[3] is not _REMOVED:
+                result.append(entry)
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < size and heap[child][0] <= cutoff:
+                    stack.append(child)
         
         # Teslim tarihine göre sırala
-        result.sort(key=lambda a: a.deadline)
-        return result
+        result.sort()
+        return [entry[3] for entry in result]
     
     @classmethod
-    def from_assignments(cls, assignments: List[Assignment]) -> 'AssignmentMinHeap':
-        """Ödev listesinden yeni bir heap oluştur."""
+    def from_assignments(cls, assignments: List['Assignment']) -> 'AssignmentMinHeap':
+        """
+        Ödev listesinden yeni bir heap oluştur.
+        
+        Tutamaçlar listedeki sırayla 0, 1, 2, ... olarak verilir.
+        """
         heap = cls()
-        for assignment in assignments:
-            heap.add(assignment)
-        return heap 
\ No newline at end of file
+        for handle, assignment in enumerate(assignments):
+            entry = [assignment.deadline.toordinal(), handle, handle, assignment]
+            heap._entries[handle] = entry
+            heap._heap.append(entry)
+        heapq.heapify(heap._heap)
+        heap._next_handle = heap._next_seq = len(assignments)
+        return heap
@@ -1,18 +1,31 @@
-import networkx as nx
-from typing import Dict, List, Set, Optional
+from typing import Dict, FrozenSet, List, Set, Optional
+
+from app.domain.catalog import cyclic_components, topological_order
+
+
+def _networkx():
+    # networkx ağır bir bağımlılık; ilk grafik kurulurken yüklenir
+    import networkx
+    return networkx
 
 
 class PrereqGraph:
     """
     A directed graph representing course prerequisites.
     Uses networkx.DiGraph as the underlying data structure.
+    
+    Transitive prerequisite sets are memoized per course, so scoring many
+    students with one graph walks each course's ancestors only once. The
+    memo is cleared whenever the graph changes.
     """
     
     def __init__(self):
-        self.graph = nx.DiGraph()
+        self.graph = _networkx().DiGraph()
+        self._ancestors: Dict[str, FrozenSet[str]] = {}
     
     def add_course(self, course_code: str, prereqs: List[str] = None) -> None:
         """Add a course to the graph with its prerequisites."""
+        self._ancestors.clear()
         if not self.graph.has_node(course_code):
             self.graph.add_node(course_code)
             
@@ -24,10 +37,17 @@ class PrereqGraph:
     
     def get_prerequisites(self, course_code: str) -> Set[str]:
         """Get all prerequisites for a course (direct and indirect)."""
-        if not self.graph.has_node(course_code):
-            return set()
-            
-        return set(nx.ancestors(self.graph, course_code))
+        return set(self._prerequisite_closure(course_code))
+    
+    def _prerequisite_closure(self, course_code: str) -> FrozenSet[str]:
+        closure = self._ancestors.get(course_code)
+        if closure is None:
+            if self.graph.has_node(course_code):
+                closure = frozenset(_networkx().ancestors(self.graph, course_code))
+            else:
+                closure = frozenset()
+            self._ancestors[course_code] = closure
+        return closure
     
     def get_direct_prerequisites(self, course_code: str) -> Set[str]:
         """Get only direct prerequisites for a course."""
@@ -38,19 +58,37 @@ class PrereqGraph:
     
     def check_can_take_course(self, course_code: str, completed_courses: Set[str]) -> bool:
         """Check if a student can take a course based on completed prerequisites."""
-        prereqs = self.get_prerequisites(course_code)
-        return prereqs.issubset(completed_courses)
+        return self._prerequisite_closure(course_code).issubset(completed_courses)
     
     def find_missing_prerequisites(self, course_code: str, completed_courses: Set[str]) -> Set[str]:
         """Find prerequisites that are still missing."""
-        prereqs = self.get_prerequisites(course_code)
-        return prereqs - completed_courses
+        return set(self._prerequisite_closure(course_code) - completed_courses)
     
     def detect_cycles(self) -> List[List[str]]:
-        """Detect cycles in the prerequisite graph (which would be an error)."""
-        return list(nx.simple_cycles(self.graph))
+        """
+        Detect cycles in the prerequisite graph (which would be an error).
+        
+        Returns one sorted list of courses per strongly connected component
+        that contains a cycle, in O(V + E), instead of enumerating every
+        elementary cycle (which can be exponential in a bad catalog).
+        """
+        return cyclic_components({
+            course: list(self.graph.predecessors(course)) for course in self.graph.nodes
+        })
     
     def build_from_courses(self, courses_dict: Dict[str, List[str]]) -> None:
-        """Build the graph from a dictionary of courses and their prerequisites."""
+        """
+        Build the graph from a dictionary of courses and their prerequisites.
+        
+        Transitive prerequisite sets are filled in one pass over the courses
+        in topological order, so scoring never walks the graph. Catalogs are
+        stored in that order, so the sort keeps the stored order unchanged.
+        Courses on a cycle are left to the networkx walk.
+        """
         for course_code, prereqs in courses_dict.items():
-            self.add_course(course_code, prereqs) 
\ No newline at end of file
+            self.add_course(course_code, prereqs)
+        for course_code in topological_order(courses_dict):
+            # Ön koşullar sırada önce geldiği için kümeleri hazırdır
+            self._ancestors[course_code] = frozenset().union(*(
+                (prereq, *self._ancestors.get(prereq, ())) for prereq in courses_dict[course_code]
+            )) 
\ No newline at end of file
@@ -0,0 +1,72 @@
+from typing import Dict, List, Optional
+
+
+class RiskHistogram:
+    """
+    0.0-1.0 aralığındaki risk puanları için sabit kutulu histogram.
+    
+    Bellek kullanımı kutu sayısıyla sınırlıdır ve puan sayısından bağımsızdır.
+    Aynı kutu sayısına sahip histogramlar birleştirilebilir (merge), bu yüzden
+    gruplar ya da parçalar ayrı ayrı toplanıp sonradan birleştirilebilir.
+    Yüzdelikler kutu içinde doğrusal ara değerleme ile tahmin edilir; hata en
+    fazla bir kutu genişliği kadardır.
+    """
+    
+    def __init__(self, bins: int = 100):
+        if bins < 1:
+            raise ValueError("bins must be positive")
+        self.bins = bins
+        self.counts: List[int] = [0] * bins
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+    
+    def add(self, value: float) -> None:
+        """Bir puanı histograma ekle (aralık dışı değerler sınıra kırpılır)."""
+        value = min(1.0, max(0.0, value))
+        self.counts[min(self.bins - 1, int(value * self.bins))] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+    
+    def merge(self, other: 'RiskHistogram') -> 'RiskHistogram':
+        """Başka bir histogramı bu histograma ekle."""
+        if other.bins != self.bins:
+            raise ValueError("Cannot merge histograms with different bin counts")
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+    
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """``q`` (0.0-1.0) yüzdeliğinin tahmini; boş histogram için None."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= target:
+                estimate = (i + (target - seen) / count) / self.bins
+                # Tahmin gözlenen en küçük ve en büyük değerin dışına çıkmaz
+                return min(self.max, max(self.min, estimate))
+            seen += count
+        return self.max
+    
+    def buckets(self, n: int = 10) -> List[Dict[str, float]]:
+        """Kutuları ``n`` eşit genişlikte kaba kovaya topla."""
+        counts = [0] * n
+        for i, count in enumerate(self.counts):
+            counts[i * n // self.bins] += count
+        return [
+            {"from": round(i / n, 4), "to": round((i + 1) / n, 4), "count": count}
+            for i, count in enumerate(counts)
+        ]
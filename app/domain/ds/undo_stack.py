@@ -48,6 +48,18 @@ class UndoStack(Generic[T]):
         
         return state
     
+    def peek_undo(self) -> Optional[T]:
+        """Return the state undo() would return, without modifying the stacks."""
+        if len(self._undo_stack) < 2:
+            return None
+        return self._undo_stack[-2]
+    
+    def peek_redo(self) -> Optional[T]:
+        """Return the state redo() would return, without modifying the stacks."""
+        if not self._redo_stack:
+            return None
+        return self._redo_stack[-1]
+    
     def can_undo(self) -> bool:
         """Check if there are states that can be undone."""
         return len(self._undo_stack) > 0
@@ -1,6 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr, model_validator
 from datetime import date
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.domain.ds.assignment_heap import AssignmentMinHeap
 
 
 class Course(BaseModel):
@@ -29,12 +31,23 @@ class Term(BaseModel):
     year: int                # Akademik yıl
     semester: int            # 1: bahar, 2: güz, 3: yaz
     courses: List[CourseEnrollment] = []  # Dönemde alınan dersler
+    
+    @staticmethod
+    def current_key(today: Optional[date] = None) -> Tuple[int, int]:
+        """Verilen günün (varsayılan bugün) içinde bulunduğu (yıl, dönem) çifti."""
+        today = today or date.today()
+        if 1 <= today.month <= 6:
+            return today.year, 1  # Bahar
+        if 7 <= today.month <= 8:
+            return today.year, 3  # Yaz
+        return today.year, 2  # Güz
 
 
 class Assignment(BaseModel):
     """
     Ödev modeli - öğrencinin tamamlaması gereken ödevleri temsil eder.
     """
+    id: Optional[int] = None  # Öğrenci içinde sabit ödev numarası (silinse de yeniden kullanılmaz)
     deadline: date    # Son teslim tarihi
     done: bool = False  # Ödevin tamamlanma durumu
 
@@ -48,4 +61,94 @@ class Student(BaseModel):
     gpa: float = 0.0                  # Genel not ortalaması
     absence_bits: int = 0             # 14 bit devamsızlık bilgisi (her bit bir devamsızlığı temsil eder)
     terms: List[Term] = []            # Öğrencinin kayıtlı olduğu dönemler
-    assignments: List[Assignment] = [] # Öğrencinin ödevleri 
\ No newline at end of file
+    assignments: List[Assignment] = [] # Öğrencinin ödevleri
+    next_assignment_id: int = 1       # Bir sonraki ödeve verilecek numara
+    version: int = 0                  # Kayıt sürümü (her kayıtta artar, iyimser eşzamanlılık için)
+    
+    # Ödev numarası -> ödev eşlemesi
+    _assignments_by_id: Optional[Dict[int, Assignment]] = PrivateAttr(default=None)
+    # Son teslim tarihine göre ödev heap'i ve ödev numarası -> heap tutamacı eşlemesi
+    _assignment_heap: Optional[AssignmentMinHeap] = PrivateAttr(default=None)
+    _assignment_handles: Dict[int, int] = PrivateAttr(default_factory=dict)
+    
+    @model_validator(mode="after")
+    def _assign_assignment_ids(self) -> "Student":
+        """Numarasız (eski kayıtlardan gelen) veya tekrarlanan ödev numaralarını doldur."""
+        next_id = max(
+            [self.next_assignment_id]
+            + [a.id + 1 for a in self.assignments if a.id is not None]
+        )
+        seen = set()
+        for assignment in self.assignments:
+            if assignment.id is None or assignment.id in seen:
+                assignment.id = next_id
+                next_id += 1
+            seen.add(assignment.id)
+        self.next_assignment_id = next_id
+        return self
+    
+    def _assignment_map(self) -> Dict[int, Assignment]:
+        by_id = self._assignments_by_id
+        if by_id is None or len(by_id) != len(self.assignments):
+            by_id = {a.id: a for a in self.assignments}
+            self._assignments_by_id = by_id
+        return by_id
+    
+    def get_assignment(self, assignment_id: int) -> Optional[Assignment]:
+        """Ödevi numarasıyla O(1) sürede bul."""
+        return self._assignment_map().get(assignment_id)
+    
+    def assignment_heap(self) -> AssignmentMinHeap:
+        """
+        Ödevlerin son teslim tarihine göre heap'ini döndür.
+        
+        Heap ilk çağrıda kurulur ve öğrenci nesnesi üzerinde saklanır;
+        add_assignment/remove_assignment/update_assignment onu yerinde günceller.
+        Ödev listesi bu metotlar dışında büyüyüp küçülürse heap yeniden kurulur.
+        """
+        heap = self._assignment_heap
+        if heap is None or len(self._assignment_handles) != len(self.assignments):
+            heap = AssignmentMinHeap.from_assignments(self.assignments)
+            self._assignment_heap = heap
+            self._assignment_handles = {a.id: i for i, a in enumerate(self.assignments)}
+        return heap
+    
+    def add_assignment(self, assignment: Assignment) -> Assignment:
+        """Ödeve yeni bir numara vererek ekle; kurulmuş eşlemeleri de güncelle."""
+        assignment.id = self.next_assignment_id
+        self.next_assignment_id += 1
+        self.assignments.append(assignment)
+        if self._assignments_by_id is not None:
+            self._assignments_by_id[assignment.id] = assignment
+        if self._assignment_heap is not None:
+            self._assignment_handles[assignment.id] = self._assignment_heap.add(assignment)
+        return assignment
+    
+    def remove_assignment(self, assignment_id: int) -> Optional[Assignment]:
+        """Numarası verilen ödevi sil ve döndür (yoksa None)."""
+        assignment = self._assignment_map().pop(assignment_id, None)
+        if assignment is None:
+            return None
+        self.assignments.remove(assignment)
+        if self._assignment_heap is not None:
+            self._assignment_heap.remove(self._assignment_handles.pop(assignment_id))
+        return assignment
+    
+    def update_assignment(
+        self,
+        assignment_id: int,
+        deadline: Optional[date] = None,
+        done: Optional[bool] = None
+    ) -> Optional[Assignment]:
+        """Numarası verilen ödevin son tarihini ve/veya tamamlanma durumunu güncelle."""
+        assignment = self.get_assignment(assignment_id)
+        if assignment is None:
+            return None
+        if done is not None:
+            assignment.done = done
+        if deadline is not None:
+            if self._assignment_heap is not None:
+                self._assignment_heap.update(self._assignment_handles[assignment_id], deadline)
+            else:
+                assignment.deadline = deadline
+        return assignment
@@ -1,9 +1,12 @@
+from bisect import bisect_right
 from datetime import date, timedelta
-from typing import Set, List, Dict, Any
+from time import perf_counter
+from typing import Set, List, Dict, Any, Iterable, Optional, Sequence, Tuple
 
+from app import metrics
 from app.domain.models import Student, Assignment
-from app.domain.ds.assignment_heap import AssignmentMinHeap
 from app.domain.ds.prereq_graph import PrereqGraph
+from app.domain.risk_model import COMPONENTS, DEFAULT_CONFIG, DEFAULT_MODEL, CompiledRiskModel
 
 
 class RiskEngine:
@@ -11,30 +14,46 @@ class RiskEngine:
     Çeşitli faktörlere dayalı öğrenci risk puanı hesaplama motoru.
     """
     
-    def __init__(self, storage):
+    # Varsayılan bileşen ağırlıkları (toplamı 1.0); anahtar sırası bileşen sırasıdır.
+    # Etkin ağırlıklar motorun risk modelinden gelir.
+    WEIGHTS = {name: DEFAULT_CONFIG["weights"][name] for name in COMPONENTS}
+    
+    # Yaklaşan son teslim tarihleri için bakılan gün sayısı
+    DEADLINE_HORIZON_DAYS = 7
+    
+    def __init__(self, storage, model: Optional[CompiledRiskModel] = None):
         """
         Risk motorunu depolama bağımlılığı ile başlat.
         
         Args:
             storage: Öğrenci ve ders verilerine erişmek için depolama modülü.
+            model: Ağırlıkları, bantları ve eşikleri içeren derlenmiş risk
+                modeli; verilmezse varsayılan model kullanılır.
         """
         self.storage = storage
+        self.model = model or DEFAULT_MODEL
+        # (bileşen, hesaplama metodu, ölçüm adı) üçlüleri
+        self._components = tuple(
+            (name, getattr(self, f"_calculate_{name}_risk"), f"risk.{name}")
+            for name in COMPONENTS
+        )
         self._prereq_graph = None
         self._init_prereq_graph()
     
     def _init_prereq_graph(self) -> None:
         """Ders kataloğundan ön koşul grafiğini başlat."""
-        courses = self.storage.load_course_catalog()
+        prereqs: Dict[str, List[str]] = {}
+        for course in self.storage.load_course_catalog():
+            prereqs.setdefault(course["code"], []).extend(course.get("prereq") or [])
         self._prereq_graph = PrereqGraph()
-        
-        for course in courses:
-            self._prereq_graph.add_course(course["code"], course.get("prereq", []))
+        self._prereq_graph.build_from_courses(prereqs)
     
     def calculate(self, student: Student) -> float:
         """
         Bir öğrenci için genel risk puanını hesapla.
         
-        Risk puanı, çeşitli risk faktörlerinin ağırlıklı toplamıdır:
+        Risk puanı, çeşitli risk faktörlerinin risk modelindeki ağırlıklarla
+        toplamıdır (varsayılan):
         - Devamsızlık riski (%25)
         - Ödev riski (%25)
         - Ön koşul riski (%20)
@@ -44,23 +63,39 @@ class RiskEngine:
         Returns:
             0.0 (risk yok) ile 1.0 (en yüksek risk) arasında bir risk puanı.
         """
-        # Bireysel risk bileşenlerini hesapla
-        absence_risk = self._calculate_absence_risk(student)
-        assignment_risk = self._calculate_assignment_risk(student)
-        prereq_risk = self._calculate_prereq_risk(student)
-        gpa_risk = self._calculate_gpa_risk(student)
-        grade_risk = self._calculate_grade_risk(student)
-        
-        # Her bileşene ağırlık uygula
-        weighted_risk = (
-            0.25 * absence_risk +
-            0.25 * assignment_risk +
-            0.20 * prereq_risk +
-            0.15 * gpa_risk +
-            0.15 * grade_risk
-        )
+        return self.combine(self.calculate_components(student))
+    
+    def calculate_components(self, student: Student) -> Dict[str, float]:
+        """
+        Risk bileşenlerini ağırlıklandırmadan ayrı ayrı hesapla.
         
-        return min(1.0, max(0.0, weighted_risk))
+        Returns:
+            WEIGHTS ile aynı anahtarlara sahip, her biri 0.0-1.0 arası bileşen puanları.
+        """
+        components = {}
+        for name, calculate, span_name in self._components:
+            # Her bileşenin süresi ayrı ölçülür
+            start = perf_counter()
+            components[name] = calculate(student)
+            metrics.observe_span(span_name, perf_counter() - start)
+        return components
+    
+    def calculate_many(self, students: Iterable[Student]) -> List[Dict[str, float]]:
+        """
+        Birden çok öğrencinin bileşen puanlarını aynı motorla hesapla.
+        
+        Ön koşul grafiği ve dersler için hesaplanan geçişli ön koşul kümeleri
+        tüm öğrenciler arasında paylaşılır; her öğrenci için yeni bir motor
+        kurmaktan çok daha ucuzdur.
+        
+        Returns:
+            Öğrencilerle aynı sırada, calculate_components çıktıları.
+        """
+        return [self.calculate_components(student) for student in students]
+    
+    def combine(self, components: Dict[str, float]) -> float:
+        """Bileşen puanlarına modelin ağırlıklarını uygulayarak genel risk puanını üret."""
+        return self.model.combine(components)
     
     def _calculate_absence_risk(self, student: Student) -> float:
         """
@@ -72,21 +107,8 @@ class RiskEngine:
         # absence_bits içindeki 1 bitlerin sayısını say
         absence_count = bin(student.absence_bits).count('1')
         
-        # İzin verilen maksimum devamsızlık (genellikle bir dönemde 14)
-        max_absences = 14
-        
-        # Riski, devamsızlıkların izin verilen maksimuma oranı olarak hesapla
-        if max_absences == 0:
-            return 0.0
-            
-        risk = absence_count / max_absences
-        
-        # Devamsızlıklar limite yaklaştıkça riski vurgulamak için doğrusal olmayan bir ölçeklendirme uygula
-        if risk > 0.7:
-            # Limit yaklaştıkça riski daha hızlı artır
-            risk = 0.7 + (risk - 0.7) * 1.5
-            
-        return min(1.0, max(0.0, risk))
+        # Oran ve limite yaklaşırken hızlanma modelde önceden hesaplanmıştır
+        return self.model.absence_risk(absence_count)
     
     def _calculate_assignment_risk(self, student: Student) -> float:
         """
@@ -108,8 +130,8 @@ class RiskEngine:
         missed_risk = missed_assignments / total_assignments if total_assignments > 0 else 0.0
         
         # Yaklaşan son teslim tarihlerinden riski hesapla (ödev riskinin %50'si)
-        heap = AssignmentMinHeap.from_assignments(student.assignments)
-        upcoming = heap.get_due_soon(days=7)
+        heap = student.assignment_heap()
+        upcoming = heap.get_due_soon(days=self.DEADLINE_HORIZON_DAYS)
         
         # Son teslim tarihi riskini, ödevlerin ne kadar yakın olduğuna göre hesapla
         today = date.today()
@@ -120,15 +142,7 @@ class RiskEngine:
                 continue
                 
             days_left = (assignment.deadline - today).days
-            # Daha yakın son teslim tarihleri için daha yüksek risk
-            if days_left <= 1:
-                deadline_risk += 1.0
-            elif days_left <= 3:
-                deadline_risk += 0.7
-            elif days_left <= 5:
-                deadline_risk += 0.4
-            else:
-                deadline_risk += 0.2
+            deadline_risk += self._deadline_weight(days_left)
         
         # Son teslim tarihi riskini normalize et
         max_deadline_risk = len(upcoming)
@@ -138,6 +152,57 @@ class RiskEngine:
         # Kaçırılan ve son teslim tarihi risklerini birleştir
         return 0.5 * missed_risk + 0.5 * deadline_risk
     
+    @staticmethod
+    def _deadline_weight(days_left: int) -> float:
+        """Tamamlanmamış bir ödevin son teslim tarihine kalan güne göre risk katkısı."""
+        # Daha yakın son teslim tarihleri için daha yüksek risk
+        if days_left <= 1:
+            return 1.0
+        elif days_left <= 3:
+            return 0.7
+        elif days_left <= 5:
+            return 0.4
+        return 0.2
+    
+    @classmethod
+    def assignment_risk_from_deadlines(
+        cls,
+        deadlines: Sequence[Tuple[int, bool]],
+        today: date
+    ) -> float:
+        """
+        Ödev riskini önceden hesaplanmış son teslim tarihi dizininden hesapla.
+        
+        _calculate_assignment_risk ile aynı sonucu verir, ancak öğrenci kaydını
+        gerektirmez; gece işi değişmeyen öğrencilerin yalnızca tarihe bağlı
+        bileşenini bununla günceller.
+        
+        Args:
+            deadlines: (son teslim tarihi ordinal'i, tamamlandı mı) çiftleri, sıralı.
+            today: Riskin hesaplanacağı gün.
+        """
+        if not deadlines:
+            return 0.0
+        
+        today_key = today.toordinal()
+        # Yalnızca ufuk içindeki (ve geçmiş) girdiler ziyaret edilir
+        cutoff = today_key + cls.DEADLINE_HORIZON_DAYS
+        upcoming = deadlines[:bisect_right(deadlines, (cutoff, True))]
+        
+        missed_assignments = 0
+        deadline_risk = 0.0
+        for deadline_key, done in upcoming:
+            if done:
+                continue
+            if deadline_key < today_key:
+                missed_assignments += 1
+            deadline_risk += cls._deadline_weight(deadline_key - today_key)
+        
+        missed_risk = missed_assignments / len(deadlines)
+        if upcoming:
+            deadline_risk = deadline_risk / len(upcoming)
+        return 0.5 * missed_risk + 0.5 * deadline_risk
+    
     def _calculate_prereq_risk(self, student: Student) -> float:
         """
         Ön koşul sorunlarına dayalı riski hesapla.
@@ -186,17 +251,7 @@ class RiskEngine:
         - FF ile tamamlanan dersler (başarısız)
         - Düşük notlu dersler
         """
-        # Notlandırma sistemi: AA=4.0, BA=3.5, BB=3.0, CB=2.5, CC=2.0, DC=1.5, DD=1.0, FF=0.0
-        grade_points = {
-            "AA": 0.0,  # Risk yok
-            "BA": 0.1,
-            "BB": 0.2,
-            "CB": 0.3,
-            "CC": 0.4,
-            "DC": 0.6,
-            "DD": 0.8,
-            "FF": 1.0   # Tam risk
-        }
+        grade_risk = self.model.grade_risk
         
         total_completed = 0
         total_risk = 0.0
@@ -205,8 +260,7 @@ class RiskEngine:
             for course in term.courses:
                 if course.completed and course.grade:
                     total_completed += 1
-                    grade = course.grade.upper()
-                    total_risk += grade_points.get(grade, 0.5)  # Bilinmeyen notlar için orta risk
+                    total_risk += grade_risk(course.grade)  # Bilinmeyen notlar için modelin varsayılanı
         
         if total_completed == 0:
             return 0.0
@@ -219,17 +273,5 @@ class RiskEngine:
         
         Düşük GPA daha yüksek risk gösterir.
         """
-        # GPA'nın 4.0 ölçeğinde olduğunu varsay
-        # GPA düştükçe risk artar
-        if student.gpa >= 3.5:
-            return 0.0
-        elif student.gpa >= 3.0:
-            return 0.2
-        elif student.gpa >= 2.5:
-            return 0.4
-        elif student.gpa >= 2.0:
-            return 0.6
-        elif student.gpa >= 1.5:
-            return 0.8
-        else:
-            return 1.0 
\ No newline at end of file
+        # GPA düştükçe risk artar; bantlar modelde bisect dizisi olarak tutulur
+        return self.model.gpa_risk(student.gpa)
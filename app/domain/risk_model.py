@@ -0,0 +1,207 @@
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+# Risk bileşenleri, puanlama ve saklama sırasıyla
+COMPONENTS = ("absence", "assignment", "prereq", "gpa", "grade")
+
+# Yapılandırma dosyası yoksa kullanılan varsayılan model
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "weights": {
+        "absence": 0.25,
+        "assignment": 0.25,
+        "prereq": 0.20,
+        "gpa": 0.15,
+        "grade": 0.15,
+    },
+    "gpa_bands": [
+        {"min_gpa": 3.5, "risk": 0.0},
+        {"min_gpa": 3.0, "risk": 0.2},
+        {"min_gpa": 2.5, "risk": 0.4},
+        {"min_gpa": 2.0, "risk": 0.6},
+        {"min_gpa": 1.5, "risk": 0.8},
+        {"min_gpa": 0.0, "risk": 1.0},
+    ],
+    # Notlandırma sistemi: AA=4.0, BA=3.5, BB=3.0, CB=2.5, CC=2.0, DC=1.5, DD=1.0, FF=0.0
+    "grade_risk": {
+        "AA": 0.0,
+        "BA": 0.1,
+        "BB": 0.2,
+        "CB": 0.3,
+        "CC": 0.4,
+        "DC": 0.6,
+        "DD": 0.8,
+        "FF": 1.0,
+    },
+    "unknown_grade_risk": 0.5,
+    "absence": {"max_absences": 14, "escalate_above": 0.7, "escalation_factor": 1.5},
+    "levels": {"high": 0.75, "medium": 0.5},
+}
+
+
+class GpaBand(BaseModel):
+    """GPA bandı - alt sınırı ``min_gpa`` olan bandın risk puanı."""
+    min_gpa: float
+    risk: float = Field(ge=0.0, le=1.0)
+
+
+class AbsencePolicy(BaseModel):
+    """Devamsızlık riski: oran ``escalate_above`` değerini geçince ``escalation_factor`` ile hızlanır."""
+    max_absences: int = Field(14, ge=1)
+    escalate_above: float = Field(0.7, ge=0.0, le=1.0)
+    escalation_factor: float = Field(1.5, ge=0.0)
+
+
+class RiskLevels(BaseModel):
+    """Risk seviyesi eşikleri (eşiğin üstü o seviyeye girer)."""
+    high: float = Field(0.75, ge=0.0, le=1.0)
+    medium: float = Field(0.5, ge=0.0, le=1.0)
+
+    @model_validator(mode="after")
+    def _check_order(self) -> "RiskLevels":
+        if self.medium > self.high:
+            raise ValueError("levels.medium must not exceed levels.high")
+        return self
+
+
+class RiskModelConfig(BaseModel):
+    """
+    Bildirimsel risk modeli yapılandırması.
+
+    Ağırlıklar, GPA bantları, harf notu tablosu, devamsızlık politikası ve
+    seviye eşikleri burada tanımlanır; compile() bunları puanlamada
+    kullanılan arama tablolarına dönüştürür.
+    """
+    weights: Dict[str, float]
+    gpa_bands: List[GpaBand]
+    grade_risk: Dict[str, float]
+    unknown_grade_risk: float = Field(0.5, ge=0.0, le=1.0)
+    absence: AbsencePolicy = AbsencePolicy()
+    levels: RiskLevels = RiskLevels()
+
+    @field_validator("weights")
+    @classmethod
+    def _check_weights(cls, weights: Dict[str, float]) -> Dict[str, float]:
+        if set(weights) != set(COMPONENTS):
+            raise ValueError(f"weights must have exactly these keys: {', '.join(COMPONENTS)}")
+        if any(weight < 0 for weight in weights.values()):
+            raise ValueError("weights must not be negative")
+        if abs(sum(weights.values()) - 1.0) > 1e-6:
+            raise ValueError("weights must add up to 1.0")
+        return {name: weights[name] for name in COMPONENTS}
+
+    @field_validator("gpa_bands")
+    @classmethod
+    def _check_gpa_bands(cls, bands: List[GpaBand]) -> List[GpaBand]:
+        if not bands:
+            raise ValueError("at least one GPA band is required")
+        if len({band.min_gpa for band in bands}) != len(bands):
+            raise ValueError("GPA bands must have distinct min_gpa values")
+        return sorted(bands, key=lambda band: band.min_gpa, reverse=True)
+
+    @field_validator("grade_risk")
+    @classmethod
+    def _check_grade_risk(cls, grade_risk: Dict[str, float]) -> Dict[str, float]:
+        normalized = {grade.strip().upper(): risk for grade, risk in grade_risk.items()}
+        if len(normalized) != len(grade_risk):
+            raise ValueError("grade_risk has duplicate grades")
+        if any(not 0.0 <= risk <= 1.0 for risk in normalized.values()):
+            raise ValueError("grade risks must be between 0.0 and 1.0")
+        return normalized
+
+    def compile(self, token: str = "default") -> "CompiledRiskModel":
+        return CompiledRiskModel(self, token)
+
+
+class CompiledRiskModel:
+    """
+    Puanlamaya hazır, değişmez risk modeli.
+
+    GPA bantları artan eşik dizisine çevrilir ve bisect ile aranır; harf
+    notları büyük/küçük harf biçimleriyle tek bir sözlükte tutulur;
+    devamsızlık riski her devamsızlık sayısı için önceden hesaplanır.
+    Tekli ve toplu puanlama aynı tabloları kullanır.
+    """
+
+    def __init__(self, config: RiskModelConfig, token: str = "default"):
+        self.config = config
+        # Modeli tanımlayan belirteç (önbellek ve ETag anahtarlarında kullanılır)
+        self.token = token
+        self.weights = tuple(config.weights.items())
+
+        bands = sorted(config.gpa_bands, key=lambda band: band.min_gpa)
+        self._gpa_thresholds = [band.min_gpa for band in bands]
+        self._gpa_risks = [band.risk for band in bands]
+        self._gpa_labels = [
+            f"{lower:g}-{upper:g}" for lower, upper in zip(self._gpa_thresholds, self._gpa_thresholds[1:])
+        ] + [f"{self._gpa_thresholds[-1]:g}+"]
+
+        self._grade_risk: Dict[str, float] = {}
+        for grade, risk in config.grade_risk.items():
+            self._grade_risk[grade] = risk
+            self._grade_risk[grade.lower()] = risk
+            self._grade_risk[grade.capitalize()] = risk
+        self.unknown_grade_risk = config.unknown_grade_risk
+
+        self._absence = config.absence
+        self._absence_risks = [
+            self._absence_formula(count) for count in range(config.absence.max_absences + 1)
+        ]
+
+        self.high_threshold = config.levels.high
+        self.medium_threshold = config.levels.medium
+
+    def combine(self, components: Dict[str, float]) -> float:
+        """Bileşen puanlarına ağırlık uygulayarak genel risk puanını üret."""
+        weighted_risk = sum(weight * components[name] for name, weight in self.weights)
+        return min(1.0, max(0.0, weighted_risk))
+
+    def _gpa_position(self, gpa: float) -> int:
+        # En küçük bandın altındaki GPA'lar en düşük banda düşer
+        return max(0, bisect_right(self._gpa_thresholds, gpa) - 1)
+
+    def gpa_risk(self, gpa: float) -> float:
+        return self._gpa_risks[self._gpa_position(gpa)]
+
+    def gpa_band(self, gpa: float) -> str:
+        """GPA'nın düştüğü bandın etiketi (örn. "2.5-3", en üst bant "3.5+")."""
+        return self._gpa_labels[self._gpa_position(gpa)]
+
+    def grade_risk(self, grade: str) -> float:
+        risk = self._grade_risk.get(grade)
+        if risk is None:
+            risk = self._grade_risk.get(grade.strip().upper(), self.unknown_grade_risk)
+        return risk
+
+    def _absence_formula(self, absence_count: int) -> float:
+        policy = self._absence
+        risk = absence_count / policy.max_absences
+        # Devamsızlıklar limite yaklaştıkça riski vurgulamak için doğrusal olmayan ölçekleme
+        if risk > policy.escalate_above:
+            risk = policy.escalate_above + (risk - policy.escalate_above) * policy.escalation_factor
+        return min(1.0, max(0.0, risk))
+
+    def absence_risk(self, absence_count: int) -> float:
+        if absence_count < len(self._absence_risks):
+            return self._absence_risks[absence_count]
+        return self._absence_formula(absence_count)
+
+    def level(self, risk_score: float) -> str:
+        """Map a risk score to its LOW/MEDIUM/HIGH level."""
+        if risk_score > self.high_threshold:
+            return "HIGH"
+        if risk_score > self.medium_threshold:
+            return "MEDIUM"
+        return "LOW"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.config.model_dump()
+
+
+def compile_config(data: Optional[Dict[str, Any]], token: str = "default") -> CompiledRiskModel:
+    """Validate a raw config (None means the defaults) and compile it."""
+    return RiskModelConfig.model_validate(DEFAULT_CONFIG if data is None else data).compile(token)
+
+
+DEFAULT_MODEL = compile_config(None)
@@ -0,0 +1,145 @@
+"""
+Global deadline index across all students.
+
+One row per assignment, keyed by (student_id, assignment ID) and indexed by
+deadline ordinal, so "who has undone work due in the next N days" is a
+range scan instead of a pass over every student file. storage.save_student
+keeps it current. When the index is unbuilt (new or after a format
+change) the nightly job recreates it during its full rescan, with
+begin_rebuild(), index_student() for every student and finish_rebuild().
+
+Functions take the index connection so that storage can update the index
+inside the same transaction as its other bookkeeping.
+"""
+import sqlite3
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.domain.models import Student
+from app.infrastructure import index_db
+
+# Anahtar sürümü: satırlar ödev sırası yerine ödev numarasıyla tutulmaya başlayınca
+# dizinin yeniden kurulması için değiştirildi
+_BUILT_KEY = "deadlines_built:assignment_ids"
+_ROLLOVER_KEY = "deadlines_rolled_over_to"
+
+
+def index_student(conn: sqlite3.Connection, student: Student) -> None:
+    """Bring a student's rows in line with its assignments, touching only changed ones."""
+    current = {
+        assignment_id: (deadline, done)
+        for assignment_id, deadline, done in conn.execute(
+            "SELECT assignment, deadline, done FROM deadlines WHERE student_id = ?",
+            (student.id,),
+        )
+    }
+    wanted = {
+        a.id: (a.deadline.toordinal(), int(a.done)) for a in student.assignments
+    }
+    conn.executemany(
+        "DELETE FROM deadlines WHERE student_id = ? AND assignment = ?",
+        ((student.id, assignment_id) for assignment_id in current.keys() - wanted.keys()),
+    )
+    conn.executemany(
+        "INSERT OR REPLACE INTO deadlines (deadline, student_id, assignment, done) "
+        "VALUES (?, ?, ?, ?)",
+        (
+            (deadline, student.id, assignment_id, done)
+            for assignment_id, (deadline, done) in wanted.items()
+            if current.get(assignment_id) != (deadline, done)
+        ),
+    )
+
+
+def begin_rebuild(conn: sqlite3.Connection) -> None:
+    """
+    Empty the index and mark it unbuilt; callers then index every student
+    with index_student() (in as many transactions as they like) and call
+    finish_rebuild(). An interrupted rebuild leaves the index unbuilt.
+    """
+    with conn:
+        conn.execute("DELETE FROM deadlines")
+        conn.execute("DELETE FROM index_meta WHERE key = ?", (_BUILT_KEY,))
+
+
+def finish_rebuild(conn: sqlite3.Connection) -> None:
+    with conn:
+        index_db.set_meta(conn, _BUILT_KEY, "1")
+
+
+def is_built(conn: sqlite3.Connection) -> bool:
+    return index_db.get_meta(conn, _BUILT_KEY) is not None
+
+
+def due_between(
+    conn: sqlite3.Connection,
+    start: date,
+    end: date,
+    include_done: bool = False
+) -> Dict[int, List[Tuple[int, date, bool]]]:
+    """
+    Assignments with start <= deadline <= end, grouped by student.
+
+    Returns:
+        student_id -> [(assignment ID, deadline, done), ...] ordered by deadline.
+    """
+    query = (
+        "SELECT student_id, assignment, deadline, done FROM deadlines "
+        "WHERE deadline BETWEEN ? AND ?"
+    )
+    if not include_done:
+        query += " AND done = 0"
+    query += " ORDER BY deadline, student_id, assignment"
+    result: Dict[int, List[Tuple[int, date, bool]]] = defaultdict(list)
+    for student_id, assignment, deadline, done in conn.execute(
+        query, (start.toordinal(), end.toordinal())
+    ):
+        result[student_id].append((assignment, date.fromordinal(deadline), bool(done)))
+    return dict(result)
+
+
+def students_with_deadlines_between(
+    conn: sqlite3.Connection,
+    start: date,
+    end: date
+) -> Set[int]:
+    """Students with any assignment (done or not) due in [start, end]."""
+    rows = conn.execute(
+        "SELECT DISTINCT student_id FROM deadlines WHERE deadline BETWEEN ? AND ?",
+        (start.toordinal(), end.toordinal()),
+    )
+    return {student_id for (student_id,) in rows}
+
+
+def rollover_start(conn: sqlite3.Connection) -> Optional[date]:
+    """Day of the last completed rollover, or None if there never was one."""
+    value = index_db.get_meta(conn, _ROLLOVER_KEY)
+    return date.fromordinal(int(value)) if value is not None else None
+
+
+def rolled_over_students(
+    conn: sqlite3.Connection,
+    today: date,
+    horizon_days: int
+) -> Optional[Set[int]]:
+    """
+    Students whose date-dependent state may differ between the last
+    rollover and ``today``.
+
+    A deadline only matters to day-based logic while it is between the day
+    being evaluated and ``horizon_days`` after it, so only students with a
+    deadline in [last rollover, today + horizon_days] are affected. Returns
+    None if no rollover was recorded yet (every student must be treated as
+    affected). Call mark_rolled_over() once the caller has processed them.
+    """
+    start = rollover_start(conn)
+    if start is None:
+        return None
+    end = date.fromordinal(today.toordinal() + horizon_days)
+    return students_with_deadlines_between(conn, start, end)
+
+
+def mark_rolled_over(conn: sqlite3.Connection, today: date) -> None:
+    with conn:
+        index_db.set_meta(conn, _ROLLOVER_KEY, str(today.toordinal()))
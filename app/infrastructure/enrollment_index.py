@@ -0,0 +1,137 @@
+"""
+Reverse enrollment index: course code -> students.
+
+One row per (course, student) with the student's status in that course:
+``current`` (taking it now), ``completed`` (passed) or ``failed`` (only
+failed attempts so far). A passed attempt wins over a current retake,
+which wins over earlier failed attempts. Class rosters and "who is
+affected if this course changes" become index lookups instead of a pass
+over every student file.
+
+storage.save_student keeps the index current, so every enrollment
+mutation (add_course, remove_course, undo/redo, simulation never writes)
+is reflected. When the index is unbuilt the nightly job recreates it
+during its full rescan, with begin_rebuild(), index_student() for every
+student and finish_rebuild(); until then readers fall back to
+scan_roster(), which never writes. Functions take the index connection
+so that storage can update the index inside the same transaction as its
+other bookkeeping.
+"""
+import sqlite3
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.domain.models import Student
+from app.infrastructure import index_db
+
+CURRENT = "current"
+COMPLETED = "completed"
+FAILED = "failed"
+STATUSES = (CURRENT, COMPLETED, FAILED)
+
+# Aynı dersin birden çok denemesinde hangi durumun geçerli olduğu
+_PRECEDENCE = {FAILED: 0, CURRENT: 1, COMPLETED: 2}
+_BUILT_KEY = "enrollments_built"
+
+
+def enrollment_statuses(student: Student) -> Dict[str, str]:
+    """The student's status in every course they ever enrolled in."""
+    statuses: Dict[str, str] = {}
+    for term in student.terms:
+        for enrollment in term.courses:
+            code = enrollment.code.upper()
+            if not enrollment.completed:
+                status = CURRENT
+            elif enrollment.grade and enrollment.grade.strip().upper() == "FF":
+                status = FAILED
+            else:
+                status = COMPLETED
+            previous = statuses.get(code)
+            if previous is None or _PRECEDENCE[status] > _PRECEDENCE[previous]:
+                statuses[code] = status
+    return statuses
+
+
+def index_student(conn: sqlite3.Connection, student: Student) -> None:
+    """Bring a student's rows in line with its enrollments, touching only changed ones."""
+    current = dict(conn.execute(
+        "SELECT course, status FROM enrollments WHERE student_id = ?", (student.id,)
+    ))
+    wanted = enrollment_statuses(student)
+    conn.executemany(
+        "DELETE FROM enrollments WHERE course = ? AND student_id = ?",
+        ((course, student.id) for course in current.keys() - wanted.keys()),
+    )
+    conn.executemany(
+        "INSERT OR REPLACE INTO enrollments (course, student_id, status) VALUES (?, ?, ?)",
+        (
+            (course, student.id, status)
+            for course, status in wanted.items()
+            if current.get(course) != status
+        ),
+    )
+
+
+def begin_rebuild(conn: sqlite3.Connection) -> None:
+    """Empty the index and mark it unbuilt (see deadline_index.begin_rebuild)."""
+    with conn:
+        conn.execute("DELETE FROM enrollments")
+        conn.execute("DELETE FROM index_meta WHERE key = ?", (_BUILT_KEY,))
+
+
+def finish_rebuild(conn: sqlite3.Connection) -> None:
+    with conn:
+        index_db.set_meta(conn, _BUILT_KEY, "1")
+
+
+def is_built(conn: sqlite3.Connection) -> bool:
+    return index_db.get_meta(conn, _BUILT_KEY) is not None
+
+
+def roster(
+    conn: sqlite3.Connection,
+    course: str,
+    status: Optional[str] = None
+) -> Dict[str, List[int]]:
+    """Students of ``course`` grouped by status, each list in ID order."""
+    query = "SELECT status, student_id FROM enrollments WHERE course = ?"
+    params = [course.upper()]
+    if status is not None:
+        query += " AND status = ?"
+        params.append(status)
+    result: Dict[str, List[int]] = defaultdict(list)
+    for row_status, student_id in conn.execute(query + " ORDER BY student_id", params):
+        result[row_status].append(student_id)
+    return {name: result.get(name, []) for name in STATUSES if status in (None, name)}
+
+
+def scan_roster(
+    students: Iterable[Student],
+    course: str,
+    status: Optional[str] = None
+) -> Dict[str, List[int]]:
+    """roster() computed from ``students`` directly, for an index that is not built."""
+    course = course.upper()
+    result: Dict[str, List[int]] = defaultdict(list)
+    for student in students:
+        student_status = enrollment_statuses(student).get(course)
+        if student_status is not None and status in (None, student_status):
+            result[student_status].append(student.id)
+    return {name: sorted(result.get(name, [])) for name in STATUSES if status in (None, name)}
+
+
+def students_in(
+    conn: sqlite3.Connection,
+    courses: Iterable[str],
+    statuses: Iterable[str] = STATUSES
+) -> Set[int]:
+    """Students with any of ``statuses`` in any of ``courses``."""
+    statuses = tuple(statuses)
+    placeholders = ", ".join("?" * len(statuses))
+    result: Set[int] = set()
+    for course in {course.upper() for course in courses}:
+        result.update(student_id for (student_id,) in conn.execute(
+            f"SELECT student_id FROM enrollments WHERE course = ? AND status IN ({placeholders})",
+            (course, *statuses),
+        ))
+    return result
@@ -0,0 +1,126 @@
+"""
+SQLite database for derived, rebuildable indexes.
+
+Student JSON files remain the source of truth. Everything stored here
+(dirty-student marks, cached risk scores, ...) can be recomputed from
+them, so the database lives next to the data files and is shared by all
+worker processes through SQLite's own locking.
+"""
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+DB_NAME = "index.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirty_students (
+    student_id INTEGER PRIMARY KEY,
+    version    INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS risk_scores (
+    student_id    INTEGER PRIMARY KEY,
+    score         REAL NOT NULL,
+    absence       REAL NOT NULL,
+    assignment    REAL NOT NULL,
+    prereq        REAL NOT NULL,
+    gpa           REAL NOT NULL,
+    grade         REAL NOT NULL,
+    computed_on   INTEGER NOT NULL,
+    version       INTEGER NOT NULL,
+    scoring_token TEXT NOT NULL,
+    deadlines     TEXT NOT NULL,
+    summary       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS risk_scores_by_score ON risk_scores (score DESC, student_id);
+
+CREATE TABLE IF NOT EXISTS deadlines (
+    deadline   INTEGER NOT NULL,
+    student_id INTEGER NOT NULL,
+    assignment INTEGER NOT NULL,
+    done       INTEGER NOT NULL,
+    PRIMARY KEY (student_id, assignment)
+);
+CREATE INDEX IF NOT EXISTS deadlines_by_day ON deadlines (deadline, done);
+
+CREATE TABLE IF NOT EXISTS job_runs (
+    job           TEXT PRIMARY KEY,
+    day           INTEGER NOT NULL,
+    scoring_token TEXT NOT NULL,
+    mode          TEXT NOT NULL,
+    status        TEXT NOT NULL,
+    phase         TEXT NOT NULL,
+    total         INTEGER NOT NULL,
+    processed     INTEGER NOT NULL,
+    last_student  INTEGER NOT NULL,
+    started_at    TEXT NOT NULL,
+    updated_at    TEXT NOT NULL,
+    finished_at   TEXT,
+    error         TEXT
+);
+
+CREATE TABLE IF NOT EXISTS enrollments (
+    course     TEXT NOT NULL,
+    student_id INTEGER NOT NULL,
+    status     TEXT NOT NULL,
+    PRIMARY KEY (course, student_id)
+);
+CREATE INDEX IF NOT EXISTS enrollments_by_student ON enrollments (student_id);
+
+CREATE TABLE IF NOT EXISTS student_names (
+    student_id INTEGER PRIMARY KEY,
+    name       TEXT NOT NULL,
+    seq        INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS student_names_by_seq ON student_names (seq);
+
+CREATE TABLE IF NOT EXISTS index_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Önbellek satırlarının biçimi değiştiğinde artırılır; eski veritabanlarındaki
+# risk_scores tablosu silinir ve gece işi onu baştan doldurur
+SCHEMA_VERSION = 3
+
+_RESET = """
+DROP TABLE IF EXISTS risk_scores;
+"""
+
+# Bağlantılar iş parçacıkları arasında paylaşılmaz
+_local = threading.local()
+
+
+def connect(data_dir: Path) -> sqlite3.Connection:
+    """Return this thread's connection to the index database in ``data_dir``."""
+    path = Path(data_dir) / DB_NAME
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            conn.executescript(
+                f"BEGIN IMMEDIATE; {_RESET} PRAGMA user_version = {SCHEMA_VERSION}; COMMIT;"
+            )
+        conn.executescript(_SCHEMA)
+        connections[path] = conn
+    return conn
+
+
+def get_meta(conn: sqlite3.Connection, key: str) -> Optional[str]:
+    row = conn.execute("SELECT value FROM index_meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def set_meta(conn: sqlite3.Connection, key: str, value: str) -> None:
+    conn.execute(
+        "INSERT INTO index_meta (key, value) VALUES (?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, value),
+    )
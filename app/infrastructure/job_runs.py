@@ -0,0 +1,178 @@
+"""
+Progress and checkpoints of long-running background jobs.
+
+One row per job in the index database records the current (or last) run:
+the day and scoring token it works for, its phase, how many items are done
+out of how many, and the last student ID whose results were committed. A
+job commits its partial results chunk by chunk and moves the checkpoint
+after each chunk, so a run that crashed or was killed can continue after
+``last_student`` instead of starting over.
+
+Whether a run is actually executing is decided by a non-blocking FileLock
+held for the duration of the run: the operating system releases it when
+the process dies, so a "running" row without the lock is an interrupted
+run.
+"""
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterator, Optional
+
+from filelock import FileLock, Timeout
+
+from app.infrastructure import storage
+
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+INTERRUPTED = "interrupted"
+
+FULL = "full"
+INCREMENTAL = "incremental"
+
+
+@dataclass
+class JobRun:
+    job: str
+    day: int
+    scoring_token: str
+    mode: str
+    status: str
+    phase: str
+    total: int
+    processed: int
+    last_student: int
+    started_at: str
+    updated_at: str
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
+
+    def resumable(self, today: date, scoring_token: str) -> bool:
+        """True if this unfinished run was working on exactly what a new run would."""
+        return (
+            self.status != COMPLETED
+            and self.day == today.toordinal()
+            and self.scoring_token == scoring_token
+        )
+
+
+_COLUMNS = tuple(JobRun.__dataclass_fields__)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _save(conn: sqlite3.Connection, run: JobRun) -> None:
+    with conn:
+        conn.execute(
+            f"INSERT OR REPLACE INTO job_runs ({', '.join(_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+            tuple(getattr(run, name) for name in _COLUMNS),
+        )
+
+
+def load(conn: sqlite3.Connection, job: str) -> Optional[JobRun]:
+    row = conn.execute(
+        f"SELECT {', '.join(_COLUMNS)} FROM job_runs WHERE job = ?", (job,)
+    ).fetchone()
+    return JobRun(*row) if row is not None else None
+
+
+def start(
+    conn: sqlite3.Connection,
+    job: str,
+    today: date,
+    scoring_token: str,
+    mode: str,
+    total: int
+) -> JobRun:
+    """Record a new run, replacing the previous one."""
+    now = _now()
+    run = JobRun(
+        job=job, day=today.toordinal(), scoring_token=scoring_token, mode=mode,
+        status=RUNNING, phase="score", total=total, processed=0, last_student=0,
+        started_at=now, updated_at=now,
+    )
+    _save(conn, run)
+    return run
+
+
+def resume(conn: sqlite3.Connection, run: JobRun, remaining: int) -> JobRun:
+    """Mark an unfinished run as running again with ``remaining`` items left."""
+    run.status = RUNNING
+    run.error = None
+    run.total = run.processed + remaining
+    run.updated_at = _now()
+    _save(conn, run)
+    return run
+
+
+def checkpoint(conn: sqlite3.Connection, run: JobRun, processed: int, last_student: int) -> None:
+    """Record that ``processed`` more items up to ``last_student`` are committed."""
+    run.processed += processed
+    run.last_student = last_student
+    run.updated_at = _now()
+    _save(conn, run)
+
+
+def set_phase(conn: sqlite3.Connection, run: JobRun, phase: str) -> None:
+    run.phase = phase
+    run.updated_at = _now()
+    _save(conn, run)
+
+
+def finish(conn: sqlite3.Connection, run: JobRun, error: Optional[str] = None) -> None:
+    """Record the end of a run; with ``error`` it can be resumed later."""
+    run.status = FAILED if error else COMPLETED
+    run.phase = run.phase if error else "done"
+    run.error = error
+    run.updated_at = run.finished_at = _now()
+    _save(conn, run)
+
+
+def _lock(job: str) -> FileLock:
+    return FileLock(str(storage.ensure_data_dir() / f"{job}.job.lock"))
+
+
+@contextmanager
+def exclusive(job: str, wait: float = 0) -> Iterator[bool]:
+    """
+    Try to become the only process running ``job``; yields False if another
+    run still holds the lock after ``wait`` seconds (by default it does not
+    wait at all).
+    """
+    lock = _lock(job)
+    try:
+        lock.acquire(timeout=wait)
+    except Timeout:
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        lock.release()
+
+
+def is_running(job: str) -> bool:
+    """
+    True if a run of ``job`` holds its lock. The check takes the lock for a
+    moment, so the runs themselves wait briefly for it (see JOB_LOCK_WAIT
+    in the scheduler) instead of giving up when a status request probes.
+    """
+    with exclusive(job) as acquired:
+        return not acquired
+
+
+def describe(conn: sqlite3.Connection, job: str) -> Optional[Dict[str, Any]]:
+    """The last run of ``job`` for the status API, or None if it never ran."""
+    run = load(conn, job)
+    if run is None:
+        return None
+    result = asdict(run)
+    if run.status == RUNNING and not is_running(job):
+        result["status"] = INTERRUPTED
+    result["day"] = date.fromordinal(run.day).isoformat()
+    result["progress"] = round(run.processed / run.total, 4) if run.total else 1.0
+    return result
@@ -0,0 +1,41 @@
+"""
+Feed of student name changes shared by all worker processes.
+
+One row per student holds its latest name and the sequence number of the
+save that last changed it. storage.save_student writes the row inside its
+index transaction, so every rename is in the feed whether or not it went
+through the API routes. Each process keeps its own in-memory NameIndex
+and, before answering a search, applies the rows with a sequence number
+above the last one it has seen (an indexed range scan that is usually
+empty).
+
+Sequence numbers are taken while the writer holds the database's write
+lock, so they grow in commit order and a reader never skips a change.
+"""
+import sqlite3
+from typing import List, Tuple
+
+from app.domain.models import Student
+
+
+def index_student(conn: sqlite3.Connection, student: Student) -> None:
+    """Record the student's name with a new sequence number if it changed."""
+    conn.execute(
+        "INSERT INTO student_names (student_id, name, seq) "
+        "VALUES (?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM student_names)) "
+        "ON CONFLICT(student_id) DO UPDATE SET name = excluded.name, seq = excluded.seq "
+        "WHERE name != excluded.name",
+        (student.id, student.name),
+    )
+
+
+def latest(conn: sqlite3.Connection) -> int:
+    """Sequence number of the newest change (0 if there is none)."""
+    return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM student_names").fetchone()[0]
+
+
+def since(conn: sqlite3.Connection, seq: int) -> List[Tuple[int, int, str]]:
+    """(seq, student_id, name) of the changes after ``seq``, oldest first."""
+    return conn.execute(
+        "SELECT seq, student_id, name FROM student_names WHERE seq > ? ORDER BY seq", (seq,)
+    ).fetchall()
@@ -0,0 +1,270 @@
+"""
+Cached per-student risk scores.
+
+Each row keeps the five component scores, the day they were computed for,
+the student version and scoring token (course catalog and risk model)
+they were computed from, a small
+summary (name, GPA, current courses, terms) and the student's sorted
+(deadline ordinal, done) pairs. The pairs are enough to
+recompute the date-dependent assignment component without loading the
+student file.
+"""
+import json
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from app.domain.models import Student
+from app.domain.risk import RiskEngine
+from app.infrastructure import storage
+
+COMPONENTS = tuple(RiskEngine.WEIGHTS)
+
+
+@dataclass
+class CachedRisk:
+    student_id: int
+    score: float
+    components: Dict[str, float]
+    computed_on: int
+    version: int
+    scoring_token: str
+    deadlines: List[Tuple[int, bool]]
+    summary: Dict[str, object]
+
+
+def deadline_ordinals(student: Student) -> List[Tuple[int, bool]]:
+    """Sorted (deadline ordinal, done) pairs for a student's assignments."""
+    return sorted((a.deadline.toordinal(), a.done) for a in student.assignments)
+
+
+def student_summary(student: Student) -> Dict[str, object]:
+    """Fields kept next to the scores for listing and grouping without the student file."""
+    return {
+        "name": student.name,
+        "gpa": student.gpa,
+        "courses": sorted({
+            enrollment.code
+            for term in student.terms
+            for enrollment in term.courses
+            if not enrollment.completed
+        }),
+        "terms": sorted({f"{term.year}-{term.semester}" for term in student.terms}),
+    }
+
+
+def score_student(
+    engine: RiskEngine,
+    student: Student,
+    today: date,
+    scoring_token: str
+) -> CachedRisk:
+    """Fully score a student and build its cache entry."""
+    components = engine.calculate_components(student)
+    return CachedRisk(
+        student_id=student.id,
+        score=engine.combine(components),
+        components=components,
+        computed_on=today.toordinal(),
+        version=student.version,
+        scoring_token=scoring_token,
+        deadlines=deadline_ordinals(student),
+        summary=student_summary(student),
+    )
+
+
+def refresh_deadlines(engine: RiskEngine, entry: CachedRisk, today: date) -> CachedRisk:
+    """Recompute only the date-dependent assignment component of an entry."""
+    components = dict(entry.components)
+    components["assignment"] = RiskEngine.assignment_risk_from_deadlines(
+        entry.deadlines, today
+    )
+    entry.components = components
+    entry.score = engine.combine(components)
+    entry.computed_on = today.toordinal()
+    return entry
+
+
+def _from_row(row) -> CachedRisk:
+    (student_id, score, *component_values, computed_on, version,
+     scoring_token, deadlines, summary) = row
+    return CachedRisk(
+        student_id=student_id,
+        score=score,
+        components=dict(zip(COMPONENTS, component_values)),
+        computed_on=computed_on,
+        version=version,
+        scoring_token=scoring_token,
+        deadlines=[(key, bool(done)) for key, done in json.loads(deadlines)],
+        summary=json.loads(summary),
+    )
+
+
+_SELECT = (
+    f"SELECT student_id, score, {', '.join(COMPONENTS)}, computed_on, version, "
+    "scoring_token, deadlines, summary FROM risk_scores"
+)
+
+
+def iter_all() -> Iterator[CachedRisk]:
+    """Stream every cached entry in student ID order without materializing them all."""
+    return map(_from_row, storage.index_connection().execute(f"{_SELECT} ORDER BY student_id"))
+
+
+def load_all() -> Dict[int, CachedRisk]:
+    """All cached entries keyed by student ID."""
+    return {entry.student_id: entry for entry in iter_all()}
+
+
+def load(student_ids: Iterable[int]) -> Dict[int, CachedRisk]:
+    """Cached entries for the given students (missing ones are skipped)."""
+    conn = storage.index_connection()
+    result = {}
+    for student_id in student_ids:
+        row = conn.execute(f"{_SELECT} WHERE student_id = ?", (student_id,)).fetchone()
+        if row is not None:
+            result[student_id] = _from_row(row)
+    return result
+
+
+def above(threshold: float) -> List[CachedRisk]:
+    """Entries with a score above ``threshold``, highest first."""
+    rows = storage.index_connection().execute(
+        f"{_SELECT} WHERE score > ? ORDER BY score DESC", (threshold,)
+    )
+    return [_from_row(row) for row in rows]
+
+
+@dataclass(frozen=True)
+class RiskFilter:
+    """
+    Conditions for ranking entries, evaluated in SQL by top() and in Python
+    by matches() for entries scored outside the cache.
+    """
+    course: Optional[str] = None        # current course code
+    department: Optional[str] = None    # prefix of a current course code
+    term: Optional[str] = None          # "YYYY-S"
+    above: Optional[float] = None       # score > above
+    at_most: Optional[float] = None     # score <= at_most
+
+    def matches(self, entry: CachedRisk) -> bool:
+        courses = entry.summary.get("courses", [])
+        if self.course and self.course not in courses:
+            return False
+        if self.department and not any(code.startswith(self.department) for code in courses):
+            return False
+        if self.term and self.term not in entry.summary.get("terms", []):
+            return False
+        if self.above is not None and not entry.score > self.above:
+            return False
+        return self.at_most is None or entry.score <= self.at_most
+
+    def where(self) -> Tuple[List[str], List[Any]]:
+        """SQL conditions on risk_scores and their parameters."""
+        clauses: List[str] = []
+        params: List[Any] = []
+        # Özet JSON'u yalnızca sıralamada taranan satırlar için ayrıştırılır
+        if self.course:
+            clauses.append("EXISTS (SELECT 1 FROM json_each(summary, '$.courses') WHERE value = ?)")
+            params.append(self.course)
+        if self.department:
+            clauses.append(
+                "EXISTS (SELECT 1 FROM json_each(summary, '$.courses') WHERE substr(value, 1, ?) = ?)"
+            )
+            params.extend((len(self.department), self.department))
+        if self.term:
+            clauses.append("EXISTS (SELECT 1 FROM json_each(summary, '$.terms') WHERE value = ?)")
+            params.append(self.term)
+        if self.above is not None:
+            clauses.append("score > ?")
+            params.append(self.above)
+        if self.at_most is not None:
+            clauses.append("score <= ?")
+            params.append(self.at_most)
+        return clauses, params
+
+
+def top(
+    count: int,
+    offset: int = 0,
+    risk_filter: RiskFilter = RiskFilter(),
+    exclude_dirty: bool = False
+) -> List[CachedRisk]:
+    """
+    Cached entries matching ``risk_filter``, riskiest first (ties by lower
+    student ID), skipping ``offset`` and returning at most ``count``.
+
+    Walks the score index and stops after ``offset + count`` matches, so the
+    cost depends on how deep the page is, not on the population. With
+    ``exclude_dirty`` students saved since their entry was computed are left
+    out (the caller scores them from their files).
+    """
+    clauses, params = risk_filter.where()
+    if exclude_dirty:
+        clauses.append("student_id NOT IN (SELECT student_id FROM dirty_students)")
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    rows = storage.index_connection().execute(
+        f"{_SELECT}{where} ORDER BY score DESC, student_id LIMIT ? OFFSET ?",
+        (*params, count, offset),
+    )
+    return [_from_row(row) for row in rows]
+
+
+def scoring_tokens() -> Set[str]:
+    """Distinct scoring tokens the cached entries were computed with."""
+    rows = storage.index_connection().execute(
+        "SELECT DISTINCT scoring_token FROM risk_scores"
+    )
+    return {token for (token,) in rows}
+
+
+def computed_days() -> Set[int]:
+    """Distinct day ordinals the cached entries were computed for."""
+    rows = storage.index_connection().execute(
+        "SELECT DISTINCT computed_on FROM risk_scores"
+    )
+    return {day for (day,) in rows}
+
+
+def mark_computed(today: date) -> None:
+    """Record that every cached entry is valid for ``today``."""
+    conn = storage.index_connection()
+    with conn:
+        conn.execute("UPDATE risk_scores SET computed_on = ?", (today.toordinal(),))
+
+
+def upsert(entries: Iterable[CachedRisk]) -> None:
+    conn = storage.index_connection()
+    columns = ("student_id", "score", *COMPONENTS, "computed_on", "version",
+               "scoring_token", "deadlines", "summary")
+    rows = (
+        (e.student_id, e.score, *(e.components[name] for name in COMPONENTS),
+         e.computed_on, e.version, e.scoring_token,
+         json.dumps(e.deadlines, separators=(",", ":")),
+         json.dumps(e.summary, separators=(",", ":")))
+        for e in entries
+    )
+    with conn:
+        conn.executemany(
+            f"INSERT OR REPLACE INTO risk_scores ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))})",
+            rows,
+        )
+
+
+def delete_stale(scoring_token: str) -> int:
+    """Drop entries computed with another scoring token; returns how many were dropped."""
+    conn = storage.index_connection()
+    with conn:
+        return conn.execute(
+            "DELETE FROM risk_scores WHERE scoring_token != ?", (scoring_token,)
+        ).rowcount
+
+
+def delete(student_ids: Iterable[int]) -> None:
+    conn = storage.index_connection()
+    with conn:
+        conn.executemany(
+            "DELETE FROM risk_scores WHERE student_id = ?",
+            ((student_id,) for student_id in student_ids),
+        )
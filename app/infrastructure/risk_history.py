@@ -0,0 +1,196 @@
+"""
+Append-only daily risk history.
+
+Each day's snapshot is one columnar file in DATA_DIR/risk_history named
+YYYY-MM-DD.bin:
+
+    header   <4sHHI   magic, format version, column count, row count
+    ids      uint32 x rows, sorted ascending
+    columns  float32 x rows, one block per column (score, then the
+             five components in RiskEngine.WEIGHTS order)
+
+Files are written once per day (a re-run of the same day replaces that
+day atomically, earlier days are never touched) and read through mmap:
+a student lookup is a binary search over the id block, and population
+queries merge-join the id blocks of two days without parsing anything.
+"""
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.domain.risk import RiskEngine
+from app.infrastructure import storage
+
+MAGIC = b"RHST"
+FORMAT_VERSION = 1
+COLUMNS = ("score", *RiskEngine.WEIGHTS)
+_HEADER = struct.Struct("<4sHHI")
+
+
+def _history_dir() -> Path:
+    return storage.DATA_DIR / "risk_history"
+
+
+def _day_path(day: date) -> Path:
+    return _history_dir() / f"{day.isoformat()}.bin"
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_day(day: date, rows: Iterable[Tuple[int, float, Dict[str, float]]]) -> int:
+    """
+    Store the snapshot for ``day``; returns the number of students written.
+
+    Args:
+        rows: (student_id, score, components) tuples in any order.
+    """
+    ordered = sorted(rows, key=lambda row: row[0])
+    ids = array("I", (student_id for student_id, _, _ in ordered))
+    columns = [array("f", (score for _, score, _ in ordered))]
+    for name in COLUMNS[1:]:
+        columns.append(array("f", (components[name] for _, _, components in ordered)))
+    
+    _history_dir().mkdir(parents=True, exist_ok=True)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, len(COLUMNS), len(ids))
+    storage.atomic_write_bytes(
+        _day_path(day),
+        b"".join([header, _little_endian(ids), *map(_little_endian, columns)]),
+    )
+    return len(ids)
+
+
+class DaySnapshot:
+    """Read-only, memory-mapped view of one day's snapshot."""
+    
+    def __init__(self, day: date, path: Path):
+        self.day = day
+        with path.open("rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, column_count, rows = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != FORMAT_VERSION or column_count != len(COLUMNS):
+            self._mmap.close()
+            raise ValueError(f"Unsupported risk history file: {path}")
+        view = memoryview(self._mmap)
+        offset = _HEADER.size
+        self.ids = view[offset:offset + 4 * rows].cast("I")
+        offset += 4 * rows
+        self._columns = []
+        for _ in COLUMNS:
+            self._columns.append(view[offset:offset + 4 * rows].cast("f"))
+            offset += 4 * rows
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __enter__(self) -> "DaySnapshot":
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        self.ids.release()
+        for column in self._columns:
+            column.release()
+        self._mmap.close()
+    
+    def find(self, student_id: int) -> Optional[int]:
+        """Row position of a student, or None."""
+        position = bisect_left(self.ids, student_id)
+        if position < len(self.ids) and self.ids[position] == student_id:
+            return position
+        return None
+    
+    def score(self, position: int) -> float:
+        return self._columns[0][position]
+    
+    def row(self, position: int) -> Dict[str, float]:
+        """All columns of a row, keyed by COLUMNS names."""
+        return {name: column[position] for name, column in zip(COLUMNS, self._columns)}
+
+
+def open_day(day: date) -> Optional[DaySnapshot]:
+    path = _day_path(day)
+    if not path.exists():
+        return None
+    return DaySnapshot(day, path)
+
+
+def available_days() -> List[date]:
+    directory = _history_dir()
+    if not directory.exists():
+        return []
+    return sorted(date.fromisoformat(path.stem) for path in directory.glob("*.bin"))
+
+
+def _days(start: date, end: date) -> Iterator[date]:
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+def student_history(student_id: int, start: date, end: date) -> List[Tuple[date, Dict[str, float]]]:
+    """A student's stored rows between ``start`` and ``end`` (inclusive), oldest first."""
+    history = []
+    for day in _days(start, end):
+        snapshot = open_day(day)
+        if snapshot is None:
+            continue
+        with snapshot:
+            position = snapshot.find(student_id)
+            if position is not None:
+                history.append((day, snapshot.row(position)))
+    return history
+
+
+def _nearest_day(start: date, end: date, latest: bool) -> Optional[date]:
+    days = [day for day in available_days() if start <= day <= end]
+    if not days:
+        return None
+    return days[-1] if latest else days[0]
+
+
+def risers(start: date, end: date, min_delta: float) -> Tuple[Optional[date], Optional[date], List[Tuple[int, float, float]]]:
+    """
+    Students whose score rose by more than ``min_delta`` over the period.
+
+    Compares the first stored day on or after ``start`` with the last stored
+    day on or before ``end`` by merge-joining their sorted id blocks.
+
+    Returns:
+        (first day, last day, [(student_id, old score, new score), ...]) with
+        the largest increases first.
+    """
+    first_day = _nearest_day(start, end, latest=False)
+    last_day = _nearest_day(start, end, latest=True)
+    if first_day is None or first_day == last_day:
+        return first_day, last_day, []
+    
+    result = []
+    with open_day(first_day) as old, open_day(last_day) as new:
+        i = j = 0
+        while i < len(old) and j < len(new):
+            old_id, new_id = old.ids[i], new.ids[j]
+            if old_id < new_id:
+                i += 1
+            elif old_id > new_id:
+                j += 1
+            else:
+                old_score, new_score = old.score(i), new.score(j)
+                if new_score - old_score > min_delta:
+                    result.append((old_id, old_score, new_score))
+                i += 1
+                j += 1
+    result.sort(key=lambda row: row[1] - row[2])
+    return first_day, last_day, result
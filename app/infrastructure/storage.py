@@ -1,70 +1,446 @@
 from pathlib import Path
 import json
+import logging
 import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
 from filelock import FileLock
-from typing import Iterator, Optional
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
+from app import metrics, profiling
+
+from app.domain.catalog import closure_changes, validate_catalog
 from app.domain.models import Student, Assignment
+from app.domain.risk_model import CompiledRiskModel, compile_config
+from app.infrastructure import deadline_index, enrollment_index, index_db, name_changes
 
 
 DATA_DIR = Path(os.getenv("DATA_DIR", "./data"))
-DATA_DIR.mkdir(exist_ok=True)
+
+RISK_MODEL_FILE = "risk_model.json"
+
+# Katalog ve risk modeli kayıt sayaçlarının index_meta anahtarları
+_CATALOG_GENERATION = "catalog_generation"
+_RISK_MODEL_GENERATION = "risk_model_generation"
+
+logger = logging.getLogger(__name__)
+
+# (katalog belirteci, ders kodu -> ders) önbelleği
+_catalog_index_cache: Optional[Tuple[str, Dict[str, dict]]] = None
+# Son geçerli derlenmiş risk modeli (belirteci modelin içinde)
+_risk_model_cache: Optional[CompiledRiskModel] = None
+# Var olduğu bilinen veri dizinleri (testler DATA_DIR'i değiştirebilir)
+_created_dirs: Set[Path] = set()
+
+
+class VersionConflictError(Exception):
+    """Raised when a student was saved by someone else since it was loaded."""
+
+    def __init__(self, student_id: int, expected: int, actual: int):
+        super().__init__(
+            f"Student {student_id} was modified concurrently "
+            f"(expected version {expected}, found {actual})"
+        )
+        self.student_id = student_id
+        self.expected = expected
+        self.actual = actual
+
+
+def ensure_data_dir() -> Path:
+    """
+    Create DATA_DIR on first use and return it.
+
+    Importing this module touches no files; everything that writes under
+    DATA_DIR calls this first. Reads of a missing directory simply find
+    nothing.
+    """
+    data_dir = DATA_DIR
+    if data_dir not in _created_dirs:
+        data_dir.mkdir(parents=True, exist_ok=True)
+        _created_dirs.add(data_dir)
+    return data_dir
 
 
 def _file_path(student_id: int) -> Path:
     return DATA_DIR / f"student_{student_id}.json"
 
 
+@contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    """Hold ``path``'s FileLock, recording the time spent waiting for it."""
+    ensure_data_dir()
+    lock = FileLock(str(path) + ".lock")
+    with metrics.span("lock.wait"):
+        lock.acquire()
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+def atomic_write_bytes(path: Path, payload: bytes) -> None:
+    """
+    Write ``payload`` to ``path`` so that readers only ever see the old or the new file.
+
+    The payload goes to a temp file in the same directory, is fsynced and then
+    renamed over the target with ``os.replace``; the directory is fsynced
+    afterwards so the rename itself survives a crash. Readers can therefore
+    open the target without taking a lock. Concurrent writers must still hold
+    the target's FileLock (or otherwise be the only writer) so that they don't
+    race each other.
+    """
+    # Gizli önek: "student_*.json" taramasına geçici dosyalar takılmasın
+    fd, tmp_name = tempfile.mkstemp(
+        prefix=f".{path.name}.", suffix=".tmp", dir=path.parent
+    )
+    # Diske yazma: yazma, fsync, yeniden adlandırma ve dizin fsync'i
+    write_start = time.perf_counter()
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+    _fsync_dir(path.parent)
+    metrics.observe_span("storage.write", time.perf_counter() - write_start)
+
+
+def _atomic_write_json(path: Path, data: Any) -> None:
+    with metrics.span("json.dump"):
+        payload = json.dumps(data, indent=2).encode()
+    atomic_write_bytes(path, payload)
+
+
+def _fsync_dir(directory: Path) -> None:
+    # Yeniden adlandırmanın kalıcı olması için dizin girdisini de diske yaz
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _read_json(path: Path) -> Optional[Any]:
+    # Kilitsiz okuma: dosya her zaman atomik olarak değiştirildiği için
+    # yarım yazılmış bir içerik görmek mümkün değil
+    try:
+        with metrics.span("storage.read"), path.open() as f:
+            text = f.read()
+    except FileNotFoundError:
+        return None
+    with metrics.span("json.parse"):
+        return json.loads(text)
+
+
 def load_student(student_id: int) -> Optional[Student]:
-    fp = _file_path(student_id)
-    if not fp.exists():
+    data = _read_json(_file_path(student_id))
+    if data is None:
         return None
-    with fp.open() as f:
-        data = json.load(f)
         
-    # Convert assignment dict to Assignment objects
-    if "assignments" in data:
-        for i, assignment in enumerate(data["assignments"]):
-            if isinstance(assignment, dict):
-                data["assignments"][i] = Assignment.model_validate(assignment)
-    
-    return Student.model_validate(data)
+    with metrics.span("student.validate"):
+        # Convert assignment dict to Assignment objects
+        if "assignments" in data:
+            for i, assignment in enumerate(data["assignments"]):
+                if isinstance(assignment, dict):
+                    data["assignments"][i] = Assignment.model_validate(assignment)
+        
+        return Student.model_validate(data)
+
 
+def save_student(student: Student, expected_version: Optional[int] = None) -> None:
+    """
+    Persist a student and bump its version.
 
-def save_student(student: Student) -> None:
+    When ``expected_version`` is given the write is a compare-and-swap: it only
+    succeeds if the stored version still equals it, otherwise
+    VersionConflictError is raised and nothing is written. The new version is
+    set on ``student`` in place.
+    """
     fp = _file_path(student.id)
-    lock = FileLock(str(fp) + ".lock")
-    with lock, fp.open("w") as f:
-        json.dump(student.model_dump(mode="json"), f, indent=2)
+    with _locked(fp):
+        current = _read_json(fp)
+        current_version = current.get("version", 0) if current else 0
+        if expected_version is not None and expected_version != current_version:
+            raise VersionConflictError(student.id, expected_version, current_version)
+        student.version = current_version + 1
+        with metrics.span("student.dump"):
+            data = student.model_dump(mode="json")
+        conn = index_connection()
+        # Önce kalıcı bir kirli işaret: dosya yazılıp dizin işlemi kaydedilmeden
+        # süreç ölürse gece işi öğrenciyi dosyadan yeniden puanlar ve dizinler
+        _mark_dirty(conn, student.id, current_version)
+        _atomic_write_json(fp, data)
+        # Dizin işlemi dosya yazıldıktan sonra açılır: veritabanının tek yazma
+        # kilidi fsync'ler boyunca tutulmaz, diğer kayıtlar beklemez
+        try:
+            _update_indexes(conn, student)
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+
+def index_connection() -> sqlite3.Connection:
+    """Connection to the derived index database stored in DATA_DIR."""
+    return index_db.connect(ensure_data_dir())
+
+
+def _mark_dirty(conn: sqlite3.Connection, student_id: int, version: int) -> None:
+    # Var olan işaret korunur: daha eski bir sürümü gösterir ve aynı işlemle kalkar
+    with metrics.span("index.update"), conn:
+        conn.execute(
+            "INSERT INTO dirty_students (student_id, version) VALUES (?, ?) "
+            "ON CONFLICT(student_id) DO NOTHING",
+            (student_id, version),
+        )
+
+
+def _update_indexes(conn: sqlite3.Connection, student: Student) -> None:
+    """Index rows for ``student`` inside the caller's open transaction."""
+    with metrics.span("index.update"):
+        conn.execute(
+            "INSERT INTO dirty_students (student_id, version) VALUES (?, ?) "
+            "ON CONFLICT(student_id) DO UPDATE SET version = excluded.version",
+            (student.id, student.version),
+        )
+        deadline_index.index_student(conn, student)
+        enrollment_index.index_student(conn, student)
+        name_changes.index_student(conn, student)
+
+
+def dirty_students() -> Dict[int, int]:
+    """Students saved since their risk was last cached, as id -> saved version."""
+    rows = index_connection().execute("SELECT student_id, version FROM dirty_students")
+    return dict(rows.fetchall())
+
+
+def clear_dirty_students(processed: Dict[int, int]) -> None:
+    """
+    Drop dirty marks for students processed at the given versions.
+
+    A mark for a newer version (saved while the caller was working) is kept,
+    so that change is picked up on the next run.
+    """
+    conn = index_connection()
+    with conn:
+        conn.executemany(
+            "DELETE FROM dirty_students WHERE student_id = ? AND version <= ?",
+            processed.items(),
+        )
 
 
 def next_student_id() -> int:
     # ID üretmek için basit artan sayaç dosyası
-    seq = DATA_DIR / "id_seq.txt"
+    seq = ensure_data_dir() / "id_seq.txt"
     seq.touch(exist_ok=True)
-    lock = FileLock(str(seq) + ".lock")
-    with lock:
+    with _locked(seq):
         val = int(seq.read_text() or "0") + 1
         seq.write_text(str(val))
     return val
 
 
+def student_ids() -> List[int]:
+    """IDs of all stored students in ascending order, from the file names alone."""
+    ids = []
+    for fp in DATA_DIR.glob("student_*.json"):
+        try:
+            ids.append(int(fp.stem[len("student_"):]))
+        except ValueError:
+            continue
+    ids.sort()
+    return ids
+
+
+@profiling.profiled("iter_all_students")
 def iter_all_students() -> Iterator[Student]:
     for fp in DATA_DIR.glob("student_*.json"):
-        with fp.open() as f:
-            yield Student.model_validate(json.load(f))
+        data = _read_json(fp)
+        if data is None:
+            # Tarama sırasında silinen dosya
+            continue
+        with metrics.span("student.validate"):
+            student = Student.model_validate(data)
+        yield student
+
 
+def save_course_catalog(courses: list) -> Tuple[List[Dict[str, Any]], Optional[Set[int]]]:
+    """
+    Validate and store the course catalog.
 
-def save_course_catalog(courses: list) -> None:
+    Raises CatalogValidationError (a ValueError) listing every schema
+    error, duplicate code, unknown prerequisite and prerequisite cycle, in
+    which case nothing is written. The catalog is stored in topological
+    order (prerequisites first), so everything that reads it builds graphs
+    in an order where each course's prerequisites are already known.
+
+    Returns the stored entries and the students whose cached risk the
+    change invalidated (see _carry_over_scores), or None for those when
+    they could not be narrowed down and every score is stale.
+    """
+    ordered = validate_catalog(courses)
     catalog_path = DATA_DIR / "course_catalog.json"
-    lock = FileLock(str(catalog_path) + ".lock")
-    with lock, catalog_path.open("w") as f:
-        json.dump(courses, f, indent=2)
+    with _locked(catalog_path):
+        old_token = scoring_token()
+        previous = load_course_catalog()
+        _atomic_write_json(catalog_path, ordered)
+        # Sayaç dosyadan sonra artar: yeni belirteç hiçbir zaman eski içerikle eşleşmez
+        _bump_generation(_CATALOG_GENERATION)
+        affected = _carry_over_scores(previous, ordered, old_token, scoring_token())
+    return ordered, affected
+
+
+def _prereq_map(courses: list) -> Dict[str, List[str]]:
+    return {course["code"]: course.get("prereq", []) for course in courses if course.get("code")}
+
+
+def _carry_over_scores(
+    previous: list,
+    current: list,
+    old_token: str,
+    new_token: str
+) -> Optional[Set[int]]:
+    """
+    Keep cached risk scores valid across a catalog change where possible.
+
+    The catalog only enters a score through the transitive prerequisites of
+    the student's current courses. Students currently taking a course whose
+    closure changed are marked dirty; every other score computed with
+    ``old_token`` is moved to ``new_token`` in the same transaction, so the
+    nightly job stays incremental instead of rescoring everyone. Returns the
+    students marked dirty, or None (leaving the scores stale, which makes the
+    next nightly run a full rescan) when the enrollment index is not built
+    or the previous catalog had a cycle.
+    """
+    changed = closure_changes(_prereq_map(previous), _prereq_map(current))
+    conn = index_connection()
+    if changed is None or not enrollment_index.is_built(conn):
+        return None
+    affected = enrollment_index.students_in(conn, changed, (enrollment_index.CURRENT,))
+    with conn:
+        # Sürüm 0 işareti öğrencinin bir sonraki işlenişinde kalkar; var olan işaret korunur
+        conn.executemany(
+            "INSERT INTO dirty_students (student_id, version) VALUES (?, 0) "
+            "ON CONFLICT(student_id) DO NOTHING",
+            ((student_id,) for student_id in affected),
+        )
+        conn.execute(
+            "UPDATE risk_scores SET scoring_token = ? WHERE scoring_token = ?",
+            (new_token, old_token),
+        )
+    return affected
+
+
+def _bump_generation(key: str) -> None:
+    """Advance the save counter behind a file token; called after the file is written."""
+    conn = index_connection()
+    with conn:
+        conn.execute(
+            "INSERT INTO index_meta (key, value) VALUES (?, '1') "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1",
+            (key,),
+        )
+
+
+def _file_token(path: Path, generation_key: str) -> str:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return "0"
+    # mtime ve boyut tek başına yetmez: aynı saat adımında aynı boyutta iki kayıt
+    # (ya da kaba mtime çözünürlüklü dosya sistemleri) aynı belirteci üretir
+    generation = index_db.get_meta(index_connection(), generation_key) or "0"
+    return f"{generation}:{st.st_mtime_ns:x}-{st.st_size:x}"
+
+
+def course_catalog_token() -> str:
+    """
+    Cheap identifier of the stored catalog contents.
+
+    Combines the file's mtime and size (which catch edits made by hand) with
+    a counter in the shared index database that every save_course_catalog
+    advances, so two saves never share a token. Callers use this to key
+    caches and ETags without parsing the catalog.
+    """
+    return _file_token(DATA_DIR / "course_catalog.json", _CATALOG_GENERATION)
+
+
+def risk_model_token() -> str:
+    """Cheap identifier of the stored risk model config ("0" means the defaults)."""
+    return _file_token(DATA_DIR / RISK_MODEL_FILE, _RISK_MODEL_GENERATION)
+
+
+def scoring_token() -> str:
+    """
+    Identifier of everything besides the student record that risk scores
+    depend on: the course catalog and the risk model config.
+    """
+    return f"{course_catalog_token()}.{risk_model_token()}"
+
+
+def load_risk_model() -> CompiledRiskModel:
+    """
+    The compiled risk model from DATA_DIR/risk_model.json (defaults if missing).
+
+    The file is re-read only when its token changes, so edits take effect
+    without a restart. If an edited file is invalid the last valid model is
+    kept and the error logged; with no valid model yet the error is raised.
+    """
+    global _risk_model_cache
+    token = risk_model_token()
+    cached = _risk_model_cache
+    if cached is not None and cached.token == token:
+        return cached
+    try:
+        data = _read_json(DATA_DIR / RISK_MODEL_FILE) if token != "0" else None
+        model = compile_config(data, token)
+    except ValueError as e:
+        if cached is None:
+            raise
+        logger.error(f"Invalid risk model config, keeping the previous one: {e}")
+        return cached
+    _risk_model_cache = model
+    return model
+
+
+def save_risk_model(config: Dict[str, Any]) -> CompiledRiskModel:
+    """Validate ``config`` and store it; raises ValueError if it is invalid."""
+    normalized = compile_config(config).to_dict()
+    path = DATA_DIR / RISK_MODEL_FILE
+    with _locked(path):
+        _atomic_write_json(path, normalized)
+        _bump_generation(_RISK_MODEL_GENERATION)
+    return load_risk_model()
 
 
 def load_course_catalog() -> list:
     catalog_path = DATA_DIR / "course_catalog.json"
-    if not catalog_path.exists():
-        return []
-    with catalog_path.open() as f:
-        return json.load(f) 
\ No newline at end of file
+    courses = _read_json(catalog_path)
+    return courses if courses is not None else []
+
+
+def course_catalog_index() -> Dict[str, dict]:
+    """
+    Map of course code to catalog entry, rebuilt only when the catalog changes.
+
+    The returned dict is shared between callers and must not be mutated.
+    """
+    global _catalog_index_cache
+    token = course_catalog_token()
+    cached = _catalog_index_cache
+    if cached is not None and cached[0] == token:
+        return cached[1]
+    index = {
+        course["code"]: course for course in load_course_catalog() if course.get("code")
+    }
+    _catalog_index_cache = (token, index)
+    return index
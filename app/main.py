@@ -1,12 +1,15 @@
+import asyncio
 import logging
-from fastapi import FastAPI, Depends
-from fastapi.responses import HTMLResponse
+import time
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, Depends, Request
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-import os
 from dotenv import load_dotenv
 
-from app.api.routes import router as api_router
-from app.services.scheduler import start_scheduler
+from app import metrics, profiling
+from app.api.routes import get_risk_engine, load_student_name_index, router as api_router
+from app.services.scheduler import lead_scheduler, scheduler_enabled
 from app.infrastructure import storage
 
 # .env dosyasından çevre değişkenlerini yükle
@@ -19,11 +22,85 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+API_PREFIX = "/api"
+
+
+async def _warm_up() -> None:
+    """
+    Fill the caches that the first requests would otherwise pay for.
+
+    Runs in the background while the server already accepts connections;
+    the steps are independent and run in parallel in the default executor.
+    """
+    start = time.perf_counter()
+    steps = {
+        "index database": storage.index_connection,
+        "course catalog": storage.course_catalog_index,
+        # networkx'i yükler; isteklerin paylaştığı risk motorunu ve ön koşul grafiğini kurar
+        "prerequisite graph": get_risk_engine,
+        "student name index": load_student_name_index,
+    }
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(
+        *(loop.run_in_executor(None, step) for step in steps.values()),
+        return_exceptions=True,
+    )
+    for name, result in zip(steps, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Warmup step '{name}' failed: {result}")
+    logger.info(f"Warmup finished in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Uygulama başlangıcı ve kapanışı."""
+    start = time.perf_counter()
+    logger.info("Starting up Course Risk API")
+    
+    # Veri dizininin varlığını kontrol et, yoksa oluştur
+    data_dir = storage.ensure_data_dir()
+    
+    # Risk modeli yapılandırmasını doğrula; geçersizse uygulama başlamaz
+    risk_model = storage.load_risk_model()
+    logger.info(f"Risk model loaded (token {risk_model.token})")
+    
+    # kill -USR2 <pid> ile bu sürecin sonraki istekleri profillenir
+    profiling.install_signal_handler()
+    
+    # Örnek ders kataloğunu oluştur (eğer yoksa)
+    if not (data_dir / "course_catalog.json").exists():
+        _create_sample_course_catalog()
+    
+    # Zamanlayıcı (gece risk hesaplamaları) süreçlerden yalnızca liderde çalışır
+    leadership = None
+    if scheduler_enabled():
+        leadership = asyncio.create_task(lead_scheduler(app))
+    else:
+        logger.info("Scheduler disabled in this process (SCHEDULER_ENABLED)")
+    
+    # Önbellek ısınması arka planda; sunucu bağlantı kabul etmeye hemen başlar
+    warmup = asyncio.create_task(_warm_up())
+    logger.info(f"Application startup complete in {(time.perf_counter() - start) * 1000:.1f} ms")
+    
+    try:
+        yield
+    finally:
+        logger.info("Shutting down Course Risk API")
+        warmup.cancel()
+        
+        # Zamanlayıcıyı kapat ve liderliği bırak
+        if leadership is not None:
+            leadership.cancel()
+            with suppress(asyncio.CancelledError):
+                await leadership
+
+
 # FastAPI uygulamasını oluştur
 app = FastAPI(
     title="Course Risk API",
     description="API for tracking student course risks",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware ekle - farklı kaynaklardan gelen isteklere izin ver
@@ -36,7 +113,47 @@ app.add_middleware(
 )
 
 # API rotalarını dahil et
-app.include_router(api_router, prefix="/api")
+app.include_router(api_router, prefix=API_PREFIX)
+
+
+def _route_template(request: Request) -> str:
+    """Eşleşen rotanın şablonu (/api/students/{student_id}); ham yol etiket olarak kullanılmaz."""
+    path = getattr(request.scope.get("route"), "path", None)
+    if path is None:
+        return "unmatched"
+    # Bazı FastAPI sürümlerinde dahil edilen yönlendiricinin rotaları ön eki içermez
+    if request.url.path.startswith(API_PREFIX + "/") and not path.startswith(API_PREFIX + "/"):
+        path = API_PREFIX + path
+    return path
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Rota şablonu başına gecikmeyi kaydet ve yapılandırılmış erişim logu yaz."""
+    token = metrics.start_request()
+    sampled = profiling.begin_request()
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        if sampled:
+            profiling.end_request()
+        metrics.end_request(
+            token,
+            request.method,
+            _route_template(request),
+            status_code,
+            time.perf_counter() - start,
+        )
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    """Prometheus metin biçiminde süreç metrikleri."""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -97,36 +214,6 @@ async def root():
     """
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Uygulama başlangıcında çalışan fonksiyon."""
-    logger.info("Starting up Course Risk API")
-    
-    # Veri dizininin varlığını kontrol et, yoksa oluştur
-    data_dir = os.getenv("DATA_DIR", "./data")
-    os.makedirs(data_dir, exist_ok=True)
-    
-    # Zamanlayıcıyı başlat (gece risk hesaplamaları için)
-    start_scheduler(app)
-    
-    # Örnek ders kataloğunu oluştur (eğer yoksa)
-    if not os.path.exists(os.path.join(data_dir, "course_catalog.json")):
-        _create_sample_course_catalog()
-    
-    logger.info("Application startup complete")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Uygulama kapatılırken kaynakları temizle."""
-    logger.info("Shutting down Course Risk API")
-    
-    # Zamanlayıcıyı kapat (eğer varsa)
-    if hasattr(app.state, "scheduler"):
-        app.state.scheduler.shutdown()
-        logger.info("Scheduler shut down")
-
-
 def _create_sample_course_catalog():
     """Test için örnek ders kataloğu oluştur."""
     sample_courses = [
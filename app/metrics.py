@@ -0,0 +1,152 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Two histogram families are kept:
+
+    http_request_duration_seconds{method, route, status}
+    derstakip_span_duration_seconds{span}
+
+Spans time internal steps (storage reads and writes, JSON parsing and
+serialization, FileLock waits, SQLite index updates, each risk component).
+While a request is being served its span totals are also collected in a
+context variable so that the access log line can show where the time went.
+Values are per process; with several workers each one exposes its own.
+"""
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+HTTP_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SPAN_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.1, 1.0,
+)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+access_logger = logging.getLogger("app.access")
+
+# İstek süresince adım adına toplanan süreler (istek dışında None)
+_request_spans: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_spans", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram; observe() is thread-safe."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self.counts), self.total, self.count
+
+
+class _Family:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series: Dict[Tuple[str, ...], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> Histogram:
+        histogram = self.series.get(values)
+        if histogram is None:
+            with self._lock:
+                histogram = self.series.setdefault(values, Histogram(self.buckets))
+        return histogram
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        for values, histogram in sorted(self.series.items()):
+            labels = ",".join(
+                f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, values)
+            )
+            counts, total, count = histogram.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = bound if bound == "+Inf" else repr(float(bound))
+                yield f'{self.name}_bucket{{{labels},le="{le}"}} {cumulative}'
+            yield f"{self.name}_sum{{{labels}}} {total!r}"
+            yield f"{self.name}_count{{{labels}}} {count}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+http_requests = _Family(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route", "status"),
+    HTTP_BUCKETS,
+)
+spans = _Family(
+    "derstakip_span_duration_seconds",
+    "Duration of internal steps (storage, JSON, locks, risk components).",
+    ("span",),
+    SPAN_BUCKETS,
+)
+
+
+def observe_span(name: str, seconds: float) -> None:
+    """Record a finished span."""
+    spans.labels(name).observe(seconds)
+    collected = _request_spans.get()
+    if collected is not None:
+        collected[name] = collected.get(name, 0.0) + seconds
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time the enclosed block as span ``name``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_span(name, time.perf_counter() - start)
+
+
+def start_request() -> object:
+    """Begin collecting spans for the current request; returns a token for end_request."""
+    return _request_spans.set({})
+
+
+def end_request(token, method: str, route: str, status: int, seconds: float) -> None:
+    """Record the request latency and write one structured access log line."""
+    collected = _request_spans.get() or {}
+    _request_spans.reset(token)
+    http_requests.labels(method, route, str(status)).observe(seconds)
+    if access_logger.isEnabledFor(logging.INFO):
+        access_logger.info(json.dumps({
+            "event": "request",
+            "method": method,
+            "route": route,
+            "status": status,
+            "duration_ms": round(seconds * 1000, 3),
+            "spans_ms": {name: round(total * 1000, 3) for name, total in sorted(collected.items())},
+        }, ensure_ascii=False))
+
+
+def render() -> str:
+    """All metrics in the Prometheus text format."""
+    lines = [*http_requests.render(), *spans.render()]
+    return "\n".join(lines) + "\n"
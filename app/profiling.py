@@ -0,0 +1,342 @@
+"""
+On-demand profiling of a running worker.
+
+Nothing is profiled until a target is armed, either through the admin API
+(POST /api/admin/profiling) or, for the requests target, by sending
+SIGUSR2 to the worker process. Each armed target captures the next
+``count`` runs and is then disarmed again. While nothing is armed a
+profiled function costs a single dict check per call.
+
+Targets:
+
+    requests            sampling profile of the next N HTTP requests, taken
+                        from every thread of the process, written as folded
+                        stacks (flamegraph.pl, speedscope, inferno)
+    nightly_job         cProfile of the next nightly job run(s)
+    iter_all_students   cProfile of the next full student scan(s)
+    calculate_risk      cProfile of the next GET /students/{id}/risk call(s)
+
+Only one cProfile capture runs per process at a time; a run that starts
+while another thread is being profiled is not captured and does not use up
+the armed count. cProfile results are written as .pstats files (python -m
+pstats, snakeviz, flameprof). All files go to DATA_DIR/profiles; only the newest
+MAX_PROFILE_FILES are kept.
+"""
+import cProfile
+import functools
+import inspect
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+REQUESTS = "requests"
+TARGETS = (REQUESTS, "nightly_job", "iter_all_students", "calculate_risk")
+MAX_COUNT = 100
+MAX_PROFILE_FILES = 50
+# SIGUSR2 ile profillenecek istek sayısı
+SIGNAL_REQUEST_COUNT = 20
+SAMPLE_INTERVAL = 0.005
+
+logger = logging.getLogger(__name__)
+
+# Hedef -> kalan yakalama sayısı (boşken profilleme tamamen kapalıdır)
+_armed: Dict[str, int] = {}
+# Sinyal işleyicisi aynı iş parçacığında kilit tutulurken çalışabilir
+_lock = threading.RLock()
+_local = threading.local()
+_recent: Deque[Dict[str, Any]] = deque(maxlen=MAX_PROFILE_FILES)
+_sequence = 0
+# Süreçte aynı anda tek bir cProfile yakalaması olabilir (Python 3.12'den
+# itibaren ikinci bir profiler.enable() ValueError verir)
+_cprofile_active = False
+
+# Örnekleme profili: çalışan örnekleyici ve profillenmekte olan istek sayısı
+_sampler: Optional["_StackSampler"] = None
+_sampled_in_flight = 0
+
+# Yığının en üstünde bu fonksiyonlar varsa iş parçacığı boşta bekliyordur
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+}
+
+
+def arm(target: str, count: int = 1) -> Dict[str, Any]:
+    """Profile the next ``count`` runs of ``target``."""
+    if target not in TARGETS:
+        raise ValueError(f"Unknown profiling target {target!r}; expected one of: {', '.join(TARGETS)}")
+    if isinstance(count, bool) or not isinstance(count, int) or not 1 <= count <= MAX_COUNT:
+        raise ValueError(f"count must be an integer between 1 and {MAX_COUNT}")
+    with _lock:
+        _armed[target] = count
+    logger.info(f"Profiling armed for the next {count} run(s) of {target}")
+    return status()
+
+
+def disarm(target: Optional[str] = None) -> Dict[str, Any]:
+    """Cancel pending captures for ``target`` (all targets when None)."""
+    with _lock:
+        if target is None:
+            _armed.clear()
+        else:
+            _armed.pop(target, None)
+    return status()
+
+
+def status() -> Dict[str, Any]:
+    with _lock:
+        return {
+            "armed": dict(_armed),
+            "sampling_requests": _sampled_in_flight,
+            "recent": list(_recent),
+        }
+
+
+def _claim(target: str) -> bool:
+    # Çağıran _lock'u tutmalıdır
+    remaining = _armed.get(target, 0)
+    if remaining <= 0:
+        return False
+    if remaining == 1:
+        del _armed[target]
+    else:
+        _armed[target] = remaining - 1
+    return True
+
+
+def _output_path(target: str, suffix: str) -> Path:
+    global _sequence
+    # Profilleme storage'ı da sardığı için içe aktarma çağrı anında yapılır
+    from app.infrastructure import storage
+
+    directory = storage.DATA_DIR / "profiles"
+    directory.mkdir(parents=True, exist_ok=True)
+    with _lock:
+        _sequence += 1
+        sequence = _sequence
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    return directory / f"{target}-{stamp}-{os.getpid()}-{sequence}{suffix}"
+
+
+def _record(target: str, path: Path, seconds: float) -> None:
+    entry = {
+        "target": target,
+        "path": str(path),
+        "seconds": round(seconds, 6),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    with _lock:
+        _recent.append(entry)
+    _prune(path.parent)
+    logger.info(f"Wrote {target} profile to {path} ({seconds:.3f}s profiled)")
+
+
+def _prune(directory: Path) -> None:
+    files = sorted(
+        (p for p in directory.iterdir() if p.suffix in (".pstats", ".folded")),
+        key=lambda p: p.stat().st_mtime_ns,
+    )
+    for old in files[:-MAX_PROFILE_FILES]:
+        try:
+            old.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# --- cProfile hedefleri ---
+
+def _start(target: str) -> Optional[Tuple[cProfile.Profile, float]]:
+    global _cprofile_active
+    # İç içe hedefler (gece işi içindeki tarama gibi) dış profile dahildir
+    if getattr(_local, "profiling", False):
+        return None
+    with _lock:
+        # Başka bir iş parçacığı profillenirken bu çalışma atlanır; hedef kurulu kalır
+        if _cprofile_active or not _claim(target):
+            return None
+        _cprofile_active = True
+    _local.profiling = True
+    return cProfile.Profile(), time.perf_counter()
+
+
+def _enable(target: str, profiler: cProfile.Profile) -> None:
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # Süreçte başka bir profil aracı etkin; çağrı profilsiz sürer
+        logger.warning(f"Could not profile {target}: {e}")
+
+
+def _finish(target: str, profiler: cProfile.Profile, started: float) -> None:
+    global _cprofile_active
+    _local.profiling = False
+    with _lock:
+        _cprofile_active = False
+    elapsed = time.perf_counter() - started
+    try:
+        path = _output_path(target, ".pstats")
+        profiler.dump_stats(path)
+        _record(target, path, elapsed)
+    except OSError as e:
+        logger.error(f"Could not write {target} profile: {e}")
+
+
+def _profile_iterator(target: str, iterator):
+    # Yakalama ilk öğe istendiğinde başlar; hiç tüketilmeyen üreteç kilidi tutmaz
+    started = _start(target)
+    if started is None:
+        yield from iterator
+        return
+    profiler = started[0]
+    # Yalnızca üreticinin kendi işi ölçülür, tüketicinin öğe başına işi değil
+    try:
+        while True:
+            _enable(target, profiler)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                profiler.disable()
+            yield item
+    finally:
+        iterator.close()
+        _finish(target, *started)
+
+
+def profiled(target: str) -> Callable[[Callable], Callable]:
+    """
+    Decorator making ``target`` profilable.
+
+    Works for plain functions, coroutine functions (the profile covers the
+    event loop thread while the call is running) and functions returning an
+    iterator (the profile covers producing the items and is written when the
+    iterator is exhausted or closed).
+    """
+    if target not in TARGETS:
+        raise ValueError(f"Unknown profiling target {target!r}")
+
+    def decorate(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                started = _start(target) if _armed else None
+                if started is None:
+                    return await fn(*args, **kwargs)
+                try:
+                    _enable(target, started[0])
+                    return await fn(*args, **kwargs)
+                finally:
+                    started[0].disable()
+                    _finish(target, *started)
+            return async_wrapper
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def iterator_wrapper(*args, **kwargs):
+                if not _armed:
+                    return fn(*args, **kwargs)
+                return _profile_iterator(target, fn(*args, **kwargs))
+            return iterator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = _start(target) if _armed else None
+            if started is None:
+                return fn(*args, **kwargs)
+            try:
+                _enable(target, started[0])
+                return fn(*args, **kwargs)
+            finally:
+                started[0].disable()
+                _finish(target, *started)
+        return wrapper
+
+    return decorate
+
+
+# --- İstek örnekleme profili ---
+
+class _StackSampler(threading.Thread):
+    """Samples the Python stacks of all other threads every SAMPLE_INTERVAL seconds."""
+
+    def __init__(self):
+        super().__init__(name="profiling-sampler", daemon=True)
+        self.stacks: Counter = Counter()
+        self.requests = 0
+        self.started = time.perf_counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(SAMPLE_INTERVAL):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self.ident:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+                    continue
+                frames: List[str] = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(frames))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def begin_request() -> bool:
+    """Called by the HTTP middleware; True if this request is being sampled."""
+    global _sampler, _sampled_in_flight
+    if REQUESTS not in _armed:
+        return False
+    with _lock:
+        if not _claim(REQUESTS):
+            return False
+        if _sampler is None:
+            _sampler = _StackSampler()
+            _sampler.start()
+        _sampler.requests += 1
+        _sampled_in_flight += 1
+    return True
+
+
+def end_request() -> None:
+    """Pair of a begin_request() that returned True; writes the profile after the last request."""
+    global _sampler, _sampled_in_flight
+    with _lock:
+        _sampled_in_flight -= 1
+        if _sampled_in_flight or REQUESTS in _armed or _sampler is None:
+            return
+        sampler, _sampler = _sampler, None
+    sampler.stop()
+    try:
+        path = _output_path(REQUESTS, ".folded")
+        path.write_text("".join(f"{stack} {count}\n" for stack, count in sampler.stacks.items()))
+        _record(REQUESTS, path, time.perf_counter() - sampler.started)
+    except OSError as e:
+        logger.error(f"Could not write request profile: {e}")
+
+
+def install_signal_handler() -> bool:
+    """
+    Arm the requests target with SIGUSR2 (kill -USR2 <pid>).
+
+    Returns False where that is not possible: platforms without SIGUSR2 or
+    when not called from the main thread.
+    """
+    if not hasattr(signal, "SIGUSR2") or threading.current_thread() is not threading.main_thread():
+        return False
+    signal.signal(signal.SIGUSR2, lambda signum, frame: arm(REQUESTS, SIGNAL_REQUEST_COUNT))
+    return True
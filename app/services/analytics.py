@@ -0,0 +1,201 @@
+"""
+Population-level risk aggregates and rankings.
+
+Scores are folded one student at a time into per-group RiskHistogram
+sketches and component sums, so memory depends on the number of groups,
+not on the number of students. When the risk cache is current for today
+the pass reads cached rows and rescores only students saved since the
+last nightly run; otherwise every student file is scored.
+"""
+import heapq
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.domain.ds.risk_histogram import RiskHistogram
+from app.domain.risk import RiskEngine
+from app.domain.risk_model import CompiledRiskModel
+from app.infrastructure import risk_cache, storage
+
+GROUP_BY = ("course", "term", "gpa_band")
+QUANTILES = (0.5, 0.75, 0.9, 0.95, 0.99)
+
+
+def _group_keys(
+    summary: Dict[str, Any],
+    group_by: Optional[str],
+    model: CompiledRiskModel
+) -> List[str]:
+    if group_by is None:
+        return ["all"]
+    if group_by == "course":
+        return summary.get("courses", [])
+    if group_by == "term":
+        return summary.get("terms", [])
+    if group_by == "gpa_band":
+        return [model.gpa_band(summary.get("gpa", 0.0))]
+    raise ValueError(f"Unknown group_by: {group_by}")
+
+
+class RiskAggregate:
+    """Histogram of overall scores plus component sums for one group."""
+    
+    def __init__(self):
+        self.histogram = RiskHistogram()
+        self.component_totals = dict.fromkeys(RiskEngine.WEIGHTS, 0.0)
+    
+    def add(self, score: float, components: Dict[str, float]) -> None:
+        self.histogram.add(score)
+        for name in self.component_totals:
+            self.component_totals[name] += components[name]
+    
+    def merge(self, other: 'RiskAggregate') -> 'RiskAggregate':
+        self.histogram.merge(other.histogram)
+        for name, total in other.component_totals.items():
+            self.component_totals[name] += total
+        return self
+    
+    def to_dict(self, buckets: int) -> Dict[str, Any]:
+        histogram = self.histogram
+        count = histogram.count
+        
+        def rounded(value):
+            return None if value is None else round(value, 4)
+        
+        return {
+            "count": count,
+            "mean": rounded(histogram.mean()),
+            "min": rounded(histogram.min),
+            "max": rounded(histogram.max),
+            "percentiles": {
+                f"p{round(q * 100)}": rounded(histogram.quantile(q)) for q in QUANTILES
+            },
+            "components": {
+                name: rounded(total / count) if count else None
+                for name, total in self.component_totals.items()
+            },
+            "histogram": histogram.buckets(buckets),
+        }
+
+
+def aggregate(
+    entries: Iterable[risk_cache.CachedRisk],
+    group_by: Optional[str] = None
+) -> Dict[str, RiskAggregate]:
+    """
+    Fold scored entries into per-group aggregates.
+
+    A student counts once in every group it belongs to (e.g. every current
+    course); with ``group_by=None`` everyone lands in the single "all" group.
+    """
+    # GPA bantları etkin risk modelinden gelir
+    model = storage.load_risk_model()
+    groups: Dict[str, RiskAggregate] = {}
+    for entry in entries:
+        for key in _group_keys(entry.summary, group_by, model):
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = RiskAggregate()
+            group.add(entry.score, entry.components)
+    return groups
+
+
+def cache_is_current(today: date, scoring_token: str) -> bool:
+    """True when the nightly cache holds today's scores for the current catalog and risk model."""
+    return risk_cache.scoring_tokens() == {scoring_token} and risk_cache.computed_days() == {
+        today.toordinal()
+    }
+
+
+def _cached_entries(engine_factory, today: date, scoring_token: str) -> Iterator[risk_cache.CachedRisk]:
+    dirty = storage.dirty_students()
+    for entry in risk_cache.iter_all():
+        if entry.student_id not in dirty:
+            yield entry
+    if not dirty:
+        return
+    # Son gece çalışmasından sonra kaydedilen öğrenciler dosyadan puanlanır
+    engine = engine_factory()
+    for student_id in dirty:
+        student = storage.load_student(student_id)
+        if student is not None:
+            yield risk_cache.score_student(engine, student, today, scoring_token)
+
+
+def _scanned_entries(engine_factory, today: date, scoring_token: str) -> Iterator[risk_cache.CachedRisk]:
+    engine = engine_factory()
+    for student in storage.iter_all_students():
+        yield risk_cache.score_student(engine, student, today, scoring_token)
+
+
+def current_scores(
+    engine_factory: Callable[[], RiskEngine],
+    today: Optional[date] = None
+) -> Tuple[str, Iterator[risk_cache.CachedRisk]]:
+    """
+    Stream an up-to-date score entry for every student.
+
+    Args:
+        engine_factory: Builds the RiskEngine; only called if some students
+            have to be scored from their files.
+
+    Returns:
+        ("cache" or "scan", lazy iterator of entries in no particular order)
+    """
+    today = today or date.today()
+    scoring_token = storage.scoring_token()
+    if cache_is_current(today, scoring_token):
+        return "cache", _cached_entries(engine_factory, today, scoring_token)
+    return "scan", _scanned_entries(engine_factory, today, scoring_token)
+
+
+def population_risk(
+    engine_factory: Callable[[], RiskEngine],
+    group_by: Optional[str] = None,
+    today: Optional[date] = None
+) -> Tuple[str, Dict[str, RiskAggregate]]:
+    """Aggregate risk over every student; returns (source, aggregates by group key)."""
+    source, entries = current_scores(engine_factory, today)
+    return source, aggregate(entries, group_by)
+
+
+def _rank(entry: risk_cache.CachedRisk) -> Tuple[float, int]:
+    return entry.score, -entry.student_id
+
+
+def top_students(
+    engine_factory: Callable[[], RiskEngine],
+    count: int,
+    offset: int = 0,
+    risk_filter: risk_cache.RiskFilter = risk_cache.RiskFilter(),
+    today: Optional[date] = None
+) -> Tuple[str, List[risk_cache.CachedRisk]]:
+    """
+    The ``count`` highest-risk students matching ``risk_filter`` after
+    skipping ``offset``, riskiest first; ties are broken by the lower
+    student ID.
+
+    With a current cache the page is read from the score index in SQL and
+    only students saved since the nightly run are scored from their files
+    and merged in. Otherwise every student is scored, keeping only
+    ``offset + count`` entries in memory.
+    """
+    today = today or date.today()
+    scoring_token = storage.scoring_token()
+    if not cache_is_current(today, scoring_token):
+        entries = filter(risk_filter.matches, _scanned_entries(engine_factory, today, scoring_token))
+        return "scan", heapq.nlargest(offset + count, entries, key=_rank)[offset:]
+
+    dirty = storage.dirty_students()
+    if not dirty:
+        return "cache", risk_cache.top(count, offset, risk_filter)
+    # Kirli öğrenciler sayfanın herhangi bir yerine düşebilir: önceki sayfalar da alınır
+    cached = risk_cache.top(offset + count, 0, risk_filter, exclude_dirty=True)
+    engine = engine_factory()
+    fresh = []
+    for student_id in dirty:
+        student = storage.load_student(student_id)
+        if student is not None:
+            entry = risk_cache.score_student(engine, student, today, scoring_token)
+            if risk_filter.matches(entry):
+                fresh.append(entry)
+    return "cache", heapq.nlargest(offset + count, [*cached, *fresh], key=_rank)[offset:]
\ No newline at end of file
@@ -1,53 +1,245 @@
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
 from fastapi import FastAPI
+from filelock import FileLock, Timeout
+from bisect import bisect_right
+from datetime import date
+from typing import TYPE_CHECKING, Iterator, List, Optional
+import asyncio
 import logging
+import os
+import sqlite3
 
+from app import profiling
 from app.domain.risk import RiskEngine
-from app.infrastructure import storage
+from app.infrastructure import deadline_index, enrollment_index, job_runs, risk_cache, risk_history, storage
+
+if TYPE_CHECKING:
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 
+# Gece işinin iş kaydı ve kilit adı
+NIGHTLY_JOB = "nightly_risk"
+# Bu kadar öğrencide bir sonuçlar yazılır ve kontrol noktası ilerletilir
+CHECKPOINT_CHUNK = 500
+# İş kilidi için beklenecek süre (saniye); durum isteklerinin kilidi anlık
+# yoklaması o geceki çalışmayı atlatmasın
+JOB_LOCK_WAIT = 5.0
+
+# Bu kilidi tutan tek süreç zamanlanmış işleri çalıştırır
+LEADER_LOCK = "scheduler.leader.lock"
+# Lider olmayan süreçlerin kilidi yeniden deneme aralığı (saniye)
+LEADER_RETRY_SECONDS = 30.0
+
+
+@profiling.profiled("nightly_job")
 def nightly_job():
     """
     Nightly job to check student risk levels.
     Runs at 3:00 AM daily.
+    
+    Only students in the dirty set (fed by storage.save_student and by
+    catalog changes for the students they affect) are loaded and fully
+    rescored. For everyone else only the date-dependent assignment
+    component can change, and only for students with a deadline inside the
+    window that moved since the last rollover of the global deadline index.
+    A full rescan happens when the cache, the deadline index or the
+    enrollment index is empty, the risk model config changed or a catalog
+    change could not be narrowed down to the students it affects.
+    
+    Students are processed in ID order in chunks of CHECKPOINT_CHUNK. Each
+    chunk's scores, deadline rows and dirty marks are committed before the
+    job_runs checkpoint moves past it, so a run that fails or is killed is
+    resumed after its last checkpoint by the next run on the same day with
+    the same scoring token. Only one process runs the job at a time.
     """
     logger.info("Running nightly risk assessment job")
     
-    try:
-        engine = RiskEngine(storage)
-        high_risk_students = []
-        
-        for student in storage.iter_all_students():
-            risk = engine.calculate(student)
-            
-            if risk > 0.75:
-                high_risk_students.append((student.id, student.name, risk))
-                logger.warning(f"⚠️  High risk for student {student.id} ({student.name}): {risk:.2f}")
-        
-        # Log summary
-        if high_risk_students:
-            logger.info(f"Found {len(high_risk_students)} high-risk students")
-        else:
-            logger.info("No high-risk students found")
-            
-    except Exception as e:
-        logger.error(f"Error in nightly risk assessment job: {e}", exc_info=True)
+    with job_runs.exclusive(NIGHTLY_JOB, wait=JOB_LOCK_WAIT) as acquired:
+        if not acquired:
+            logger.info("Nightly risk assessment is already running in another process")
+            return
+        try:
+            _run_nightly_job()
+        except Exception as e:
+            logger.error(f"Error in nightly risk assessment job: {e}", exc_info=True)
+            run = job_runs.load(storage.index_connection(), NIGHTLY_JOB)
+            if run is not None and run.status == job_runs.RUNNING:
+                job_runs.finish(storage.index_connection(), run, error=str(e))
+
+
+def _chunks(ids: List[int], size: int) -> Iterator[List[int]]:
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
 
 
-def start_scheduler(app: FastAPI) -> AsyncIOScheduler:
+def _rescore_chunk(
+    conn: sqlite3.Connection,
+    engine: RiskEngine,
+    chunk: List[int],
+    today: date,
+    scoring_token: str
+) -> int:
+    """Rescore and re-index ``chunk`` and commit the results; returns how many were scored."""
+    dirty = storage.dirty_students()
+    entries = []
+    removed_ids = []
+    processed = {}
+    with conn:
+        for student_id in chunk:
+            student = storage.load_student(student_id)
+            if student is None:
+                # Silinmiş öğrenci
+                removed_ids.append(student_id)
+                if student_id in dirty:
+                    processed[student_id] = dirty[student_id]
+                continue
+            entries.append(risk_cache.score_student(engine, student, today, scoring_token))
+            processed[student_id] = student.version
+            # Yeniden oluşturma ya da önceki yarım kalan çalışma için dizinleri onar
+            deadline_index.index_student(conn, student)
+            enrollment_index.index_student(conn, student)
+    risk_cache.upsert(entries)
+    risk_cache.delete(removed_ids)
+    storage.clear_dirty_students(processed)
+    return len(entries)
+
+
+def _run_nightly_job() -> None:
+    engine = RiskEngine(storage, storage.load_risk_model())
+    today = date.today()
+    conn = storage.index_connection()
+    scoring_token = storage.scoring_token()
+    
+    run = job_runs.load(conn, NIGHTLY_JOB)
+    if run is not None and run.resumable(today, scoring_token):
+        full_rescan = run.mode == job_runs.FULL
+        ids = storage.student_ids() if full_rescan else sorted(storage.dirty_students())
+        # Kontrol noktasına kadar olanlar zaten yazıldı
+        ids = ids[bisect_right(ids, run.last_student):]
+        run = job_runs.resume(conn, run, len(ids))
+        logger.info(
+            f"Resuming nightly job after student {run.last_student} "
+            f"({run.processed}/{run.total} done)"
+        )
+    else:
+        full_rescan = (
+            risk_cache.scoring_tokens() != {scoring_token}
+            or not deadline_index.is_built(conn)
+            or not enrollment_index.is_built(conn)
+        )
+        ids = storage.student_ids() if full_rescan else sorted(storage.dirty_students())
+        if full_rescan:
+            deadline_index.begin_rebuild(conn)
+            enrollment_index.begin_rebuild(conn)
+        run = job_runs.start(
+            conn, NIGHTLY_JOB, today, scoring_token,
+            job_runs.FULL if full_rescan else job_runs.INCREMENTAL, len(ids)
+        )
+    
+    rescored = 0
+    for chunk in _chunks(ids, CHECKPOINT_CHUNK):
+        rescored += _rescore_chunk(conn, engine, chunk, today, scoring_token)
+        job_runs.checkpoint(conn, run, len(chunk), chunk[-1])
+    
+    job_runs.set_phase(conn, run, "refresh")
+    if full_rescan:
+        removed = risk_cache.delete_stale(scoring_token)
+        deadline_index.finish_rebuild(conn)
+        enrollment_index.finish_rebuild(conn)
+        affected = set()
+    else:
+        removed = 0
+        affected = deadline_index.rolled_over_students(
+            conn, today, RiskEngine.DEADLINE_HORIZON_DAYS
+        )
+        if affected is None:
+            affected = set(risk_cache.load_all())
+    
+    # Bugün için puanlananlar (önceki yarım çalışmadakiler dahil) yeniden hesaplanmaz
+    refreshed = [
+        risk_cache.refresh_deadlines(engine, entry, today)
+        for entry in risk_cache.load(affected).values()
+        if entry.computed_on != today.toordinal()
+    ]
+    risk_cache.upsert(refreshed)
+    risk_cache.mark_computed(today)
+    deadline_index.mark_rolled_over(conn, today)
+    logger.info(
+        f"Rescored {rescored} students"
+        f"{' (full rescan)' if full_rescan else ''}, "
+        f"refreshed deadlines for {len(refreshed)}, removed {removed} stale entries"
+    )
+    
+    # Günlük risk geçmişi anlık görüntüsü
+    job_runs.set_phase(conn, run, "history")
+    history_rows = risk_history.write_day(today, (
+        (entry.student_id, entry.score, entry.components)
+        for entry in risk_cache.iter_all()
+    ))
+    logger.info(f"Stored risk history for {history_rows} students")
+    
+    high_risk_students = []
+    for entry in risk_cache.above(engine.model.high_threshold):
+        name = entry.summary.get("name")
+        high_risk_students.append((entry.student_id, name, entry.score))
+        logger.warning(f"⚠️  High risk for student {entry.student_id} ({name}): {entry.score:.2f}")
+    
+    # Log summary
+    if high_risk_students:
+        logger.info(f"Found {len(high_risk_students)} high-risk students")
+    else:
+        logger.info("No high-risk students found")
+    
+    job_runs.finish(conn, run)
+
+
+def rescore_dirty_students() -> int:
+    """
+    Rescore the students marked dirty now instead of at night.
+
+    Run in the background after a catalog change marked the students it
+    affects (see storage.save_course_catalog). Takes the nightly job's lock
+    and does nothing if the nightly job is running, since that run picks
+    the dirty students up itself. Returns how many students were rescored.
+    """
+    with job_runs.exclusive(NIGHTLY_JOB, wait=JOB_LOCK_WAIT) as acquired:
+        if not acquired:
+            logger.info("Nightly risk assessment is running; it will rescore the dirty students")
+            return 0
+        engine = RiskEngine(storage, storage.load_risk_model())
+        today = date.today()
+        conn = storage.index_connection()
+        scoring_token = storage.scoring_token()
+        rescored = 0
+        for chunk in _chunks(sorted(storage.dirty_students()), CHECKPOINT_CHUNK):
+            rescored += _rescore_chunk(conn, engine, chunk, today, scoring_token)
+    logger.info(f"Rescored {rescored} dirty students")
+    return rescored
+
+
+def scheduler_enabled() -> bool:
+    """Whether this process runs scheduled jobs (SCHEDULER_ENABLED, on by default)."""
+    return os.getenv("SCHEDULER_ENABLED", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def start_scheduler(app: FastAPI) -> "AsyncIOScheduler":
     """
     Start the scheduler for background tasks.
     
+    apscheduler is imported here rather than at module level, so worker
+    processes that don't run scheduled jobs never load it.
+    
     Args:
         app: The FastAPI application instance
         
     Returns:
         The scheduler instance
     """
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    from apscheduler.triggers.cron import CronTrigger
+    
     scheduler = AsyncIOScheduler()
     
     # Add nightly job to run at 3:00 AM
@@ -58,6 +250,12 @@ def start_scheduler(app: FastAPI) -> AsyncIOScheduler:
         replace_existing=True
     )
     
+    # Bugün yarım kalan bir çalışma varsa başlangıçta kaldığı yerden sürdür
+    run = job_runs.load(storage.index_connection(), NIGHTLY_JOB)
+    if run is not None and run.resumable(date.today(), storage.scoring_token()):
+        scheduler.add_job(nightly_job, id="nightly_risk_resume", replace_existing=True)
+        logger.info(f"Scheduled resumption of the interrupted nightly job ({run.processed}/{run.total} done)")
+    
     # Store scheduler in app state
     app.state.scheduler = scheduler
     
@@ -65,4 +263,51 @@ def start_scheduler(app: FastAPI) -> AsyncIOScheduler:
     scheduler.start()
     logger.info("Scheduler started with nightly risk assessment job")
     
-    return scheduler 
\ No newline at end of file
+    return scheduler 
+
+
+def _try_acquire_leadership() -> Optional[FileLock]:
+    lock = FileLock(str(storage.ensure_data_dir() / LEADER_LOCK))
+    try:
+        lock.acquire(timeout=0)
+    except Timeout:
+        return None
+    return lock
+
+
+async def lead_scheduler(app: FastAPI) -> None:
+    """
+    Run the scheduler in exactly one process per DATA_DIR.
+    
+    The leader holds a non-blocking FileLock on DATA_DIR/scheduler.leader.lock
+    for as long as it lives. The operating system drops the lock when the
+    process exits or crashes. Every other worker retries every
+    LEADER_RETRY_SECONDS, and the first to get the lock after the leader is
+    gone starts the scheduler. Run this as a background task for the
+    lifetime of the app; cancelling it stops the scheduler and gives up the
+    leadership.
+    """
+    lock = None
+    scheduler = None
+    try:
+        lock = _try_acquire_leadership()
+        if lock is None:
+            logger.info("Another process leads the scheduler; standing by")
+        while lock is None:
+            await asyncio.sleep(LEADER_RETRY_SECONDS)
+            lock = _try_acquire_leadership()
+        logger.info(f"Process {os.getpid()} is now the scheduler leader")
+        scheduler = start_scheduler(app)
+        # Süreç kapanana (görev iptal edilene) kadar liderlik tutulur
+        await asyncio.Event().wait()
+    finally:
+        # Zamanlayıcı kapatılırken bir hata olsa da liderlik mutlaka bırakılır
+        try:
+            if scheduler is not None:
+                scheduler.shutdown(wait=False)
+                if getattr(app.state, "scheduler", None) is scheduler:
+                    del app.state.scheduler
+                logger.info("Scheduler shut down")
+        finally:
+            if lock is not None:
+                lock.release()
@@ -0,0 +1,184 @@
+"""
+What-if risk simulation.
+
+Hypothetical changes are applied to a copy-on-write view of a Student: the
+view is a shallow copy that shares every list and sub-model with the
+stored record until a change needs to modify one, and then only that list
+(and the changed items in it) is replaced. Nothing here writes to storage
+or touches the undo stacks, so a simulation can never leak into the real
+record.
+
+Supported changes (``type`` plus parameters):
+
+    drop_course          code
+    add_course           code, completed=False, grade=None
+    complete_course      code, grade
+    complete_assignments assignment_ids=[...] or count=N (earliest due first)
+    set_gpa              gpa
+    set_absences         count
+"""
+from typing import Any, Callable, Dict, List, Sequence
+
+from app.domain.models import Assignment, CourseEnrollment, Student, Term
+from app.domain.risk import RiskEngine
+
+# Devamsızlık bit alanının uzunluğu
+MAX_ABSENCES = 14
+
+
+class SimulationError(ValueError):
+    """Raised when a hypothetical change cannot be applied to the student."""
+
+
+def student_view(student: Student) -> Student:
+    """Shallow, copy-on-write view of ``student``; the original is never modified."""
+    return student.model_copy()
+
+
+def _replace_assignments(view: Student, assignments: List[Assignment]) -> None:
+    view.assignments = assignments
+    # Heap ve eşleme önbellekleri orijinal listeye aittir; görünüm kendi önbelleğini kurar
+    view._assignments_by_id = None
+    view._assignment_heap = None
+    view._assignment_handles = {}
+
+
+def _code(change: Dict[str, Any]) -> str:
+    code = change.get("code")
+    if not isinstance(code, str) or not code:
+        raise SimulationError(f"'{change.get('type')}' requires a course code")
+    return code.upper()
+
+
+def _drop_course(view: Student, change: Dict[str, Any]) -> None:
+    code = _code(change)
+    found = False
+    terms = []
+    for term in view.terms:
+        kept = [c for c in term.courses if c.completed or c.code.upper() != code]
+        if len(kept) != len(term.courses):
+            found = True
+            term = term.model_copy(update={"courses": kept})
+        terms.append(term)
+    if not found:
+        raise SimulationError(f"Student is not currently taking {code}")
+    view.terms = terms
+
+
+def _add_course(view: Student, change: Dict[str, Any]) -> None:
+    code = _code(change)
+    enrollment = CourseEnrollment(
+        code=code,
+        completed=bool(change.get("completed", False)),
+        grade=change.get("grade"),
+    )
+    year, semester = Term.current_key()
+    terms = list(view.terms)
+    for i, term in enumerate(terms):
+        if (term.year, term.semester) == (year, semester):
+            courses = [c for c in term.courses if c.code.upper() != code]
+            terms[i] = term.model_copy(update={"courses": [*courses, enrollment]})
+            break
+    else:
+        terms.append(Term(year=year, semester=semester, courses=[enrollment]))
+    view.terms = terms
+
+
+def _complete_course(view: Student, change: Dict[str, Any]) -> None:
+    code = _code(change)
+    grade = change.get("grade")
+    if not isinstance(grade, str) or not grade:
+        raise SimulationError("'complete_course' requires a grade")
+    found = False
+    terms = []
+    for term in view.terms:
+        if any(not c.completed and c.code.upper() == code for c in term.courses):
+            found = True
+            term = term.model_copy(update={"courses": [
+                c.model_copy(update={"completed": True, "grade": grade.upper()})
+                if not c.completed and c.code.upper() == code else c
+                for c in term.courses
+            ]})
+        terms.append(term)
+    if not found:
+        raise SimulationError(f"Student is not currently taking {code}")
+    view.terms = terms
+
+
+def _complete_assignments(view: Student, change: Dict[str, Any]) -> None:
+    if "assignment_ids" in change:
+        assignment_ids = change["assignment_ids"]
+        if not isinstance(assignment_ids, list) or not all(
+            isinstance(assignment_id, int) for assignment_id in assignment_ids
+        ):
+            raise SimulationError("assignment_ids must be a list of integers")
+        wanted = set(assignment_ids)
+        unknown = wanted - {a.id for a in view.assignments}
+        if unknown:
+            raise SimulationError(
+                f"Unknown assignment IDs: {', '.join(map(str, sorted(unknown)))}"
+            )
+    else:
+        count = change.get("count")
+        if isinstance(count, bool) or not isinstance(count, int) or count < 1:
+            raise SimulationError("'complete_assignments' requires assignment_ids or a positive count")
+        open_assignments = sorted(
+            (a for a in view.assignments if not a.done),
+            key=lambda a: (a.deadline, a.id)
+        )
+        wanted = {a.id for a in open_assignments[:count]}
+    _replace_assignments(view, [
+        a.model_copy(update={"done": True}) if a.id in wanted and not a.done else a
+        for a in view.assignments
+    ])
+
+
+def _set_gpa(view: Student, change: Dict[str, Any]) -> None:
+    gpa = change.get("gpa")
+    if isinstance(gpa, bool) or not isinstance(gpa, (int, float)) or not 0.0 <= gpa <= 4.0:
+        raise SimulationError("'set_gpa' requires a gpa between 0.0 and 4.0")
+    view.gpa = float(gpa)
+
+
+def _set_absences(view: Student, change: Dict[str, Any]) -> None:
+    count = change.get("count")
+    if isinstance(count, bool) or not isinstance(count, int) or not 0 <= count <= MAX_ABSENCES:
+        raise SimulationError(f"'set_absences' requires a count between 0 and {MAX_ABSENCES}")
+    view.absence_bits = (1 << count) - 1
+
+
+CHANGES: Dict[str, Callable[[Student, Dict[str, Any]], None]] = {
+    "drop_course": _drop_course,
+    "add_course": _add_course,
+    "complete_course": _complete_course,
+    "complete_assignments": _complete_assignments,
+    "set_gpa": _set_gpa,
+    "set_absences": _set_absences,
+}
+
+
+def apply_changes(student: Student, changes: Sequence[Dict[str, Any]]) -> Student:
+    """Return a view of ``student`` with ``changes`` applied in order."""
+    view = student_view(student)
+    for change in changes:
+        apply = CHANGES.get(change.get("type")) if isinstance(change, dict) else None
+        if apply is None:
+            raise SimulationError(
+                f"Unknown change {change!r}; expected one of: {', '.join(CHANGES)}"
+            )
+        apply(view, change)
+    return view
+
+
+def simulate(
+    engine: RiskEngine,
+    student: Student,
+    scenarios: Sequence[Sequence[Dict[str, Any]]]
+) -> List[Dict[str, float]]:
+    """
+    Component scores for the unchanged student followed by one entry per scenario.
+
+    All views are scored in a single RiskEngine.calculate_many call.
+    """
+    views = [student] + [apply_changes(student, changes) for changes in scenarios]
+    return engine.calculate_many(views)
@@ -0,0 +1,77 @@
+import unittest
+from datetime import date, timedelta
+
+from app.domain.ds.assignment_heap import AssignmentMinHeap
+from app.domain.models import Assignment, Student
+
+
+class TestAssignmentMinHeap(unittest.TestCase):
+
+    def setUp(self):
+        self.today = date(2025, 3, 10)
+        offsets = [9, -2, 4, 0, 15, 6, 1, 30, 7, 3]
+        self.assignments = [
+            Assignment(deadline=self.today + timedelta(days=offset))
+            for offset in offsets
+        ]
+        self.heap = AssignmentMinHeap.from_assignments(self.assignments)
+
+    def test_get_due_soon_returns_sorted_entries_within_cutoff(self):
+        due = self.heap.get_due_soon(days=7, today=self.today)
+
+        expected = sorted(
+            (a for a in self.assignments if a.deadline <= self.today + timedelta(days=7)),
+            key=lambda a: a.deadline
+        )
+        self.assertEqual([a.deadline for a in due], [a.deadline for a in expected])
+
+    def test_remove_is_lazy_and_hidden_from_queries(self):
+        removed = self.heap.remove(1)  # son tarihi en yakın ödev
+
+        self.assertIs(removed, self.assignments[1])
+        self.assertEqual(self.heap.size(), 9)
+        self.assertNotIn(removed, self.heap.get_all_sorted())
+        self.assertNotIn(removed, self.heap.get_due_soon(days=7, today=self.today))
+        self.assertEqual(self.heap.peek().deadline, self.today)
+        self.assertIsNone(self.heap.remove(1))
+
+    def test_update_moves_entry_and_keeps_handle(self):
+        self.heap.update(7, self.today - timedelta(days=5))
+
+        self.assertIs(self.heap.peek(), self.assignments[7])
+        self.heap.update(7, self.today + timedelta(days=100))
+        self.assertIs(self.heap.get_all_sorted()[-1], self.assignments[7])
+        self.assertEqual(self.heap.size(), 10)
+
+    def test_compaction_keeps_heap_consistent(self):
+        for handle in range(8):
+            self.heap.remove(handle)
+
+        self.assertEqual(
+            [a.deadline for a in self.heap.get_all_sorted()],
+            sorted(a.deadline for a in self.assignments[8:])
+        )
+        popped = [self.heap.pop(), self.heap.pop()]
+        self.assertEqual(popped, sorted(self.assignments[8:], key=lambda a: a.deadline))
+        self.assertTrue(self.heap.is_empty())
+
+    def test_student_keeps_cached_heap_in_sync(self):
+        student = Student(id=1, name="Heap Test", assignments=list(self.assignments))
+        heap = student.assignment_heap()
+
+        removed = student.remove_assignment(1)
+        added = student.add_assignment(Assignment(deadline=self.today - timedelta(days=10)))
+        student.update_assignment(added.id, deadline=self.today + timedelta(days=50))
+
+        self.assertEqual(added.id, len(self.assignments) + 1)
+        self.assertIsNone(student.get_assignment(removed.id))
+        self.assertIs(student.get_assignment(added.id), added)
+        self.assertIs(student.assignment_heap(), heap)
+        self.assertEqual(
+            [a.deadline for a in heap.get_all_sorted()],
+            sorted(a.deadline for a in student.assignments)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+from app.domain.catalog import (
+    CatalogValidationError,
+    closure_changes,
+    cyclic_components,
+    topological_order,
+    validate_catalog,
+)
+from app.domain.ds.prereq_graph import PrereqGraph
+
+
+def _course(code, *prereq, **extra):
+    return {"code": code, "title": f"{code} dersi", "credit": 3, "prereq": list(prereq), **extra}
+
+
+class TestCatalogValidation(unittest.TestCase):
+
+    def test_valid_catalog_is_stored_in_topological_order(self):
+        catalog = validate_catalog([
+            _course("ymh301", "YMH201"),
+            _course("YMH201", "YMH101", "ymh101"),
+            _course("YMH101", department="YMH"),
+            _course("MAT101"),
+        ])
+
+        self.assertEqual([c["code"] for c in catalog], ["YMH101", "MAT101", "YMH201", "YMH301"])
+        self.assertEqual(catalog[2]["prereq"], ["YMH101"])
+        self.assertEqual(catalog[0]["department"], "YMH")
+
+    def test_all_problems_are_reported(self):
+        with self.assertRaises(CatalogValidationError) as raised:
+            validate_catalog([
+                _course("A", "B"),
+                _course("B", "C"),
+                _course("C", "A"),
+                _course("D", "D"),
+                _course("E", "X1"),
+                _course("A"),
+                {"code": "F", "title": "F", "credit": "üç"},
+            ])
+
+        errors = raised.exception.errors
+        self.assertIn("duplicate course code A", errors)
+        self.assertIn("E has unknown prerequisites: X1", errors)
+        self.assertIn("prerequisite cycle: A, B, C", errors)
+        self.assertIn("prerequisite cycle: D", errors)
+        self.assertTrue(any(error.startswith("entry 6: credit") for error in errors))
+
+    def test_long_chain_does_not_recurse(self):
+        prereqs = {f"C{i}": [f"C{i - 1}"] if i else [] for i in range(20000)}
+        self.assertEqual(len(topological_order(prereqs)), 20000)
+
+        prereqs["C0"] = ["C19999"]
+        self.assertEqual(topological_order(prereqs), [])
+        self.assertEqual(len(cyclic_components(prereqs)[0]), 20000)
+
+    def test_prereq_graph_reports_cycle_components(self):
+        graph = PrereqGraph()
+        graph.build_from_courses({"A": ["C"], "B": ["A"], "C": ["B"], "D": ["A"]})
+
+        self.assertEqual(graph.detect_cycles(), [["A", "B", "C"]])
+
+    def test_prereq_graph_closures_match_graph_walk(self):
+        prereqs = {
+            "A": [], "B": ["A", "X"], "C": ["B"], "D": ["C", "A"],
+            "E": ["F"], "F": ["E"], "G": ["E"],
+        }
+        graph = PrereqGraph()
+        graph.build_from_courses(prereqs)
+        walked = PrereqGraph()
+        for code, course_prereqs in prereqs.items():
+            walked.add_course(code, course_prereqs)
+
+        for code in [*prereqs, "X", "YOK"]:
+            self.assertEqual(graph.get_prerequisites(code), walked.get_prerequisites(code), code)
+
+    def test_closure_changes_follow_dependents(self):
+        old = {"A": [], "B": ["A"], "C": ["B"], "D": [], "E": ["D"]}
+
+        self.assertEqual(closure_changes(old, {**old, "A": ["D"]}), {"A", "B", "C"})
+        # Zaten geçişli olarak gereken ön koşulu doğrudan eklemek bir şey değiştirmez
+        self.assertEqual(closure_changes(old, {**old, "C": ["B", "A"]}), set())
+        self.assertEqual(closure_changes(old, {**old, "F": []}), set())
+        self.assertIsNone(closure_changes({"A": ["B"], "B": ["A"]}, {"A": [], "B": []}))
+
+
+if __name__ == "__main__":
+    unittest.main()
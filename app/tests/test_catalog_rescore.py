@@ -0,0 +1,73 @@
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.domain.models import CourseEnrollment, Student, Term
+from app.infrastructure import risk_cache, storage
+from app.main import app
+from app.services import scheduler
+
+
+def _course(code, *prereq):
+    return {"code": code, "title": f"{code} dersi", "credit": 3, "prereq": list(prereq)}
+
+
+CATALOG = [_course("MAT101"), _course("YMH101"), _course("YMH201", "YMH101"), _course("YMH301")]
+
+
+class TestCatalogRescore(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._patcher = patch.object(storage, "DATA_DIR", Path(self._tmp.name))
+        self._patcher.start()
+        logging.disable(logging.CRITICAL)
+        storage.save_course_catalog(CATALOG)
+        for student_id, current in enumerate(["YMH201", "YMH301", "MAT101"], start=1):
+            storage.save_student(Student(
+                id=student_id,
+                name=f"Öğrenci {student_id}",
+                terms=[Term(year=2024, semester=1, courses=[CourseEnrollment(code=current)])],
+            ))
+        scheduler.nightly_job()
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+        self._patcher.stop()
+        self._tmp.cleanup()
+
+    def test_only_students_in_changed_courses_are_rescored(self):
+        self.assertEqual(risk_cache.load_all()[2].components["prereq"], 0.0)
+
+        client = TestClient(app)
+        response = client.put("/api/courses/catalog", json=[
+            *CATALOG[:3], _course("YMH301", "YMH201"), _course("FIZ101"),
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()["rescoring"], response.json()["full_rescan"]), (1, False))
+        # Arka plan görevi yanıttan sonra etkilenen öğrenciyi puanladı
+        self.assertEqual(storage.dirty_students(), {})
+        entries = risk_cache.load_all()
+        self.assertEqual(risk_cache.scoring_tokens(), {storage.scoring_token()})
+        self.assertEqual(entries[2].components["prereq"], 1.0)
+
+        # Gece işi tam tarama yapmaz
+        with patch.object(risk_cache, "score_student", wraps=risk_cache.score_student) as scored:
+            scheduler.nightly_job()
+        self.assertEqual(scored.call_count, 0)
+
+    def test_unchanged_closures_mark_nobody(self):
+        _, affected = storage.save_course_catalog([*CATALOG, _course("FIZ101")])
+
+        self.assertEqual(affected, set())
+        self.assertEqual(storage.dirty_students(), {})
+        self.assertEqual(risk_cache.scoring_tokens(), {storage.scoring_token()})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.domain.models import Student, Term
+from app.infrastructure import storage
+from app.main import app
+
+
+class TestCourseRoutesUndo(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._patchers = [
+            patch.object(storage, "DATA_DIR", Path(self._tmp.name)),
+            patch.object(routes, "student_undo_stacks", {}),
+        ]
+        for patcher in self._patchers:
+            patcher.start()
+        storage.save_course_catalog([{"code": "YMH101", "title": "Programlama", "credit": 3}])
+        storage.save_student(Student(id=1, name="Öğrenci 1"))
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        for patcher in reversed(self._patchers):
+            patcher.stop()
+        self._tmp.cleanup()
+
+    def test_rejected_changes_leave_no_undo_entry(self):
+        response = self.client.post("/api/students/1/courses", json={"code": "YOK101"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            "/api/students/1/courses", json={"code": "YMH101"}, headers={"If-Match": '"eski"'}
+        )
+        self.assertEqual(response.status_code, 412)
+        response = self.client.delete("/api/students/1/courses/YMH101")
+        self.assertEqual(response.status_code, 404)
+
+        self.assertFalse(routes.get_student_undo_stack(1).can_undo())
+
+    def test_successful_change_is_recorded_once(self):
+        response = self.client.post("/api/students/1/courses", json={"code": "YMH101"})
+        self.assertEqual(response.status_code, 200)
+
+        undo_stack = routes.get_student_undo_stack(1)
+        self.assertEqual(undo_stack.current_state().terms, [])
+        undo_stack.undo()
+        self.assertFalse(undo_stack.can_undo())
+
+    def test_add_and_remove_agree_on_the_current_term(self):
+        with patch.object(Term, "current_key", return_value=(2030, 3)):
+            response = self.client.post("/api/students/1/courses", json={"code": "YMH101"})
+            self.assertEqual(response.status_code, 200)
+            response = self.client.delete("/api/students/1/courses/YMH101")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(storage.load_student(1).terms[0].courses, [])
+
+    def test_conflicting_undo_and_redo_leave_the_stack_in_place(self):
+        undo_stack = routes.get_student_undo_stack(1)
+        undo_stack.push(storage.load_student(1))
+        self.client.post("/api/students/1/courses", json={"code": "YMH101"})
+        conflict = storage.VersionConflictError(1, 2, 3)
+
+        with patch.object(storage, "save_student", side_effect=conflict):
+            response = self.client.post("/api/students/1/undo")
+        self.assertEqual(response.status_code, 409)
+        self.assertIsNotNone(undo_stack.peek_undo())
+        self.assertFalse(undo_stack.can_redo())
+
+        self.assertEqual(self.client.post("/api/students/1/undo").status_code, 200)
+        self.assertEqual(storage.load_student(1).terms, [])
+        self.assertTrue(undo_stack.can_redo())
+
+        with patch.object(storage, "save_student", side_effect=conflict):
+            response = self.client.post("/api/students/1/redo")
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(undo_stack.can_redo())
+
+        self.assertEqual(self.client.post("/api/students/1/redo").status_code, 200)
+        self.assertFalse(undo_stack.can_redo())
+
+
+if __name__ == "__main__":
+    unittest.main()
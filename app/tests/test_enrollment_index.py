@@ -0,0 +1,98 @@
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.domain.models import CourseEnrollment, Student, Term
+from app.infrastructure import enrollment_index, storage
+from app.main import app
+from app.services import scheduler
+
+
+def _student(student_id, *terms):
+    return Student(
+        id=student_id,
+        name=f"Öğrenci {student_id}",
+        terms=[
+            Term(year=2024, semester=semester, courses=[CourseEnrollment(**c) for c in courses])
+            for semester, courses in enumerate(terms, start=1)
+        ],
+    )
+
+
+class TestEnrollmentIndex(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._patcher = patch.object(storage, "DATA_DIR", Path(self._tmp.name))
+        self._patcher.start()
+
+    def tearDown(self):
+        self._patcher.stop()
+        self._tmp.cleanup()
+
+    def _roster(self, course, status=None):
+        return enrollment_index.roster(storage.index_connection(), course, status)
+
+    def test_statuses_prefer_completed_then_current(self):
+        student = _student(
+            1,
+            [{"code": "cs101", "completed": True, "grade": "FF"},
+             {"code": "MATH101", "completed": True, "grade": "FF"}],
+            [{"code": "CS101", "completed": True, "grade": "CC"},
+             {"code": "MATH101"}],
+        )
+        self.assertEqual(
+            enrollment_index.enrollment_statuses(student),
+            {"CS101": enrollment_index.COMPLETED, "MATH101": enrollment_index.CURRENT},
+        )
+
+    def test_saves_keep_index_current(self):
+        storage.save_student(_student(1, [{"code": "CS101"}]))
+        storage.save_student(_student(2, [{"code": "CS101", "completed": True, "grade": "FF"}]))
+        self.assertEqual(self._roster("cs101"), {"current": [1], "completed": [], "failed": [2]})
+
+        # Ders bırakıldı, diğer öğrenci dersi geçti
+        storage.save_student(_student(1, [{"code": "MATH101"}]))
+        storage.save_student(_student(2, [{"code": "CS101", "completed": True, "grade": "BA"}]))
+        self.assertEqual(self._roster("CS101"), {"current": [], "completed": [2], "failed": []})
+        self.assertEqual(self._roster("CS101", "completed"), {"completed": [2]})
+        self.assertEqual(
+            enrollment_index.students_in(storage.index_connection(), ["cs101", "MATH101"]),
+            {1, 2},
+        )
+
+    def test_route_scans_until_index_is_built_and_validates_status(self):
+        storage.save_student(_student(1, [{"code": "CS101"}]))
+        storage.save_student(_student(2, [{"code": "CS101", "completed": True, "grade": "BB"}]))
+        conn = storage.index_connection()
+        enrollment_index.begin_rebuild(conn)
+        expected = {"course": "CS101", "current": [1], "completed": [2], "failed": []}
+
+        # Kurulmamış dizin okuma isteğinde kurulmaz; öğrenci dosyaları taranır
+        client = TestClient(app)
+        response = client.get("/api/courses/cs101/students")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), expected)
+        self.assertFalse(enrollment_index.is_built(conn))
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM enrollments").fetchone()[0], 0)
+
+        logging.disable(logging.CRITICAL)
+        try:
+            scheduler.nightly_job()
+        finally:
+            logging.disable(logging.NOTSET)
+        self.assertTrue(enrollment_index.is_built(conn))
+        self.assertEqual(client.get("/api/courses/cs101/students").json(), expected)
+
+        response = client.get("/api/courses/CS101/students", params={"status": "current"})
+        self.assertEqual(response.json(), {"course": "CS101", "current": [1]})
+        response = client.get("/api/courses/CS101/students", params={"status": "dropped"})
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from app import metrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_spans_are_collected_per_request(self):
+        token = metrics.start_request()
+        with metrics.span("test.step"):
+            pass
+        metrics.observe_span("test.step", 0.5)
+
+        with self.assertLogs("app.access", level="INFO") as logs:
+            metrics.end_request(token, "GET", "/api/test/{id}", 200, 0.02)
+
+        self.assertIn('"route": "/api/test/{id}"', logs.output[0])
+        self.assertIn('"test.step": 500.', logs.output[0])
+
+    def test_render_prometheus_histograms(self):
+        histogram = metrics.http_requests.labels("POST", "/api/test", "201")
+        before = histogram.snapshot()[2]
+        histogram.observe(0.003)
+        histogram.observe(20.0)
+
+        text = metrics.render()
+
+        self.assertIn("# TYPE http_request_duration_seconds histogram", text)
+        self.assertIn(
+            'http_request_duration_seconds_count{method="POST",route="/api/test",status="201"} '
+            f"{before + 2}",
+            text,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_bucket{method="POST",route="/api/test",status="201",'
+            f'le="+Inf"}} {before + 2}',
+            text,
+        )
+        self.assertTrue(text.endswith("\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()
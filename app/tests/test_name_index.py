@@ -0,0 +1,102 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.domain.ds.name_index import NameIndex, fold
+from app.domain.models import Student
+from app.infrastructure import storage
+from app.main import app
+
+
+class TestNameIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = NameIndex()
+        self.index.build({
+            1: "Ahmet Yılmaz",
+            2: "Işık Öztürk",
+            3: "Ali Alp",
+            4: "İlker Şahin",
+        })
+
+    def test_turkish_case_folding(self):
+        self.assertEqual(fold("IŞIK İlker"), "isik ilker")
+        self.assertEqual(self.index.search("ISIK"), [(2, "Işık Öztürk")])
+        self.assertEqual(self.index.search("ilk"), [(4, "İlker Şahin")])
+        self.assertEqual(self.index.search("ozt"), [(2, "Işık Öztürk")])
+
+    def test_every_query_word_must_prefix_a_name_word(self):
+        self.assertEqual(self.index.search("yıl ahm"), [(1, "Ahmet Yılmaz")])
+        self.assertEqual(self.index.search("ahmet ali"), [])
+        # Her iki kelimesi de eşleşen öğrenci bir kez döner
+        self.assertEqual(self.index.search("al"), [(3, "Ali Alp")])
+        self.assertEqual(self.index.search("   "), [])
+
+    def test_updates_replace_old_words(self):
+        self.index.add(2, "Işık Demir")
+        self.index.remove(3)
+
+        self.assertEqual(self.index.search("öztürk"), [])
+        self.assertEqual(self.index.search("dem"), [(2, "Işık Demir")])
+        self.assertEqual(self.index.search("al"), [])
+        self.assertEqual(len(self.index), 3)
+
+
+class TestStudentSearchRoute(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._patchers = [
+            patch.object(storage, "DATA_DIR", Path(self._tmp.name)),
+            patch.object(routes, "student_name_index", None),
+            patch.object(routes, "_name_index_seq", 0),
+        ]
+        for patcher in self._patchers:
+            patcher.start()
+        storage.save_student(Student(id=storage.next_student_id(), name="Zeynep Kılıç"))
+
+    def tearDown(self):
+        for patcher in reversed(self._patchers):
+            patcher.stop()
+        self._tmp.cleanup()
+
+    def test_search_follows_creates_and_updates(self):
+        client = TestClient(app)
+        response = client.get("/api/students/search", params={"q": "kilic"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["students"], [{"id": 1, "name": "Zeynep Kılıç"}])
+
+        created = client.post("/api/students/", json={"name": "Zeynep Ünal"}).json()["id"]
+        client.post("/api/students/1", json={"name": "Zeynep Arslan"})
+
+        response = client.get("/api/students/search", params={"q": "ZEY", "limit": 5})
+        self.assertEqual(
+            response.json()["students"],
+            [{"id": 1, "name": "Zeynep Arslan"}, {"id": created, "name": "Zeynep Ünal"}],
+        )
+        response = client.get("/api/students/search", params={"q": "kılıç"})
+        self.assertEqual(response.json()["students"], [])
+
+    def test_search_sees_saves_made_outside_this_worker(self):
+        client = TestClient(app)
+        response = client.get("/api/students/search", params={"q": "zey"})
+        self.assertEqual(len(response.json()["students"]), 1)
+
+        # Başka bir worker'ın kaydı gibi: rota yardımcısı ve bu sürecin dizini atlanır
+        student = storage.load_student(1)
+        student.name = "Zeynep Arslan"
+        storage.save_student(student)
+        storage.save_student(Student(id=storage.next_student_id(), name="Zeki Kılıç"))
+
+        response = client.get("/api/students/search", params={"q": "kılıç"})
+        self.assertEqual(response.json()["students"], [{"id": 2, "name": "Zeki Kılıç"}])
+        response = client.get("/api/students/search", params={"q": "arslan"})
+        self.assertEqual(response.json()["students"], [{"id": 1, "name": "Zeynep Arslan"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
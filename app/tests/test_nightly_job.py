@@ -0,0 +1,105 @@
+import logging
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from app.domain.models import Student
+from app.infrastructure import job_runs, risk_cache, storage
+from app.services import scheduler
+
+
+class TestNightlyJob(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._patchers = [
+            patch.object(storage, "DATA_DIR", Path(self._tmp.name)),
+            patch.object(scheduler, "CHECKPOINT_CHUNK", 3),
+        ]
+        for patcher in self._patchers:
+            patcher.start()
+        for student_id in range(1, 9):
+            storage.save_student(Student(id=student_id, name=f"Öğrenci {student_id}", gpa=2.0))
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+        for patcher in reversed(self._patchers):
+            patcher.stop()
+        self._tmp.cleanup()
+
+    def _run(self, fail_on=None):
+        scored = []
+        original = risk_cache.score_student
+
+        def score_student(engine, student, *args):
+            if student.id == fail_on:
+                raise RuntimeError("worker died")
+            scored.append(student.id)
+            return original(engine, student, *args)
+
+        with patch.object(risk_cache, "score_student", score_student):
+            scheduler.nightly_job()
+        return scored
+
+    def _status(self):
+        return job_runs.describe(storage.index_connection(), scheduler.NIGHTLY_JOB)
+
+    def test_failed_run_resumes_after_last_checkpoint(self):
+        self.assertEqual(self._run(fail_on=5), [1, 2, 3, 4])
+
+        status = self._status()
+        self.assertEqual(status["status"], job_runs.FAILED)
+        self.assertEqual((status["processed"], status["total"]), (3, 8))
+        self.assertEqual(sorted(risk_cache.load_all()), [1, 2, 3])
+
+        # Yalnızca kontrol noktasından sonraki parçalar yeniden işlenir
+        self.assertEqual(self._run(), [4, 5, 6, 7, 8])
+
+        status = self._status()
+        self.assertEqual(status["status"], job_runs.COMPLETED)
+        self.assertEqual((status["processed"], status["mode"]), (8, job_runs.FULL))
+        self.assertEqual(sorted(risk_cache.load_all()), list(range(1, 9)))
+        self.assertEqual(storage.dirty_students(), {})
+
+    def test_completed_run_starts_incremental_run(self):
+        self._run()
+        student = storage.load_student(6)
+        student.gpa = 1.0
+        storage.save_student(student)
+
+        self.assertEqual(self._run(), [6])
+        self.assertEqual(self._status()["mode"], job_runs.INCREMENTAL)
+
+    def test_running_row_without_lock_is_interrupted(self):
+        self._run()
+        conn = storage.index_connection()
+        run = job_runs.load(conn, scheduler.NIGHTLY_JOB)
+        job_runs.resume(conn, run, 0)
+
+        self.assertEqual(self._status()["status"], job_runs.INTERRUPTED)
+        with job_runs.exclusive(scheduler.NIGHTLY_JOB):
+            self.assertEqual(self._status()["status"], job_runs.RUNNING)
+
+    def test_run_waits_for_a_status_probe(self):
+        probing = threading.Event()
+
+        def probe():
+            with job_runs.exclusive(scheduler.NIGHTLY_JOB):
+                probing.set()
+                threading.Event().wait(0.2)
+
+        prober = threading.Thread(target=probe)
+        prober.start()
+        probing.wait()
+        try:
+            self.assertEqual(self._run(), list(range(1, 9)))
+        finally:
+            prober.join()
+        self.assertEqual(self._status()["status"], job_runs.COMPLETED)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import pstats
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from app import profiling
+from app.infrastructure import storage
+
+
+@profiling.profiled("nightly_job")
+def _job(values):
+    return sum(_step(value) for value in values)
+
+
+@profiling.profiled("iter_all_students")
+def _scan(count):
+    for i in range(count):
+        yield _step(i)
+
+
+@profiling.profiled("calculate_risk")
+def _step(value):
+    return value * 2
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._patcher = patch.object(storage, "DATA_DIR", Path(self._tmp.name))
+        self._patcher.start()
+        profiling.disarm()
+
+    def tearDown(self):
+        profiling.disarm()
+        self._patcher.stop()
+        self._tmp.cleanup()
+
+    def _profiles(self):
+        directory = Path(self._tmp.name) / "profiles"
+        return sorted(directory.iterdir()) if directory.exists() else []
+
+    def test_disarmed_target_writes_nothing(self):
+        self.assertEqual(_job([1, 2, 3]), 12)
+        self.assertEqual(self._profiles(), [])
+
+    def test_armed_target_profiles_next_runs_only(self):
+        profiling.arm("nightly_job", count=2)
+
+        for _ in range(3):
+            self.assertEqual(_job([1, 2, 3]), 12)
+
+        files = self._profiles()
+        self.assertEqual(len(files), 2)
+        self.assertEqual(profiling.status()["armed"], {})
+        functions = {name for _, _, name in pstats.Stats(str(files[0])).stats}
+        self.assertIn("_step", functions)
+
+    def test_nested_target_is_left_armed(self):
+        profiling.arm("nightly_job")
+        profiling.arm("calculate_risk")
+
+        _job([1])
+
+        self.assertEqual(len(self._profiles()), 1)
+        self.assertEqual(profiling.status()["armed"], {"calculate_risk": 1})
+
+    def test_iterator_profile_is_written_when_exhausted(self):
+        profiling.arm("iter_all_students")
+
+        scan = _scan(4)
+        self.assertEqual(next(scan), 0)
+        self.assertEqual(self._profiles(), [])
+        self.assertEqual(list(scan), [2, 4, 6])
+
+        self.assertEqual(len(self._profiles()), 1)
+
+    def test_concurrent_targets_profile_one_at_a_time(self):
+        profiling.arm("nightly_job")
+        profiling.arm("calculate_risk")
+        inside = threading.Event()
+        release = threading.Event()
+        results = {}
+
+        @profiling.profiled("nightly_job")
+        def blocking_job():
+            inside.set()
+            release.wait(5)
+            return "job"
+
+        worker = threading.Thread(target=lambda: results.setdefault("job", blocking_job()))
+        worker.start()
+        inside.wait(5)
+        try:
+            # İlk yakalama sürerken ikinci hedef profilsiz çalışır ve kurulu kalır
+            self.assertEqual(_step(21), 42)
+        finally:
+            release.set()
+            worker.join()
+
+        self.assertEqual(results, {"job": "job"})
+        self.assertEqual(len(self._profiles()), 1)
+        self.assertEqual(profiling.status()["armed"], {"calculate_risk": 1})
+        self.assertEqual(_step(1), 2)
+        self.assertEqual(len(self._profiles()), 2)
+
+    def test_failed_enable_still_cleans_up(self):
+        profiling.arm("nightly_job", count=2)
+
+        with patch.object(profiling.cProfile.Profile, "enable", side_effect=ValueError("busy")):
+            with self.assertLogs(profiling.logger, level="WARNING"):
+                self.assertEqual(_job([1, 2]), 6)
+        self.assertEqual(_job([1, 2]), 6)
+
+        self.assertEqual(len(self._profiles()), 2)
+        self.assertEqual(profiling.status()["armed"], {})
+
+    def test_arm_validates_target_and_count(self):
+        with self.assertRaises(ValueError):
+            profiling.arm("everything")
+        with self.assertRaises(ValueError):
+            profiling.arm("nightly_job", count=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
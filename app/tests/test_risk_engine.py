@@ -2,7 +2,7 @@ import unittest
 from datetime import date, timedelta
 from unittest.mock import MagicMock
 
-from app.domain.models import Student, Term, Assignment
+from app.domain.models import Student, Term, Assignment, CourseEnrollment
 from app.domain.risk import RiskEngine
 
 
@@ -133,6 +133,48 @@ class TestRiskEngine(unittest.TestCase):
             risk = self.risk_engine._calculate_gpa_risk(student)
             self.assertAlmostEqual(risk, expected_risk, places=1)
 
+    def test_assignment_risk_from_deadlines_matches_student(self):
+        # Önbellekteki son teslim dizininden hesaplanan risk, öğrenci
+        # kaydından hesaplananla aynı olmalı
+        today = date.today()
+        assignments = [
+            Assignment(deadline=today + timedelta(days=offset), done=offset % 3 == 0)
+            for offset in (-9, -4, -1, 0, 1, 2, 3, 5, 6, 7, 8, 15)
+        ]
+        student = Student(id=5, name="Deadline Test", assignments=assignments)
+        deadlines = sorted((a.deadline.toordinal(), a.done) for a in assignments)
+
+        expected = self.risk_engine._calculate_assignment_risk(student)
+        actual = RiskEngine.assignment_risk_from_deadlines(deadlines, today)
+
+        self.assertAlmostEqual(actual, expected)
+        self.assertEqual(RiskEngine.assignment_risk_from_deadlines([], today), 0.0)
+
+    def test_calculate_many_matches_single_calculation(self):
+        today = date.today()
+        students = [
+            Student(
+                id=student_id,
+                name=f"Batch {student_id}",
+                gpa=1.0 + student_id * 0.5,
+                absence_bits=(1 << student_id) - 1,
+                terms=[Term(year=today.year, semester=1, courses=[
+                    CourseEnrollment(code="CS101", completed=student_id % 2 == 0, grade="CC"),
+                    CourseEnrollment(code="CS201"),
+                ])]
+            )
+            for student_id in range(1, 6)
+        ]
+
+        batch = self.risk_engine.calculate_many(students)
+
+        self.assertEqual(len(batch), len(students))
+        for student, components in zip(students, batch):
+            self.assertEqual(components, self.risk_engine.calculate_components(student))
+        # Önbelleğe alınan geçişli ön koşul kümesi doğru kalmalı
+        self.assertEqual(self.risk_engine._prereq_graph.get_prerequisites("CS201"),
+                         {"CS101", "CS102"})
+
 
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
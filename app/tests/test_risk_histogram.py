@@ -0,0 +1,50 @@
+import unittest
+
+from app.domain.ds.risk_histogram import RiskHistogram
+
+
+class TestRiskHistogram(unittest.TestCase):
+
+    def test_quantiles_are_within_one_bin(self):
+        histogram = RiskHistogram()
+        values = [i / 1000 for i in range(1000)]
+        for value in values:
+            histogram.add(value)
+
+        self.assertEqual(histogram.count, 1000)
+        self.assertAlmostEqual(histogram.mean(), sum(values) / 1000)
+        for q in (0.1, 0.5, 0.9, 0.99):
+            self.assertAlmostEqual(histogram.quantile(q), q, delta=0.01)
+
+    def test_merge_matches_single_pass(self):
+        values = [0.05, 0.2, 0.2, 0.45, 0.8, 0.95, 1.0]
+        whole = RiskHistogram()
+        left, right = RiskHistogram(), RiskHistogram()
+        for i, value in enumerate(values):
+            whole.add(value)
+            (left if i % 2 else right).add(value)
+
+        merged = left.merge(right)
+
+        self.assertEqual(merged.counts, whole.counts)
+        self.assertEqual((merged.min, merged.max), (0.05, 1.0))
+        self.assertEqual(merged.quantile(0.5), whole.quantile(0.5))
+
+    def test_buckets_and_empty_histogram(self):
+        histogram = RiskHistogram()
+        self.assertIsNone(histogram.quantile(0.5))
+        self.assertIsNone(histogram.mean())
+
+        for value in (0.05, 0.15, 0.99, 1.0):
+            histogram.add(value)
+
+        counts = [bucket["count"] for bucket in histogram.buckets(5)]
+        self.assertEqual(counts, [2, 0, 0, 0, 2])
+
+    def test_merge_rejects_different_bins(self):
+        with self.assertRaises(ValueError):
+            RiskHistogram(10).merge(RiskHistogram(20))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from app.domain.risk import RiskEngine
+from app.infrastructure import risk_history, storage
+
+
+def _components(value):
+    return {name: value for name in RiskEngine.WEIGHTS}
+
+
+class TestRiskHistory(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._patcher = patch.object(storage, "DATA_DIR", Path(self._tmp.name))
+        self._patcher.start()
+        self.today = date(2025, 3, 10)
+
+    def tearDown(self):
+        self._patcher.stop()
+        self._tmp.cleanup()
+
+    def test_student_history_reads_rows_by_id(self):
+        for offset in range(3):
+            day = self.today + timedelta(days=offset)
+            # Satırlar sırasız verilir, yazarken sıralanmalı
+            risk_history.write_day(day, [
+                (7, 0.1 * offset, _components(0.5)),
+                (3, 0.2, _components(0.25)),
+            ])
+
+        history = risk_history.student_history(7, self.today, self.today + timedelta(days=5))
+
+        self.assertEqual([day for day, _ in history],
+                         [self.today + timedelta(days=i) for i in range(3)])
+        self.assertAlmostEqual(history[2][1]["score"], 0.2, places=5)
+        self.assertEqual(history[0][1]["absence"], 0.5)
+        self.assertEqual(risk_history.student_history(99, self.today, self.today), [])
+
+    def test_rewriting_a_day_replaces_it(self):
+        risk_history.write_day(self.today, [(1, 0.3, _components(0.0))])
+        risk_history.write_day(self.today, [(1, 0.6, _components(0.0))])
+
+        [(_, row)] = risk_history.student_history(1, self.today, self.today)
+        self.assertAlmostEqual(row["score"], 0.6, places=5)
+        self.assertEqual(risk_history.available_days(), [self.today])
+
+    def test_write_makes_the_rename_durable(self):
+        with patch.object(storage, "_fsync_dir") as fsync_dir:
+            risk_history.write_day(self.today, [(1, 0.3, _components(0.0))])
+
+        fsync_dir.assert_called_once_with(Path(self._tmp.name) / "risk_history")
+        leftovers = [p.name for p in (Path(self._tmp.name) / "risk_history").iterdir()]
+        self.assertEqual(leftovers, [f"{self.today.isoformat()}.bin"])
+
+    def test_risers_compare_first_and_last_day(self):
+        week_ago = self.today - timedelta(days=7)
+        risk_history.write_day(week_ago, [
+            (1, 0.2, _components(0.0)),
+            (2, 0.5, _components(0.0)),
+            (3, 0.1, _components(0.0)),
+        ])
+        risk_history.write_day(self.today, [
+            (1, 0.6, _components(0.0)),
+            (2, 0.55, _components(0.0)),
+            (3, 0.4, _components(0.0)),
+            (4, 0.9, _components(0.0)),
+        ])
+
+        first, last, rows = risk_history.risers(week_ago, self.today, 0.1)
+
+        self.assertEqual((first, last), (week_ago, self.today))
+        self.assertEqual([student_id for student_id, _, _ in rows], [1, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import copy
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from app.api import routes
+from app.domain.models import CourseEnrollment, Student, Term
+from app.domain.risk import RiskEngine
+from app.domain.risk_model import DEFAULT_CONFIG, DEFAULT_MODEL, compile_config
+from app.infrastructure import storage
+
+
+class TestRiskModel(unittest.TestCase):
+
+    def test_default_model_lookup_tables(self):
+        gpa_tests = [(4.0, 0.0), (3.5, 0.0), (3.2, 0.2), (2.5, 0.4), (2.0, 0.6), (1.5, 0.8), (0.3, 1.0), (-1.0, 1.0)]
+        for gpa, expected in gpa_tests:
+            self.assertEqual(DEFAULT_MODEL.gpa_risk(gpa), expected)
+
+        self.assertEqual(DEFAULT_MODEL.grade_risk("bb"), 0.2)
+        self.assertEqual(DEFAULT_MODEL.grade_risk(" FF "), 1.0)
+        self.assertEqual(DEFAULT_MODEL.grade_risk("XX"), 0.5)
+        self.assertEqual(DEFAULT_MODEL.absence_risk(0), 0.0)
+        self.assertAlmostEqual(DEFAULT_MODEL.absence_risk(7), 0.5)
+        self.assertEqual(DEFAULT_MODEL.absence_risk(20), 1.0)
+        self.assertEqual(DEFAULT_MODEL.level(0.8), "HIGH")
+        self.assertEqual(DEFAULT_MODEL.level(0.75), "MEDIUM")
+        self.assertEqual(DEFAULT_MODEL.level(0.5), "LOW")
+        self.assertEqual(DEFAULT_MODEL.gpa_band(2.7), "2.5-3")
+        self.assertEqual(DEFAULT_MODEL.gpa_band(3.9), "3.5+")
+
+    def test_invalid_configs_are_rejected(self):
+        broken = [
+            {"weights": {**DEFAULT_CONFIG["weights"], "gpa": 0.5}},
+            {"weights": {"absence": 1.0}},
+            {"gpa_bands": []},
+            {"gpa_bands": [{"min_gpa": 2.0, "risk": 0.1}, {"min_gpa": 2.0, "risk": 0.2}]},
+            {"grade_risk": {"AA": 1.5}},
+            {"levels": {"high": 0.4, "medium": 0.6}},
+        ]
+        for override in broken:
+            with self.assertRaises(ValueError):
+                compile_config({**DEFAULT_CONFIG, **override})
+
+    def test_engine_uses_custom_model(self):
+        config = copy.deepcopy(DEFAULT_CONFIG)
+        config["weights"] = {"absence": 0.0, "assignment": 0.0, "prereq": 0.0, "gpa": 0.5, "grade": 0.5}
+        config["grade_risk"]["CC"] = 0.9
+        model = compile_config(config)
+
+        class EmptyCatalog:
+            @staticmethod
+            def load_course_catalog():
+                return []
+
+        engine = RiskEngine(EmptyCatalog, model)
+        student = Student(id=1, name="Model Test", gpa=2.2, absence_bits=0b1111, terms=[
+            Term(year=2024, semester=1, courses=[CourseEnrollment(code="X1", completed=True, grade="cc")])
+        ])
+
+        components = engine.calculate_components(student)
+
+        self.assertAlmostEqual(components["grade"], 0.9)
+        self.assertAlmostEqual(engine.calculate(student), 0.5 * 0.6 + 0.5 * 0.9)
+
+
+class TestRiskModelStorage(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self._tmp.name)
+        self._patchers = [
+            patch.object(storage, "DATA_DIR", self.data_dir),
+            patch.object(storage, "_risk_model_cache", None),
+            patch.object(routes, "_risk_engine_cache", None),
+        ]
+        for patcher in self._patchers:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self._patchers:
+            patcher.stop()
+        self._tmp.cleanup()
+
+    def test_hot_reload_keeps_last_valid_model(self):
+        self.assertEqual(storage.load_risk_model().token, "0")
+
+        config = copy.deepcopy(DEFAULT_CONFIG)
+        config["levels"] = {"high": 0.6, "medium": 0.3}
+        saved = storage.save_risk_model(config)
+        self.assertEqual(storage.load_risk_model().level(0.65), "HIGH")
+        self.assertIn(saved.token, storage.scoring_token())
+
+        # Bozuk düzenleme önceki geçerli modeli değiştirmez
+        (self.data_dir / storage.RISK_MODEL_FILE).write_text(json.dumps({"weights": {}}) + "\n\n")
+        with self.assertLogs(storage.logger, level="ERROR"):
+            self.assertIs(storage.load_risk_model(), saved)
+
+        with self.assertRaises(ValueError):
+            storage.save_risk_model({"weights": {}})
+
+    def test_engine_is_shared_until_the_catalog_changes(self):
+        storage.save_course_catalog([{"code": "YMH101", "title": "Programlama", "credit": 3}])
+        engine = routes.get_risk_engine()
+        self.assertIs(routes.get_risk_engine(), engine)
+
+        storage.save_course_catalog([
+            {"code": "YMH101", "title": "Programlama", "credit": 3},
+            {"code": "YMH102", "title": "Programlama II", "credit": 3, "prereq": ["YMH101"]},
+        ])
+        rebuilt = routes.get_risk_engine()
+        self.assertIsNot(rebuilt, engine)
+        self.assertEqual(rebuilt._prereq_graph.get_prerequisites("YMH102"), {"YMH101"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from app.domain.models import CourseEnrollment, Student, Term
+from app.domain.risk import RiskEngine
+from app.infrastructure import risk_cache, storage
+from app.services import analytics, scheduler
+
+
+def _engine():
+    return RiskEngine(storage, storage.load_risk_model())
+
+
+class TestTopStudents(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._patcher = patch.object(storage, "DATA_DIR", Path(self._tmp.name))
+        self._patcher.start()
+        logging.disable(logging.CRITICAL)
+        for student_id in range(1, 21):
+            code = "YMH101" if student_id % 2 else "MAT101"
+            storage.save_student(Student(
+                id=student_id,
+                name=f"Öğrenci {student_id}",
+                gpa=(student_id % 7) * 0.5,
+                terms=[Term(year=2024, semester=1 + student_id % 2,
+                            courses=[CourseEnrollment(code=code)])],
+            ))
+        scheduler.nightly_job()
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+        self._patcher.stop()
+        self._tmp.cleanup()
+
+    def _expected(self, risk_filter, count, offset=0):
+        entries = sorted(
+            filter(risk_filter.matches, risk_cache.iter_all()),
+            key=lambda entry: (-entry.score, entry.student_id),
+        )
+        return [entry.student_id for entry in entries[offset:offset + count]]
+
+    def test_sql_ranking_matches_python_filters(self):
+        filters = [
+            risk_cache.RiskFilter(),
+            risk_cache.RiskFilter(course="YMH101"),
+            risk_cache.RiskFilter(department="MAT", term="2024-1"),
+            risk_cache.RiskFilter(above=0.1, at_most=0.3),
+        ]
+        for risk_filter in filters:
+            source, top = analytics.top_students(_engine, 5, 3, risk_filter)
+            self.assertEqual(source, "cache")
+            self.assertEqual(
+                [entry.student_id for entry in top], self._expected(risk_filter, 5, 3), risk_filter
+            )
+
+    def test_students_saved_after_the_nightly_run_are_merged(self):
+        student = storage.load_student(4)
+        student.gpa = 0.0
+        storage.save_student(student)
+
+        _, top = analytics.top_students(_engine, 3)
+
+        self.assertIn(4, [entry.student_id for entry in top])
+        self.assertEqual(top, sorted(top, key=lambda entry: (-entry.score, entry.student_id)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from starlette.datastructures import State
+
+from app.infrastructure import storage
+from app.services import scheduler
+
+
+class _App:
+    """Zamanlayıcının kullandığı kadarıyla bir FastAPI uygulaması."""
+
+    def __init__(self, name):
+        self.name = name
+        self.state = State()
+
+
+class TestSchedulerLeader(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.started = []
+
+        def start_scheduler(app):
+            self.started.append(app.name)
+            app.state.scheduler = MagicMock()
+            return app.state.scheduler
+
+        self._patchers = [
+            patch.object(storage, "DATA_DIR", Path(self._tmp.name)),
+            patch.object(scheduler, "LEADER_RETRY_SECONDS", 0.01),
+            patch.object(scheduler, "start_scheduler", start_scheduler),
+        ]
+        for patcher in self._patchers:
+            patcher.start()
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+        for patcher in reversed(self._patchers):
+            patcher.stop()
+        self._tmp.cleanup()
+
+    def test_single_leader_and_takeover(self):
+        apps = {name: _App(name) for name in ("a", "b", "c")}
+
+        async def scenario():
+            workers = {
+                name: asyncio.create_task(scheduler.lead_scheduler(app))
+                for name, app in apps.items()
+            }
+            await asyncio.sleep(0.1)
+            self.assertEqual(len(self.started), 1)
+
+            # Lider ölünce kalanlardan biri devralır
+            leader = self.started[0]
+            stopped = workers.pop(leader)
+            stopped.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await stopped
+            self.assertFalse(hasattr(apps[leader].state, "scheduler"))
+            await asyncio.sleep(0.1)
+            self.assertEqual(len(self.started), 2)
+            self.assertNotEqual(self.started[1], leader)
+
+            for task in workers.values():
+                task.cancel()
+            await asyncio.gather(*workers.values(), return_exceptions=True)
+
+        asyncio.run(scenario())
+
+    def test_failed_shutdown_still_releases_leadership(self):
+        async def scenario():
+            app = _App("a")
+            leader = asyncio.create_task(scheduler.lead_scheduler(app))
+            await asyncio.sleep(0.05)
+            app.state.scheduler.shutdown.side_effect = RuntimeError("shutdown failed")
+            leader.cancel()
+            # Hata izi liderin yerel değişkenlerini (kilit dahil) canlı tutar;
+            # kilit çöp toplayıcıyla değil, lead_scheduler tarafından bırakılmalı
+            error = await asyncio.gather(leader, return_exceptions=True)
+            self.assertIsInstance(error[0], RuntimeError)
+
+            follower = asyncio.create_task(scheduler.lead_scheduler(_App("b")))
+            await asyncio.sleep(0.05)
+            self.assertEqual(self.started, ["a", "b"])
+            follower.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await follower
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
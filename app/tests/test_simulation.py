@@ -0,0 +1,84 @@
+import unittest
+from datetime import date, timedelta
+from unittest.mock import MagicMock
+
+from app.domain.models import Assignment, CourseEnrollment, Student, Term
+from app.domain.risk import RiskEngine
+from app.services import simulation
+
+
+class TestSimulation(unittest.TestCase):
+
+    def setUp(self):
+        storage = MagicMock()
+        storage.load_course_catalog.return_value = [
+            {"code": "CS101", "title": "Intro", "credit": 3, "prereq": []},
+            {"code": "CS102", "title": "Data Structures", "credit": 4, "prereq": ["CS101"]},
+        ]
+        self.engine = RiskEngine(storage)
+        today = date.today()
+        self.student = Student(
+            id=1,
+            name="Ayşe Yılmaz",
+            gpa=1.8,
+            absence_bits=0b111111,
+            terms=[Term(year=today.year, semester=1, courses=[
+                CourseEnrollment(code="CS102"),
+            ])],
+            assignments=[
+                Assignment(deadline=today + timedelta(days=1)),
+                Assignment(deadline=today + timedelta(days=2)),
+                Assignment(deadline=today + timedelta(days=20)),
+            ],
+        )
+        self.original = self.student.model_dump()
+        # Orijinal öğrencinin heap önbelleği kurulmuş olsun
+        self.student.assignment_heap()
+
+    def test_scenarios_do_not_modify_student(self):
+        baseline, dropped, improved = simulation.simulate(self.engine, self.student, [
+            [{"type": "drop_course", "code": "cs102"}],
+            [
+                {"type": "complete_assignments", "count": 2},
+                {"type": "set_gpa", "gpa": 3.6},
+                {"type": "set_absences", "count": 0},
+            ],
+        ])
+
+        self.assertEqual(self.student.model_dump(), self.original)
+        self.assertEqual(baseline, self.engine.calculate_components(self.student))
+        self.assertGreater(baseline["prereq"], 0.0)
+        self.assertEqual(dropped["prereq"], 0.0)
+        self.assertEqual(improved["gpa"], 0.0)
+        self.assertEqual(improved["absence"], 0.0)
+        self.assertLess(improved["assignment"], baseline["assignment"])
+
+    def test_view_shares_unchanged_parts(self):
+        view = simulation.apply_changes(self.student, [{"type": "set_gpa", "gpa": 3.0}])
+
+        self.assertIs(view.terms, self.student.terms)
+        self.assertIs(view.assignments, self.student.assignments)
+        self.assertEqual(self.student.gpa, 1.8)
+
+    def test_complete_course_and_unknown_changes(self):
+        view = simulation.apply_changes(self.student, [
+            {"type": "add_course", "code": "CS101"},
+            {"type": "complete_course", "code": "CS101", "grade": "bb"},
+        ])
+
+        codes = {(c.code, c.completed, c.grade) for t in view.terms for c in t.courses}
+        self.assertIn(("CS101", True, "BB"), codes)
+        self.assertEqual(len(self.original["terms"][0]["courses"]), 1)
+
+        with self.assertRaises(simulation.SimulationError):
+            simulation.apply_changes(self.student, [{"type": "teleport"}])
+        with self.assertRaises(simulation.SimulationError):
+            simulation.apply_changes(self.student, [{"type": "drop_course", "code": "CS999"}])
+        with self.assertRaises(simulation.SimulationError):
+            simulation.apply_changes(self.student, [
+                {"type": "complete_assignments", "assignment_ids": [99]}
+            ])
+
+
+if __name__ == '__main__':
+    unittest.main()
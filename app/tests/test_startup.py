@@ -0,0 +1,77 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.domain.models import Student
+from app.infrastructure import storage
+from app.main import app
+
+ROOT = Path(__file__).resolve().parents[2]
+# İçe aktarma bu makinede ~0,5 sn sürüyor; bütçe bunun yaklaşık iki katı
+IMPORT_BUDGET_SECONDS = 1.0
+# Arka plan ısınmasının bitmesi için beklenecek en uzun süre
+WARMUP_TIMEOUT_SECONDS = 10.0
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "modules": sorted(name for name in ("networkx", "apscheduler") if name in sys.modules),
+}))
+"""
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_import_is_lazy_and_touches_no_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = Path(tmp) / "data"
+            result = subprocess.run(
+                [sys.executable, "-c", _PROBE],
+                cwd=ROOT,
+                env={**os.environ, "DATA_DIR": str(data_dir)},
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            probe = json.loads(result.stdout.strip().splitlines()[-1])
+
+            self.assertEqual(probe["modules"], [])
+            self.assertLess(probe["seconds"], IMPORT_BUDGET_SECONDS)
+            self.assertFalse(data_dir.exists())
+
+    def test_first_risk_request_reuses_the_warmed_engine(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.dict(os.environ, {"SCHEDULER_ENABLED": "0"}), \
+                patch.object(storage, "DATA_DIR", Path(tmp)), \
+                patch.object(routes, "_risk_engine_cache", None), \
+                patch.object(routes, "student_name_index", None), \
+                patch.object(routes, "_name_index_seq", 0):
+            storage.save_student(Student(id=1, name="Öğrenci 1", gpa=2.0))
+            with TestClient(app) as client:
+                deadline = time.monotonic() + WARMUP_TIMEOUT_SECONDS
+                while routes._risk_engine_cache is None and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                warmed = routes._risk_engine_cache
+                self.assertIsNotNone(warmed)
+
+                with patch.object(routes, "RiskEngine", side_effect=AssertionError("rebuilt")):
+                    response = client.get("/api/students/1/risk")
+
+                self.assertEqual(response.status_code, 200)
+                self.assertIs(routes._risk_engine_cache, warmed)
+
+
+if __name__ == "__main__":
+    unittest.main()
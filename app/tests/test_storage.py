@@ -0,0 +1,149 @@
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from app.domain.models import Assignment, Student
+from app.domain.risk_model import DEFAULT_CONFIG
+from app.infrastructure import deadline_index, storage
+
+
+class TestStorage(unittest.TestCase):
+
+    def setUp(self):
+        # Her test kendi geçici veri dizininde çalışır
+        self._tmp = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self._tmp.name)
+        self._patcher = patch.object(storage, "DATA_DIR", self.data_dir)
+        self._patcher.start()
+
+    def tearDown(self):
+        self._patcher.stop()
+        self._tmp.cleanup()
+
+    def test_save_and_load_student(self):
+        storage.save_student(Student(id=1, name="Ali Veli", gpa=3.1))
+
+        student = storage.load_student(1)
+
+        self.assertEqual(student.name, "Ali Veli")
+        self.assertAlmostEqual(student.gpa, 3.1)
+        self.assertIsNone(storage.load_student(2))
+
+    def test_save_leaves_no_temp_files(self):
+        storage.save_student(Student(id=1, name="Ali Veli"))
+        storage.save_course_catalog([{"code": "YMH101", "title": "T", "credit": 3}])
+
+        leftovers = [p.name for p in self.data_dir.iterdir() if p.suffix == ".tmp"]
+        self.assertEqual(leftovers, [])
+        self.assertEqual(len(list(storage.iter_all_students())), 1)
+
+    def test_failed_write_keeps_previous_file(self):
+        storage.save_student(Student(id=1, name="Eski"))
+
+        with patch.object(storage.os, "replace", side_effect=OSError("disk")):
+            with self.assertRaises(OSError):
+                storage.save_student(Student(id=1, name="Yeni"))
+
+        self.assertEqual(storage.load_student(1).name, "Eski")
+        leftovers = [p.name for p in self.data_dir.iterdir() if p.suffix == ".tmp"]
+        self.assertEqual(leftovers, [])
+
+    def test_save_bumps_version(self):
+        student = Student(id=1, name="Ali Veli")
+        storage.save_student(student)
+        storage.save_student(student)
+
+        self.assertEqual(student.version, 2)
+        self.assertEqual(storage.load_student(1).version, 2)
+
+    def test_compare_and_swap_rejects_stale_version(self):
+        storage.save_student(Student(id=1, name="Ali Veli"))
+        first = storage.load_student(1)
+        second = storage.load_student(1)
+
+        first.gpa = 2.0
+        storage.save_student(first, expected_version=1)
+
+        second.gpa = 3.0
+        with self.assertRaises(storage.VersionConflictError):
+            storage.save_student(second, expected_version=1)
+        self.assertAlmostEqual(storage.load_student(1).gpa, 2.0)
+
+    def test_save_maintains_deadline_index(self):
+        today = date.today()
+        student = Student(id=1, name="Ali Veli", assignments=[
+            Assignment(deadline=today + timedelta(days=1)),
+            Assignment(deadline=today + timedelta(days=2), done=True),
+            Assignment(deadline=today + timedelta(days=10)),
+        ])
+        storage.save_student(student)
+        conn = storage.index_connection()
+
+        due = deadline_index.due_between(conn, today, today + timedelta(days=2))
+        self.assertEqual(due, {1: [(1, today + timedelta(days=1), False)]})
+
+        student.update_assignment(1, done=True)
+        storage.save_student(student)
+        self.assertEqual(
+            deadline_index.due_between(conn, today, today + timedelta(days=2)), {}
+        )
+        self.assertEqual(storage.dirty_students(), {1: 2})
+
+    def test_failed_write_leaves_no_index_rows(self):
+        today = date.today()
+        storage.save_student(Student(id=1, name="Eski"))
+        storage.clear_dirty_students({1: 1})
+
+        student = Student(id=1, name="Yeni", assignments=[Assignment(deadline=today)])
+        with patch.object(storage.os, "replace", side_effect=OSError("disk")):
+            with self.assertRaises(OSError):
+                storage.save_student(student)
+
+        conn = storage.index_connection()
+        self.assertEqual(deadline_index.due_between(conn, today, today), {})
+        # Yalnızca diskteki sürümü gösteren işaret kalır; bir sonraki işleniş onu kaldırır
+        self.assertEqual(storage.dirty_students(), {1: 1})
+
+    def test_file_is_written_outside_the_index_transaction(self):
+        conn = storage.index_connection()
+        in_transaction = []
+        original = storage._atomic_write_json
+
+        def atomic_write_json(path, data):
+            in_transaction.append(conn.in_transaction)
+            original(path, data)
+
+        with patch.object(storage, "_atomic_write_json", atomic_write_json):
+            storage.save_student(Student(id=1, name="Öğrenci", assignments=[
+                Assignment(deadline=date.today())
+            ]))
+
+        self.assertEqual(in_transaction, [False])
+        self.assertFalse(conn.in_transaction)
+        self.assertEqual(len(deadline_index.due_between(conn, date.today(), date.today())), 1)
+
+    def test_saves_with_same_size_and_mtime_get_new_tokens(self):
+        catalog_path = self.data_dir / "course_catalog.json"
+        storage.save_course_catalog([{"code": "YMH101", "title": "Programlama", "credit": 3}])
+        first = storage.scoring_token()
+        stat = catalog_path.stat()
+
+        # Kaba mtime çözünürlüğü: ikinci kayıt aynı boyut ve aynı mtime ile kalır
+        storage.save_course_catalog([{"code": "YMH102", "title": "Programlama", "credit": 3}])
+        os.utime(catalog_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(catalog_path.stat().st_size, stat.st_size)
+        self.assertNotEqual(storage.scoring_token(), first)
+
+        model_token = storage.save_risk_model(DEFAULT_CONFIG).token
+        model_path = self.data_dir / storage.RISK_MODEL_FILE
+        model_stat = model_path.stat()
+        storage.save_risk_model(DEFAULT_CONFIG)
+        os.utime(model_path, ns=(model_stat.st_atime_ns, model_stat.st_mtime_ns))
+        self.assertNotEqual(storage.risk_model_token(), model_token)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+"""
+Compare two benchmark result files.
+
+    python -m benchmarks.compare benchmarks/results/abc1234.json benchmarks/results/def5678.json
+
+Prints the median of every benchmark present in both files and exits with
+status 1 if any got slower than ``--threshold`` (default 10%).
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def compare(old: dict, new: dict, threshold: float):
+    """Yield (scale, name, old median, new median, ratio, regressed) rows."""
+    for scale, new_results in new["scales"].items():
+        old_results = old["scales"].get(scale, {})
+        for name, result in new_results.items():
+            if name not in old_results:
+                continue
+            old_median = old_results[name]["median"]
+            new_median = result["median"]
+            ratio = new_median / old_median if old_median else float("inf")
+            yield scale, name, old_median, new_median, ratio, ratio > 1 + threshold
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("old", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed slowdown before failing (default: 0.10)")
+    args = parser.parse_args(argv)
+
+    old = json.loads(args.old.read_text())
+    new = json.loads(args.new.read_text())
+    print(f"{old['commit']} -> {new['commit']}")
+
+    regressions = 0
+    for scale, name, old_median, new_median, ratio, regressed in compare(old, new, args.threshold):
+        regressions += regressed
+        print(f"{scale:>7}  {name:<30} {old_median * 1e3:10.3f} ms -> {new_median * 1e3:10.3f} ms"
+              f"  x{ratio:5.2f}{'  REGRESSION' if regressed else ''}")
+
+    if regressions:
+        print(f"{regressions} benchmark(s) slower than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Deterministic synthetic data for benchmarks.
+
+The same (size, seed) always produces the same catalog and students, so
+timings from different commits are measured on identical inputs.
+"""
+import random
+from datetime import date, timedelta
+from typing import Dict, List
+
+from app.domain.models import Assignment, CourseEnrollment, Student, Term
+
+DEPARTMENTS = ("YMH", "BIL", "MAT", "FIZ", "EEM", "END")
+GRADES = ("AA", "BA", "BB", "CB", "CC", "DC", "DD", "FF")
+# Düşük notlar daha seyrek
+GRADE_WEIGHTS = (10, 14, 18, 18, 16, 10, 8, 6)
+FIRST_NAMES = ("Ayşe", "Mehmet", "Zeynep", "Ali", "Elif", "Mustafa", "Şule", "İsmail", "Gül", "Çağrı")
+LAST_NAMES = ("Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Öztürk", "Aydın", "Arslan", "Doğan", "Kılıç")
+
+
+def generate_catalog(levels: int = 8, courses_per_level: int = 30, seed: int = 1) -> List[Dict]:
+    """
+    A layered course catalog: every course at level ``n`` has one to three
+    prerequisites from level ``n - 1`` and sometimes one from further down,
+    giving prerequisite chains ``levels`` deep.
+    """
+    rng = random.Random(seed)
+    catalog = []
+    previous: List[str] = []
+    lower: List[str] = []
+    for level in range(1, levels + 1):
+        current = []
+        for index in range(courses_per_level):
+            department = DEPARTMENTS[index % len(DEPARTMENTS)]
+            code = f"{department}{level}{index:02d}"
+            prereq = rng.sample(previous, k=min(len(previous), rng.randint(1, 3))) if previous else []
+            if lower and rng.random() < 0.3:
+                prereq.append(rng.choice(lower))
+            catalog.append({
+                "code": code,
+                "title": f"{department} Dersi {level}.{index}",
+                "credit": rng.choice((2, 3, 4, 5)),
+                "prereq": sorted(set(prereq)),
+            })
+            current.append(code)
+        lower.extend(previous)
+        previous = current
+    return catalog
+
+
+def generate_students(
+    count: int,
+    catalog: List[Dict],
+    seed: int = 1,
+    today: date = date(2025, 3, 1),
+    first_id: int = 1
+) -> List[Student]:
+    """
+    Students with several past terms of graded courses, a current term,
+    assignments around ``today`` and random absences.
+    """
+    rng = random.Random(seed)
+    codes = [course["code"] for course in catalog]
+    students = []
+    for offset in range(count):
+        terms = []
+        term_count = rng.randint(1, 8)
+        taken = rng.sample(codes, k=min(len(codes), term_count * 5))
+        for term_index in range(term_count):
+            year = today.year - (term_count - term_index) // 2
+            semester = 1 if (term_count - term_index) % 2 == 0 else 2
+            current = term_index == term_count - 1
+            courses = []
+            for code in taken[term_index * 5:(term_index + 1) * 5]:
+                if current:
+                    courses.append(CourseEnrollment(code=code))
+                else:
+                    grade = rng.choices(GRADES, weights=GRADE_WEIGHTS)[0]
+                    courses.append(CourseEnrollment(code=code, completed=True, grade=grade))
+            terms.append(Term(year=year, semester=semester, courses=courses))
+        assignments = [
+            Assignment(
+                deadline=today + timedelta(days=rng.randint(-60, 60)),
+                done=rng.random() < 0.6,
+            )
+            for _ in range(rng.randint(0, 25))
+        ]
+        absence_bits = 0
+        for bit in rng.sample(range(14), k=rng.randint(0, 12)):
+            absence_bits |= 1 << bit
+        students.append(Student(
+            id=first_id + offset,
+            name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            gpa=round(rng.uniform(0.8, 4.0), 2),
+            absence_bits=absence_bits,
+            terms=terms,
+            assignments=assignments,
+        ))
+    return students
@@ -0,0 +1,255 @@
+"""
+Benchmark runner.
+
+    python -m benchmarks.run --scales 100,1000 --repeat 5
+
+Every scale gets a fresh temporary DATA_DIR filled from the deterministic
+generator. Results (per-operation seconds: min, median, p95) are printed
+and written to benchmarks/results/<commit>.json for benchmarks.compare.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from app.domain.catalog import validate_catalog
+from app.domain.ds.name_index import NameIndex
+from app.domain.ds.prereq_graph import PrereqGraph
+from app.domain.risk import RiskEngine
+from app.infrastructure import storage
+from benchmarks.generator import generate_catalog, generate_students
+
+RESULTS_DIR = Path(__file__).parent / "results"
+SAMPLE_SIZE = 200
+BATCH_SIZE = 50
+
+
+def measure(fn: Callable[[], Any], repeat: int, ops: int = 1) -> Dict[str, float]:
+    """Time ``fn`` ``repeat`` times; ``ops`` is how many operations one call performs."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) / ops)
+    timings.sort()
+    return {
+        "ops": ops,
+        "repeat": repeat,
+        "min": timings[0],
+        "median": statistics.median(timings),
+        "p95": timings[min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))],
+    }
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _reset_caches() -> None:
+    # Bir ölçeğin ısıttığı önbellekler sonrakinin ölçümlerine taşınmasın
+    storage._catalog_index_cache = None
+    storage._risk_model_cache = None
+
+
+def bench_scale(data_dir: Path, size: int, repeat: int, seed: int) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    storage.DATA_DIR = data_dir
+    _reset_caches()
+
+    catalog = generate_catalog(seed=seed)
+    students = generate_students(size, catalog, seed=seed, today=date.today())
+    rng = random.Random(seed)
+    sample = [rng.choice(students) for _ in range(min(SAMPLE_SIZE, size))]
+    sample_ids = [student.id for student in sample]
+    codes = [course["code"] for course in catalog]
+
+    results["catalog.validate"] = measure(lambda: validate_catalog(catalog), repeat)
+    storage.save_course_catalog(catalog)
+
+    # Depolama
+    start = time.perf_counter()
+    for student in students:
+        storage.save_student(student)
+    elapsed = (time.perf_counter() - start) / size
+    results["storage.save_student"] = {
+        "ops": size, "repeat": 1, "min": elapsed, "median": elapsed, "p95": elapsed
+    }
+    results["storage.load_student"] = measure(
+        lambda: [storage.load_student(student_id) for student_id in sample_ids],
+        repeat, ops=len(sample_ids)
+    )
+    results["storage.iter_all_students"] = measure(
+        lambda: sum(1 for _ in storage.iter_all_students()), max(1, repeat // 2)
+    )
+
+    # Ad arama dizini
+    name_index = NameIndex()
+    results["name_index.build"] = measure(
+        lambda: name_index.build({student.id: student.name for student in students}),
+        max(1, repeat // 2)
+    )
+    queries = [student.name.split()[0][:3] for student in sample]
+    results["name_index.search"] = measure(
+        lambda: [name_index.search(query) for query in queries], repeat, ops=len(queries)
+    )
+
+    # Ön koşul grafiği
+    def cold_prereqs():
+        graph = PrereqGraph()
+        for course in catalog:
+            graph.add_course(course["code"], course["prereq"])
+        for code in codes:
+            graph.get_prerequisites(code)
+
+    warm_graph = PrereqGraph()
+    warm_graph.build_from_courses({course["code"]: course["prereq"] for course in catalog})
+    results["prereq_graph.closure_cold"] = measure(cold_prereqs, repeat, ops=len(codes))
+    results["prereq_graph.closure_warm"] = measure(
+        lambda: [warm_graph.get_prerequisites(code) for code in codes], repeat, ops=len(codes)
+    )
+
+    # Risk motoru
+    results["risk_engine.init"] = measure(
+        lambda: RiskEngine(storage, storage.load_risk_model()), repeat
+    )
+    engine = RiskEngine(storage, storage.load_risk_model())
+    results["risk_engine.calculate"] = measure(
+        lambda: [engine.calculate(student) for student in sample], repeat, ops=len(sample)
+    )
+    results["risk_engine.calculate_many"] = measure(
+        lambda: engine.calculate_many(students), max(1, repeat // 2), ops=size
+    )
+
+    # Gece işi
+    from app.services.scheduler import nightly_job
+    results["nightly_job.full"] = measure(nightly_job, 1)
+    results["nightly_job.incremental"] = measure(nightly_job, repeat)
+
+    results.update(bench_api(sample_ids, repeat))
+    return results
+
+
+def bench_api(sample_ids: List[int], repeat: int) -> Dict[str, Dict[str, float]]:
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError:  # httpx yoksa API ölçümleri atlanır
+        return {}
+    from app.api import routes
+    from app.main import app
+
+    routes.course_trie.clear()
+    # Başlangıç olayları (zamanlayıcı) çalışmasın diye istemci bağlam yöneticisiz kullanılır
+    client = TestClient(app)
+    batch = {"student_ids": sample_ids[:BATCH_SIZE]}
+
+    def get_each(path: str):
+        def run():
+            for student_id in sample_ids:
+                client.get(path.format(student_id=student_id))
+        return run
+
+    return {
+        "api.autocomplete": measure(
+            lambda: [client.get("/api/courses/autocomplete", params={"query": prefix})
+                     for prefix in ("Y", "YMH", "BIL5", "MAT81")],
+            repeat, ops=4
+        ),
+        "api.student_risk": measure(
+            get_each("/api/students/{student_id}/risk"), repeat, ops=len(sample_ids)
+        ),
+        "api.student_dashboard": measure(
+            get_each("/api/students/{student_id}/dashboard"), repeat, ops=len(sample_ids)
+        ),
+        "api.risk_batch": measure(lambda: client.post("/api/risk/batch", json=batch), repeat),
+        "api.risk_top": measure(lambda: client.get("/api/risk/top", params={"k": 50}), repeat),
+        "api.risk_analytics": measure(
+            lambda: client.get("/api/risk/analytics", params={"group_by": "course"}), repeat
+        ),
+    }
+
+
+def bench_startup(repeat: int) -> Dict[str, Dict[str, float]]:
+    """Importing app.main in a fresh interpreter: what a new worker pays before serving."""
+    root = Path(__file__).resolve().parent.parent
+    env = {**os.environ, "DATA_DIR": tempfile.mkdtemp(prefix="derstakip-bench-startup-")}
+
+    def import_app():
+        subprocess.run([sys.executable, "-c", "import app.main"],
+                       cwd=root, env=env, check=True, capture_output=True)
+
+    try:
+        return {"startup.import_app": measure(import_app, repeat)}
+    finally:
+        shutil.rmtree(env["DATA_DIR"], ignore_errors=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", default="100,1000",
+                        help="comma-separated student counts (default: 100,1000)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, default=None,
+                        help="result file (default: benchmarks/results/<commit>.json)")
+    args = parser.parse_args(argv)
+
+    # Gece işinin öğrenci başına uyarıları ölçümü bozmasın
+    logging.disable(logging.CRITICAL)
+
+    commit = _git("rev-parse", "--short", "HEAD") or "unknown"
+    report = {
+        "commit": commit,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "scales": {},
+    }
+    report["scales"]["startup"] = startup = bench_startup(args.repeat)
+    for name, result in startup.items():
+        print(f"{'-':>7}  {name:<30} median {result['median'] * 1e3:10.3f} ms"
+              f"   min {result['min'] * 1e3:10.3f} ms", file=sys.stderr)
+    original_data_dir = storage.DATA_DIR
+    try:
+        for size in (int(value) for value in args.scales.split(",")):
+            print(f"== {size} students", file=sys.stderr)
+            data_dir = Path(tempfile.mkdtemp(prefix=f"derstakip-bench-{size}-"))
+            try:
+                results = bench_scale(data_dir, size, args.repeat, args.seed)
+            finally:
+                shutil.rmtree(data_dir, ignore_errors=True)
+            report["scales"][str(size)] = results
+            for name, result in results.items():
+                print(f"{size:>7}  {name:<30} median {result['median'] * 1e3:10.3f} ms"
+                      f"   min {result['min'] * 1e3:10.3f} ms", file=sys.stderr)
+    finally:
+        storage.DATA_DIR = original_data_dir
+        _reset_caches()
+
+    output = args.output or RESULTS_DIR / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"Results written to {output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,10 @@ def create_app():
     app = Flask(__name__)
     app.config["SECRET_KEY"] = "change-me"
     app.config["API_URL"] = "http://localhost:8000/api"  # FastAPI backend adresi
+    app.config["API_CACHE_SIZE"] = 256  # ETag önbelleğinde tutulacak en fazla yanıt
+    app.config["API_TIMEOUT"] = (3.05, 10)  # (bağlantı, okuma) zaman aşımı, saniye
+    app.config["API_POOL_SIZE"] = 10  # Backend'e açık tutulacak en fazla bağlantı
+    app.config["API_RETRIES"] = 2  # GET/DELETE için geçici hatalarda yeniden deneme
     
     # Hata ayıklama araç çubuğu yapılandırması
     app.config["DEBUG_TB_INTERCEPT_REDIRECTS"] = False
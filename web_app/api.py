@@ -1,20 +1,102 @@
+import json as jsonlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 from flask import current_app
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Süreç başına tek, keep-alive bağlantı havuzlu oturum
+_session = None
+_session_lock = threading.Lock()
+
+# Koşullu GET önbelleği: url -> (ETag, ham yanıt gövdesi)
+_etag_cache = OrderedDict()
+_etag_cache_lock = threading.Lock()
+
+
+def _get_session():
+    """Bağlantı havuzlu ve yeniden denemeli paylaşılan oturumu döndürür."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                config = current_app.config
+                # Yalnızca idempotent istekler geçici hatalarda yeniden denenir
+                retry = Retry(
+                    total=config.get("API_RETRIES", 2),
+                    backoff_factor=0.1,
+                    status_forcelist=(502, 503, 504),
+                    allowed_methods=frozenset({"GET", "DELETE"}),
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=config.get("API_POOL_SIZE", 10),
+                    max_retries=retry,
+                )
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def _request(method, url, **kwargs):
+    kwargs.setdefault("timeout", current_app.config.get("API_TIMEOUT", (3.05, 10)))
+    return _get_session().request(method, url, **kwargs)
+
+
+def _cached_entry(url):
+    with _etag_cache_lock:
+        entry = _etag_cache.get(url)
+        if entry is not None:
+            _etag_cache.move_to_end(url)
+        return entry
+
+
+def _store_entry(url, etag, content):
+    max_size = current_app.config.get("API_CACHE_SIZE", 256)
+    with _etag_cache_lock:
+        _etag_cache[url] = (etag, content)
+        _etag_cache.move_to_end(url)
+        while len(_etag_cache) > max_size:
+            _etag_cache.popitem(last=False)
+
 
 def api_get(path, **kwargs):
     """
     FastAPI'ye GET isteği gönderir.
     
+    Yanıt ETag taşıyorsa gövdesi önbelleğe alınır; aynı yol tekrar
+    istendiğinde If-None-Match gönderilir ve 304 yanıtında önbellekteki
+    gövde kullanılır.
+    
     Args:
         path: API endpoint yolu (örn. "/students/1")
-        **kwargs: requests.get'e iletilecek diğer parametreler
+        **kwargs: Session.request'e iletilecek diğer parametreler
         
     Returns:
         JSON yanıtı
     """
     url = f"{current_app.config['API_URL']}{path}"
-    r = requests.get(url, **kwargs)
+    # Ek parametreli istekler (params, headers...) önbelleğe alınmaz
+    cacheable = not kwargs
+    entry = _cached_entry(url) if cacheable else None
+    if entry is not None:
+        kwargs["headers"] = {"If-None-Match": entry[0]}
+    
+    r = _request("GET", url, **kwargs)
+    if entry is not None and r.status_code == 304:
+        # Her çağırana ayrı bir kopya dönsün diye gövde yeniden ayrıştırılır
+        return jsonlib.loads(entry[1])
     r.raise_for_status()
+    
+    etag = r.headers.get("ETag")
+    if cacheable and etag:
+        _store_entry(url, etag, r.content)
     return r.json()
 
 def api_post(path, json=None, **kwargs):
@@ -24,13 +106,13 @@ def api_post(path, json=None, **kwargs):
     Args:
         path: API endpoint yolu (örn. "/students/")
         json: Gönderilecek JSON verisi
-        **kwargs: requests.post'a iletilecek diğer parametreler
+        **kwargs: Session.request'e iletilecek diğer parametreler
         
     Returns:
         JSON yanıtı
     """
     url = f"{current_app.config['API_URL']}{path}"
-    r = requests.post(url, json=json, **kwargs)
+    r = _request("POST", url, json=json, **kwargs)
     r.raise_for_status()
     return r.json()
 
@@ -40,12 +122,40 @@ def api_delete(path, **kwargs):
     
     Args:
         path: API endpoint yolu (örn. "/students/1/courses/CS101")
-        **kwargs: requests.delete'e iletilecek diğer parametreler
+        **kwargs: Session.request'e iletilecek diğer parametreler
         
     Returns:
         JSON yanıtı
     """
     url = f"{current_app.config['API_URL']}{path}"
-    r = requests.delete(url, **kwargs)
+    r = _request("DELETE", url, **kwargs)
     r.raise_for_status()
-    return r.json() 
\ No newline at end of file
+    return r.json()
+
+def api_gather(*paths):
+    """
+    Birbirinden bağımsız GET isteklerini aynı anda gönderir.
+    
+    Toplam süre, çağrıların toplamı yerine en yavaş tek çağrının süresine
+    yaklaşır. İstekler paylaşılan oturumun bağlantı havuzunu kullanır; aynı
+    anda en fazla API_POOL_SIZE istek gider. Herhangi bir istek hata verirse
+    ilk hata yükseltilir.
+    
+    Args:
+        *paths: API endpoint yolları
+        
+    Returns:
+        Yolların sırasıyla JSON yanıtlarının listesi
+    """
+    if len(paths) <= 1:
+        return [api_get(path) for path in paths]
+    
+    app = current_app._get_current_object()
+    
+    def fetch(path):
+        with app.app_context():
+            return api_get(path)
+    
+    workers = min(len(paths), app.config.get("API_POOL_SIZE", 10))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-client") as executor:
+        return list(executor.map(fetch, paths))
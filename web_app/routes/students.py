@@ -8,15 +8,18 @@ bp = Blueprint("students", __name__, url_prefix="/students")
 
 @bp.route("/")
 def list_students():
-    """Öğrenci listesini göster."""
+    """Öğrenci listesini göster; ``q`` verilirse ada göre ara."""
+    query = request.args.get("q", "").strip()
     try:
-        # FastAPI'den öğrenci listesini al
-        # Not: Bu endpoint'i FastAPI'de oluşturmamız gerekecek
-        students = api_get("/students")
-        return render_template("index.html", students=students)
+        if query:
+            # Arama tüm listeyi indirmeden API'nin ad dizininden yanıtlanır
+            students = api_get("/students/search", params={"q": query, "limit": 100})["students"]
+        else:
+            students = api_get("/students")
+        return render_template("index.html", students=students, query=query)
     except Exception as e:
         flash(f"Öğrenci listesi alınamadı: {str(e)}", "error")
-        return render_template("index.html", students=[])
+        return render_template("index.html", students=[], query=query)
 
 
 @bp.route("/create", methods=["GET", "POST"])
@@ -43,15 +46,18 @@ def create_student():
 def detail(sid):
     """Öğrenci detaylarını göster."""
     try:
-        # FastAPI'den öğrenci bilgilerini al
-        student = api_get(f"/students/{sid}")
-        risk = api_get(f"/students/{sid}/risk")
+        # Sayfanın ihtiyaç duyduğu her şeyi tek backend çağrısıyla al
+        dashboard = api_get(f"/students/{sid}/dashboard")
+        risk = dashboard["risk"]
         
         return render_template(
             "student_detail.html", 
-            student=student, 
+            student=dashboard["student"], 
             risk=risk.get("risk_score", 0.0),
-            risk_level=risk.get("risk_level", "LOW")
+            risk_level=risk.get("risk_level", "LOW"),
+            risk_components=risk.get("components", {}),
+            assignments=dashboard.get("assignments", []),
+            courses=dashboard.get("courses", {})
         )
     except Exception as e:
         flash(f"Öğrenci bilgileri alınamadı: {str(e)}", "error")
@@ -182,22 +188,12 @@ def add_assignment(sid):
     
     if form.validate_on_submit():
         try:
-            # Öğrenci bilgilerini al
-            student = api_get(f"/students/{sid}")
-            
-            # Yeni ödevi ekle
-            new_assignment = {
+            # Yalnızca yeni ödevi gönder; öğrencinin tamamını yeniden yazmak
+            # eşzamanlı düzenlemelerle çakışırdı
+            api_post(f"/students/{sid}/assignments", json={
                 "deadline": form.deadline.data,
                 "done": form.done.data
-            }
-            
-            if "assignments" not in student:
-                student["assignments"] = []
-            
-            student["assignments"].append(new_assignment)
-            
-            # Öğrenci bilgilerini güncelle
-            api_post(f"/students/{sid}", json=student)
+            })
             
             flash("Ödev eklendi", "success")
             return redirect(url_for(".detail", sid=sid))